@@ -3,12 +3,12 @@ import get from 'lodash/get';
 
 import apiRequest from '../util/apiRequest';
 
-import { fetchNextPageOfFacilities } from './facilities';
-
 import {
     makeLogDownloadUrl,
     logErrorAndDispatchFailure,
     downloadFacilitiesCSV,
+    makeExportFacilitiesURLWithQueryString,
+    createQueryStringFromSearchFilters,
 } from '../util/util';
 
 export const startLogDownload =
@@ -28,12 +28,11 @@ export function logDownload() {
                     facilities: {
                         data: {
                             features: facilities,
-                            count,
                         },
-                        nextPageURL,
                     },
                 },
                 featureFlags,
+                filters,
             } = getState();
 
             const vectorTileFlagIsActive = get(featureFlags, 'flags.vector_tile', false);
@@ -54,53 +53,12 @@ export function logDownload() {
                     )));
             }
 
-            await apiRequest.post(makeLogDownloadUrl(path, count));
-
-            if (!nextPageURL) {
-                downloadFacilitiesCSV(facilities);
-            } else {
-                let nextFacilitiesSetURL = nextPageURL;
-
-                while (nextFacilitiesSetURL) {
-                    // `no-await-in-loop` is disabled because we do want the
-                    // loop to await each individual promise so it we can check
-                    // the `nextPageURL` value each time & thereby determine
-                    // whether the loop should stop or whether it should fetch
-                    // the next page of results.
-                    //
-                    // https://eslint.org/docs/rules/no-await-in-loop indicates
-                    // that the rule is meant to help developers not mistakenly
-                    // use sequential rather than parallel Promises. However,
-                    // we don't want to issue these requests in parallel since
-                    // doing so will DOS the server. See:
-                    // https://github.com/open-apparel-registry/open-apparel-registry/pull/496
-                    //
-                    // eslint-disable-next-line no-await-in-loop
-                    await dispatch(fetchNextPageOfFacilities());
-
-                    const {
-                        facilities: {
-                            facilities: {
-                                nextPageURL: newNextPageURL,
-                            },
-                        },
-                    } = getState();
-
-                    nextFacilitiesSetURL = newNextPageURL;
-                }
-
-                const {
-                    facilities: {
-                        facilities: {
-                            data: {
-                                features,
-                            },
-                        },
-                    },
-                } = getState();
-
-                downloadFacilitiesCSV(features);
-            }
+            // The export endpoint streams every matching facility and
+            // records the download itself, so the results do not need to be
+            // paged through and logged here.
+            window.location.assign(makeExportFacilitiesURLWithQueryString(
+                createQueryStringFromSearchFilters(filters),
+            ));
 
             return dispatch(completeLogDownload());
         } catch (err) {
@@ -116,7 +116,7 @@ export default function FacilitiesMapPopup({
                                     <LinkIcon />
                                 </ListItemIcon>
                                 <ListItemText
-                                    primary={name}
+                                    primary={name || oarID}
                                     secondary={address}
                                     primaryTypographyProps={{
                                         style:
@@ -149,7 +149,8 @@ FacilitiesMapPopup.propTypes = {
     facilities: arrayOf(
         shape({
             properties: shape({
-                address: string.isRequired,
+                address: string,
+                name: string,
                 oar_id: string.isRequired,
             }).isRequired,
         }),
@@ -11,15 +11,25 @@ import map from 'lodash/map';
 import isEqual from 'lodash/isEqual';
 import intersection from 'lodash/intersection';
 import sortBy from 'lodash/sortBy';
+import keyBy from 'lodash/keyBy';
+import chunk from 'lodash/chunk';
+import flatten from 'lodash/flatten';
 
 import FacilitiesMapPopup from './FacilitiesMapPopup';
 
+import apiRequest from '../util/apiRequest';
+
 import {
     createQueryStringFromSearchFilters,
     createTileURLWithQueryString,
     createTileCacheKeyWithEncodedFilters,
+    makeGetFacilitySummariesURL,
 } from '../util/util';
 
+import { FACILITY_SUMMARIES_MAX_IDS } from '../util/constants';
+
+import { useUpdateTileURL } from '../util/hooks';
+
 const VectorGrid = withLeaflet(VectorGridDefault);
 
 const createMarkerIcon = iconUrl =>
@@ -32,49 +42,6 @@ const createMarkerIcon = iconUrl =>
 const selectedMarkerIcon = createMarkerIcon('/images/selectedmarker.png');
 const unselectedMarkerIcon = createMarkerIcon('/images/marker.png');
 
-function useUpdateTileURL(
-    tileURL,
-    performingNewSearch,
-    resetButtonClickCount,
-    closeMultipleFacilitiesPopup,
-) {
-    const [
-        vectorTileURLWithQueryParams,
-        setVectorTileURLWithQueryParams,
-    ] = useState(tileURL);
-
-    const [isFetching, setIsFetching] = useState(performingNewSearch);
-    const [storedResetCount, setStoredResetCount] = useState(
-        resetButtonClickCount,
-    );
-
-    useEffect(() => {
-        if (performingNewSearch && !isFetching) {
-            setIsFetching(true);
-        } else if (!performingNewSearch && isFetching) {
-            setIsFetching(false);
-            setVectorTileURLWithQueryParams(tileURL);
-        } else if (resetButtonClickCount !== storedResetCount) {
-            setIsFetching(false);
-            closeMultipleFacilitiesPopup();
-            setStoredResetCount(resetButtonClickCount);
-            setVectorTileURLWithQueryParams(tileURL);
-        }
-    }, [
-        tileURL,
-        setVectorTileURLWithQueryParams,
-        isFetching,
-        setIsFetching,
-        performingNewSearch,
-        storedResetCount,
-        setStoredResetCount,
-        resetButtonClickCount,
-        closeMultipleFacilitiesPopup,
-    ]);
-
-    return vectorTileURLWithQueryParams;
-}
-
 const useUpdateTileLayerWithMarkerForSelectedOARID = (oarID, otherFacilitiesAtPoint = []) => {
     const tileLayerRef = useRef(null);
 
@@ -192,14 +159,30 @@ const findFacilitiesAtSamePointFromVectorTile = (data, tileLayerRef = null) => {
         f => ({
             properties: {
                 oar_id: get(f, 'feature.properties.id', null),
-                name: get(f, 'feature.properties.name', null),
-                address: get(f, 'feature.properties.address', null),
                 visibleMarkerOARID: get(clickedFeature, 'properties.id', null),
             },
         }),
     );
 };
 
+// Tiles include only facility IDs, so the names and addresses shown in the
+// popup for facilities that share a point are fetched after it is opened,
+// in requests of at most the number of IDs the API accepts at once.
+const addSummariesToFacilitiesAtSamePoint = facilities => Promise.all(
+    chunk(map(facilities, 'properties.oar_id'), FACILITY_SUMMARIES_MAX_IDS)
+        .map(oarIDs => apiRequest.get(makeGetFacilitySummariesURL(oarIDs))),
+)
+    .then((responses) => {
+        const summaries = keyBy(flatten(map(responses, 'data')), 'id');
+
+        return map(facilities, f => ({
+            properties: Object.assign({}, f.properties, {
+                name: get(summaries, [f.properties.oar_id, 'name'], null),
+                address: get(summaries, [f.properties.oar_id, 'address'], null),
+            }),
+        }));
+    });
+
 const VectorTileFacilitiesLayer = ({
     tileURL,
     handleMarkerClick,
@@ -222,6 +205,10 @@ const VectorTileFacilitiesLayer = ({
 
     const closeMultipleFacilitiesPopup = () => setMultipleFacilitiesAtPointPosition(null);
 
+    // The facilities at the most recently clicked point, so that summaries
+    // fetched for an earlier click are not shown for a later one.
+    const clickedFacilitiesRef = useRef(null);
+
     const vectorTileURL = useUpdateTileURL(
         tileURL,
         fetching,
@@ -246,6 +233,7 @@ const VectorTileFacilitiesLayer = ({
     const handleVectorLayerClick = (data) => {
         try {
             setMultipleFacilitiesAtPoint(null);
+            clickedFacilitiesRef.current = null;
 
             const facilitiesAtSamePoint = findFacilitiesAtSamePointFromVectorTile(
                 data,
@@ -260,8 +248,19 @@ const VectorTileFacilitiesLayer = ({
                 return handleMarkerClick(data);
             }
 
+            clickedFacilitiesRef.current = facilitiesAtSamePoint;
             setMultipleFacilitiesAtPoint(facilitiesAtSamePoint);
-            return setMultipleFacilitiesAtPointPosition(data.latlng);
+            setMultipleFacilitiesAtPointPosition(data.latlng);
+
+            return addSummariesToFacilitiesAtSamePoint(facilitiesAtSamePoint)
+                .then((facilitiesWithSummaries) => {
+                    if (
+                        clickedFacilitiesRef.current === facilitiesAtSamePoint
+                    ) {
+                        setMultipleFacilitiesAtPoint(facilitiesWithSummaries);
+                    }
+                })
+                .catch(e => window.console.error(e));
         } catch (e) {
             window.console.error(e);
 
@@ -287,7 +286,7 @@ const VectorTileFacilitiesLayer = ({
                 minZoom={minZoom}
                 maxZoom={maxZoom}
                 vectorTileLayerStyles={{
-                    facilities(properties) {
+                    facilitypoints(properties) {
                         const facilityID = get(properties, 'id', null);
 
                         return {
@@ -356,7 +355,7 @@ function mapStateToProps({
 }) {
     const querystring = createQueryStringFromSearchFilters(filters);
     const tileCacheKey = createTileCacheKeyWithEncodedFilters(filters, key);
-    const tileURL = createTileURLWithQueryString(querystring, tileCacheKey, false);
+    const tileURL = createTileURLWithQueryString(querystring, tileCacheKey, 'facilitypoints');
 
     return {
         tileURL,
@@ -13,6 +13,7 @@ import get from 'lodash/get';
 import Button from './Button';
 import VectorTileFacilitiesLayer from './VectorTileFacilitiesLayer';
 import VectorTileFacilityGridLayer from './VectorTileFacilityGridLayer';
+import VectorTileFacilityClustersLayer from './VectorTileFacilityClustersLayer';
 import VectorTileGridLegend from './VectorTileGridLegend';
 import ZoomToSearchControl from './ZoomToSearchControl';
 import PolygonalSearchControl from './PolygonalSearchControl';
@@ -29,6 +30,7 @@ import {
     detailsZoomLevel,
     minimumZoom,
     maxVectorTileFacilitiesGridZoom,
+    maxVectorTileFacilitiesClusterZoom,
     GOOGLE_CLIENT_SIDE_API_KEY,
 } from '../util/constants.facilitiesMap';
 
@@ -103,6 +105,25 @@ function VectorTileFacilitiesMap({
         }
     };
 
+    const handleClusterClick = (event) => {
+        const { xmin, ymin, xmax, ymax, count } = get(event, 'layer.properties', {});
+        const leafletMap = get(mapRef, 'current.leafletElement', null);
+        if (!count || !leafletMap) {
+            return noop();
+        }
+
+        if (count === 1 || (xmin === xmax && ymin === ymax)) {
+            return leafletMap.setView(
+                [ymin, xmin],
+                maxVectorTileFacilitiesClusterZoom + 1,
+            );
+        }
+
+        return leafletMap.fitBounds([[ymin, xmin], [ymax, xmax]], {
+            maxZoom: maxVectorTileFacilitiesClusterZoom + 1,
+        });
+    };
+
     return (
         <ReactLeafletMap
             id="oar-leaflet-map"
@@ -154,9 +175,14 @@ function VectorTileFacilitiesMap({
                 handleMarkerClick={handleMarkerClick}
                 oarID={oarID}
                 pushRoute={push}
-                minZoom={maxVectorTileFacilitiesGridZoom + 1}
+                minZoom={maxVectorTileFacilitiesClusterZoom + 1}
                 maxZoom={22}
             />
+            <VectorTileFacilityClustersLayer
+                handleClusterClick={handleClusterClick}
+                minZoom={maxVectorTileFacilitiesGridZoom + 1}
+                maxZoom={maxVectorTileFacilitiesClusterZoom}
+            />
             <VectorTileFacilityGridLayer
                 handleCellClick={handleCellClick}
                 minZoom={1}
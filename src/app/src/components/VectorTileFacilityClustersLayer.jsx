@@ -0,0 +1,111 @@
+import React from 'react';
+import { bool, func, number, string } from 'prop-types';
+import { connect } from 'react-redux';
+import VectorGridDefault from 'react-leaflet-vectorgrid';
+import { withLeaflet } from 'react-leaflet';
+import L from 'leaflet';
+import get from 'lodash/get';
+
+import {
+    createQueryStringFromSearchFilters,
+    createTileURLWithQueryString,
+    createTileCacheKeyWithEncodedFilters,
+} from '../util/util';
+
+import { useUpdateTileURL } from '../util/hooks';
+
+const VectorGrid = withLeaflet(VectorGridDefault);
+
+const CLUSTER_COLOR = '#0427a4';
+
+const VectorTileFacilityClustersLayer = ({
+    tileURL,
+    fetching,
+    resetButtonClickCount,
+    tileCacheKey,
+    handleClusterClick,
+    minZoom,
+    maxZoom,
+}) => {
+    const vectorTileURL = useUpdateTileURL(
+        tileURL,
+        fetching,
+        resetButtonClickCount,
+    );
+
+    if (!tileCacheKey) {
+        // We throw an error here if the tile cache key is missing.
+        // This crashes the map, intentionally, but an ErrorBoundary
+        // handles the crash so that the application continues to run.
+        throw new Error('Missing tile cache key');
+    }
+
+    return (
+        <VectorGrid
+            key={vectorTileURL}
+            url={vectorTileURL}
+            type="protobuf"
+            rendererFactory={L.canvas.tile}
+            updateWhenZooming={false}
+            minZoom={minZoom}
+            maxZoom={maxZoom}
+            vectorTileLayerStyles={{
+                facilityclusters(properties) {
+                    const count = get(properties, 'count', 1);
+
+                    return {
+                        fill: true,
+                        fillColor: CLUSTER_COLOR,
+                        fillOpacity: count > 1 ? 0.6 : 0.9,
+                        stroke: true,
+                        weight: 1,
+                        color: '#ffffff',
+                        radius: Math.min(6 + (3 * Math.log2(count)), 24),
+                    };
+                },
+            }}
+            subdomains=""
+            zIndex={100}
+            interactive
+            onClick={handleClusterClick}
+        />
+    );
+};
+
+VectorTileFacilityClustersLayer.propTypes = {
+    handleClusterClick: func.isRequired,
+    tileURL: string.isRequired,
+    tileCacheKey: string.isRequired,
+    fetching: bool.isRequired,
+    resetButtonClickCount: number.isRequired,
+    minZoom: number.isRequired,
+    maxZoom: number.isRequired,
+};
+
+function mapStateToProps({
+    filters,
+    facilities: {
+        facilities: { fetching },
+    },
+    ui: {
+        facilitiesSidebarTabSearch: { resetButtonClickCount },
+    },
+    vectorTileLayer: { key },
+}) {
+    const querystring = createQueryStringFromSearchFilters(filters);
+    const tileCacheKey = createTileCacheKeyWithEncodedFilters(filters, key);
+    const tileURL = createTileURLWithQueryString(
+        querystring,
+        tileCacheKey,
+        'facilityclusters',
+    );
+
+    return {
+        tileURL,
+        tileCacheKey,
+        fetching,
+        resetButtonClickCount,
+    };
+}
+
+export default connect(mapStateToProps)(VectorTileFacilityClustersLayer);
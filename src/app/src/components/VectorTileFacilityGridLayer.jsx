@@ -1,4 +1,4 @@
-import React, { useEffect, useRef, useState } from 'react';
+import React, { useRef } from 'react';
 import { array, arrayOf, bool, func, number, string } from 'prop-types';
 import { connect } from 'react-redux';
 import VectorGridDefault from 'react-leaflet-vectorgrid';
@@ -12,43 +12,9 @@ import {
     createTileCacheKeyWithEncodedFilters,
 } from '../util/util';
 
-const VectorGrid = withLeaflet(VectorGridDefault);
-
-function useUpdateTileURL(tileURL, performingNewSearch, resetButtonClickCount) {
-    const [
-        vectorTileURLWithQueryParams,
-        setVectorTileURLWithQueryParams,
-    ] = useState(tileURL);
-
-    const [isFetching, setIsFetching] = useState(performingNewSearch);
-    const [storedResetCount, setStoredResetCount] = useState(
-        resetButtonClickCount,
-    );
+import { useUpdateTileURL } from '../util/hooks';
 
-    useEffect(() => {
-        if (performingNewSearch && !isFetching) {
-            setIsFetching(true);
-        } else if (!performingNewSearch && isFetching) {
-            setIsFetching(false);
-            setVectorTileURLWithQueryParams(tileURL);
-        } else if (resetButtonClickCount !== storedResetCount) {
-            setIsFetching(false);
-            setStoredResetCount(resetButtonClickCount);
-            setVectorTileURLWithQueryParams(tileURL);
-        }
-    }, [
-        tileURL,
-        setVectorTileURLWithQueryParams,
-        isFetching,
-        setIsFetching,
-        performingNewSearch,
-        storedResetCount,
-        setStoredResetCount,
-        resetButtonClickCount,
-    ]);
-
-    return vectorTileURLWithQueryParams;
-}
+const VectorGrid = withLeaflet(VectorGridDefault);
 
 const VectorTileFacilityGridLayer = ({
     tileURL,
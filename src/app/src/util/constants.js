@@ -2,6 +2,10 @@ export const OTHER = 'Other';
 
 export const FACILITIES_REQUEST_PAGE_SIZE = 50;
 
+// This must be kept in sync with `FacilitySummariesQueryParamsSerializer`
+// in the Django API's serializers.py file
+export const FACILITY_SUMMARIES_MAX_IDS = 100;
+
 // This choices must be kept in sync with the identical list
 // kept in the Django API's models.py file
 export const contributorTypeOptions = Object.freeze([
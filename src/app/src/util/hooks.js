@@ -3,13 +3,14 @@ import get from 'lodash/get';
 import head from 'lodash/head';
 import last from 'lodash/last';
 import delay from 'lodash/delay';
+import noop from 'lodash/noop';
 import L from 'leaflet';
 
 import {
     detailsZoomLevel,
     initialZoom,
     initialCenter,
-    maxVectorTileFacilitiesGridZoom,
+    maxVectorTileFacilitiesClusterZoom,
 } from './constants.facilitiesMap';
 
 export default function useUpdateLeafletMapImperatively(
@@ -165,7 +166,7 @@ export default function useUpdateLeafletMapImperatively(
                 const currentMapZoomLevel = leafletMap.getZoom();
 
                 const shouldSetMapView = (isVectorTileMap
-                    && (currentMapZoomLevel < maxVectorTileFacilitiesGridZoom + 1))
+                    && (currentMapZoomLevel < maxVectorTileFacilitiesClusterZoom + 1))
                     || !mapBoundsContainsFacility;
 
                 if (shouldSetMapView) {
@@ -188,3 +189,48 @@ export default function useUpdateLeafletMapImperatively(
 
     return mapRef;
 }
+
+// Vector tile layers keep requesting tiles for the previous search until the
+// new search has finished, and reload them when the reset button is clicked.
+export function useUpdateTileURL(
+    tileURL,
+    performingNewSearch,
+    resetButtonClickCount,
+    onReset = noop,
+) {
+    const [
+        vectorTileURLWithQueryParams,
+        setVectorTileURLWithQueryParams,
+    ] = useState(tileURL);
+
+    const [isFetching, setIsFetching] = useState(performingNewSearch);
+    const [storedResetCount, setStoredResetCount] = useState(
+        resetButtonClickCount,
+    );
+
+    useEffect(() => {
+        if (performingNewSearch && !isFetching) {
+            setIsFetching(true);
+        } else if (!performingNewSearch && isFetching) {
+            setIsFetching(false);
+            setVectorTileURLWithQueryParams(tileURL);
+        } else if (resetButtonClickCount !== storedResetCount) {
+            setIsFetching(false);
+            onReset();
+            setStoredResetCount(resetButtonClickCount);
+            setVectorTileURLWithQueryParams(tileURL);
+        }
+    }, [
+        tileURL,
+        setVectorTileURLWithQueryParams,
+        isFetching,
+        setIsFetching,
+        performingNewSearch,
+        storedResetCount,
+        setStoredResetCount,
+        resetButtonClickCount,
+        onReset,
+    ]);
+
+    return vectorTileURLWithQueryParams;
+}
@@ -99,6 +99,8 @@ export const makeMergeTwoFacilitiesAPIURL = (targetOARID, toMergeOARID) =>
     `/api/facilities/merge/?target=${targetOARID}&merge=${toMergeOARID}`;
 
 export const makeGetFacilitiesCountURL = () => '/api/facilities/count/';
+export const makeGetFacilitySummariesURL = oarIDs => `/api/facilities/summaries/?ids=${oarIDs.join(',')}`;
+export const makeExportFacilitiesURLWithQueryString = qs => `/api/facilities/export/?${qs}`;
 
 export const makeGetAPIFeatureFlagsURL = () => '/api-feature-flags/';
 export const makeGetFacilityClaimsURL = () => '/api/facility-claims/';
@@ -284,8 +286,8 @@ export const getContributorFromQueryString = (qs) => {
     return parseInt(contributor, 10);
 };
 
-export const createTileURLWithQueryString = (qs, key, grid = true) =>
-    `/tile/${grid ? 'facilitygrid' : 'facilities'}/${key}/{z}/{x}/{y}.pbf`.concat(
+export const createTileURLWithQueryString = (qs, key, layer = 'facilitygrid') =>
+    `/tile/${layer}/${key}/{z}/{x}/{y}.pbf`.concat(
         isEmpty(qs) ? '' : `?${qs}`,
     );
 
@@ -112,6 +112,15 @@ class SourceAdmin(admin.ModelAdmin):
     readonly_fields = ('source_type', 'facility_list', 'create')
 
 
+class FacilityDuplicateClusterAdmin(admin.ModelAdmin):
+    list_display = ('id', 'country_code', 'target_oar_id', 'oar_ids',
+                    'score', 'status')
+    list_filter = ('status', 'run', 'country_code')
+    list_editable = ('status',)
+    ordering = ('-score',)
+    readonly_fields = ('run', 'country_code', 'oar_ids', 'scores', 'score')
+
+
 admin_site.register(models.Version)
 admin_site.register(models.User, OarUserAdmin)
 admin_site.register(models.Contributor, ContributorAdmin)
@@ -124,6 +133,8 @@ admin_site.register(models.FacilityClaim, FacilityClaimAdmin)
 admin_site.register(models.FacilityClaimReviewNote,
                     FacilityClaimReviewNoteAdmin)
 admin_site.register(models.FacilityAlias, FacilityAliasAdmin)
+admin_site.register(models.FacilityDuplicateCluster,
+                    FacilityDuplicateClusterAdmin)
 admin_site.register(Flag, FlagAdmin)
 admin_site.register(Sample, SampleAdmin)
 admin_site.register(Switch, SwitchAdmin)
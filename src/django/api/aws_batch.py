@@ -5,6 +5,7 @@ from datetime import datetime
 from django.db import connection
 
 from api.constants import ProcessingAction
+from api.list_replacement import get_items_to_process
 from api.models import FacilityListItem
 
 
@@ -67,7 +68,7 @@ def submit_jobs(environment, facility_list, skip_parse=False):
         array_properties = {}
         if is_array:
             array_properties = {
-                'size': facility_list.source.facilitylistitem_set.count()
+                'size': get_items_to_process(facility_list.source).count()
             }
         job_name = 'list-{0}-{1}-{2}'.format(
             facility_list.id, action, job_time)
@@ -89,15 +90,19 @@ def submit_jobs(environment, facility_list, skip_parse=False):
                 'Failed to submit job {0}. Response {1}'.format(job_name, job))
 
     def append_processing_result(result_dict):
+        # Items that inherited the results of a replaced list's item are not
+        # submitted for processing
         query = ("UPDATE {item_table} "
                  "SET {results_column} = {results_column} || '{dict_json}' "
-                 "WHERE {source_id_column} = {source_id}")
+                 "WHERE {source_id_column} = {source_id} "
+                 "AND NOT {results_column} @> '{inherited_json}'")
         query = query.format(
             item_table=item_table,
             results_column=results_column,
             dict_json=json.dumps(result_dict),
             source_id_column=source_id_column,
-            source_id=facility_list.source.id
+            source_id=facility_list.source.id,
+            inherited_json=json.dumps([{'action': ProcessingAction.INHERIT}])
         )
         with connection.cursor() as cursor:
             cursor.execute(query)
@@ -127,7 +132,7 @@ def submit_jobs(environment, facility_list, skip_parse=False):
 
     # GEOCODE
     started = str(datetime.utcnow())
-    row_count = facility_list.source.facilitylistitem_set.count()
+    row_count = get_items_to_process(facility_list.source).count()
     is_array = row_count > 1
     geocode_job_id = submit_job('geocode',
                                 depends_on=depends_on,
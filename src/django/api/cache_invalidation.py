@@ -0,0 +1,113 @@
+import threading
+
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.db.models import F
+
+from api.models import Version
+
+
+class CacheGeneration:
+    """
+    A counter that is incremented whenever this process changes data that
+    affects a cache. It is included in cache keys alongside a version that is
+    shared by all processes through the database, so that changes made in a
+    transaction that is later rolled back (and therefore do not change the
+    shared version) still invalidate entries cached by this process while the
+    transaction was open. Each subclass keeps its own count.
+    """
+    _lock = threading.Lock()
+    _generation = 0
+
+    @classmethod
+    def get(cls):
+        return cls._generation
+
+    @classmethod
+    def increment(cls):
+        with cls._lock:
+            cls._generation += 1
+
+
+class FacilityCacheGeneration(CacheGeneration):
+    """
+    Counts changes that affect cached facility query results, which are
+    keyed by the tile cache key.
+    """
+    _generation = 0
+
+
+class ContributorLookupGeneration(CacheGeneration):
+    """
+    Counts changes that affect the cached contributor and contributor type
+    lookups, which are keyed by the `contributor_lookups` version.
+    """
+    _generation = 0
+
+
+def increment_tile_version():
+    Version.objects \
+           .filter(name='tile_version') \
+           .update(version=F('version') + 1)
+
+
+def increment_contributor_lookups_version():
+    Version.objects \
+           .filter(name='contributor_lookups') \
+           .update(version=F('version') + 1)
+
+
+def _schedule_once_on_commit(func):
+    already_scheduled = any(f is func for _, f in connection.run_on_commit)
+    if not already_scheduled:
+        transaction.on_commit(func)
+
+
+_deferred_invalidation = threading.local()
+
+
+def invalidate_facility_caches():
+    """
+    Invalidate cached facility query results in this process immediately and
+    in all processes once the current transaction commits. The tile version
+    is incremented at most once per transaction no matter how many changes
+    are made.
+    """
+    if getattr(_deferred_invalidation, 'active', False):
+        _deferred_invalidation.pending = True
+        return
+    FacilityCacheGeneration.increment()
+    _schedule_once_on_commit(increment_tile_version)
+
+
+@contextmanager
+def defer_facility_cache_invalidation():
+    """
+    Replace the facility cache invalidations requested in a block, which may
+    span several transactions, with a single invalidation when it exits.
+    """
+    if getattr(_deferred_invalidation, 'active', False):
+        yield
+        return
+
+    _deferred_invalidation.active = True
+    _deferred_invalidation.pending = False
+    try:
+        yield
+    finally:
+        pending = _deferred_invalidation.pending
+        _deferred_invalidation.active = False
+        _deferred_invalidation.pending = False
+        if pending:
+            invalidate_facility_caches()
+
+
+def invalidate_contributor_lookups():
+    """
+    Invalidate the cached contributor and contributor type lookups in this
+    process immediately and in all processes once the current transaction
+    commits.
+    """
+    ContributorLookupGeneration.increment()
+    _schedule_once_on_commit(increment_contributor_lookups_version)
@@ -16,6 +16,7 @@ class ProcessingAction:
     PROMOTE_MATCH = 'promote_match'
     MERGE_FACILITY = 'merge_facility'
     SPLIT_FACILITY = 'split_facility'
+    INHERIT = 'inherit'
 
 
 class FacilitiesQueryParams:
@@ -26,6 +27,7 @@ class FacilitiesQueryParams:
     COUNTRIES = 'countries'
     COMBINE_CONTRIBUTORS = 'combine_contributors'
     BOUNDARY = 'boundary'
+    CURSOR = 'cursor'
 
 
 class FacilityListQueryParams:
@@ -123,3 +125,21 @@ class UpdateLocationParams:
     LNG = 'lng'
     NOTES = 'notes'
     CONTRIBUTOR_ID = 'contributor_id'
+
+
+class FacilityExportQueryParams:
+    FILE_FORMAT = 'file_format'
+
+
+class FacilityExportFormats:
+    CSV = 'csv'
+    GEOJSON = 'geojson'
+
+
+class FacilitySummariesQueryParams:
+    IDS = 'ids'
+
+
+class FacilityMatchDecisions:
+    CONFIRM = 'confirm'
+    REJECT = 'reject'
@@ -0,0 +1,70 @@
+import hashlib
+import json
+
+from django.core.cache import cache
+
+from api.cache_invalidation import ContributorLookupGeneration
+from api.models import Contributor, FacilityListItem, Source, Version
+
+LOOKUPS_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _etag(data):
+    return '"{}"'.format(
+        hashlib.md5(json.dumps(data).encode()).hexdigest())
+
+
+def build_contributor_lookups():
+    """
+    Build the contributor and contributor type choices shown in the search
+    filters from the contributors with public, active sources that have
+    completed processing, using a single query.
+    """
+    valid_sources = Source.objects.filter(
+        is_active=True, is_public=True,
+        facilitylistitem__status__in=FacilityListItem.COMPLETE_STATUSES)
+    contributors = list(
+        Contributor
+        .objects
+        .filter(source__in=valid_sources)
+        .distinct()
+        .order_by('name', 'id')
+        .values_list('id', 'name', 'contrib_type'))
+
+    type_counts = {}
+    for _, _, contrib_type in contributors:
+        type_counts[contrib_type] = type_counts.get(contrib_type, 0) + 1
+
+    contributor_choices = [[contributor_id, name]
+                           for contributor_id, name, _ in contributors]
+    contributor_type_choices = [
+        [value, '{} [{}]'.format(label, type_counts.get(value, 0))]
+        for value, label
+        in Contributor.CONTRIB_TYPE_CHOICES
+    ]
+    return {
+        'contributors': contributor_choices,
+        'contributors_etag': _etag(contributor_choices),
+        'contributor_types': contributor_type_choices,
+        'contributor_types_etag': _etag(contributor_type_choices),
+    }
+
+
+def get_contributor_lookups():
+    """
+    Return the contributor and contributor type choices along with ETags
+    for each, reading from and writing to the cache. The cache key changes
+    whenever sources, contributors, or the completion of list items change.
+    """
+    try:
+        version = Version.objects.get(name='contributor_lookups').version
+    except Version.DoesNotExist:
+        version = 0
+    cache_key = 'contributor-lookups:{}:{}'.format(
+        version, ContributorLookupGeneration.get())
+
+    lookups = cache.get(cache_key)
+    if lookups is None:
+        lookups = build_contributor_lookups()
+        cache.set(cache_key, lookups, LOOKUPS_CACHE_TIMEOUT)
+    return lookups
@@ -0,0 +1,59 @@
+from django.core.cache import cache
+from django.db.models import Subquery
+from waffle import switch_is_active
+
+from api.cache_invalidation import FacilityCacheGeneration
+from api.models import Facility, Version
+from api.serializers import FacilityDetailsSerializer
+
+DETAILS_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def get_facility_details_cache_key(facility_id, updated_at, tile_version,
+                                   user_can_see_detail):
+    """
+    Build a cache key for a rendered facility details document.
+
+    `Facility.updated_at` changes whenever the facility itself is saved, and
+    the tile version and `FacilityCacheGeneration` change whenever any of the
+    matches, list items, sources, lists, contributors, claims, or locations
+    rendered in facility details change (see `api.signals`), so together they
+    serve as a version that is shared by all processes through the database.
+    Entries for older versions are never read again and expire on their own.
+    """
+    return 'facility-details:{}:{}:{}:{}:{}:{}'.format(
+        facility_id,
+        updated_at.isoformat(),
+        tile_version or 0,
+        FacilityCacheGeneration.get(),
+        'full' if user_can_see_detail else 'anonymized',
+        'claims' if switch_is_active('claim_a_facility') else 'no-claims')
+
+
+def get_facility_details(facility_id, request):
+    """
+    Return the serialized details of a facility as seen by the user making a
+    request, reading from and writing to the cache.
+
+    Raises Facility.DoesNotExist if there is no facility with the ID.
+    """
+    updated_at, tile_version = Facility \
+        .objects \
+        .annotate(tile_version=Subquery(
+            Version
+            .objects
+            .filter(name='tile_version')
+            .values('version'))) \
+        .values_list('updated_at', 'tile_version') \
+        .get(pk=facility_id)
+    cache_key = get_facility_details_cache_key(
+        facility_id, updated_at, tile_version,
+        Facility.user_can_see_contributor_details(request.user))
+
+    data = cache.get(cache_key)
+    if data is None:
+        facility = Facility.objects.get(pk=facility_id)
+        data = FacilityDetailsSerializer(
+            facility, context={'request': request}).data
+        cache.set(cache_key, data, DETAILS_CACHE_TIMEOUT)
+    return data
@@ -0,0 +1,173 @@
+import io
+
+import dedupe
+
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from api.facility_merge import MERGE_CHUNK_SIZE, merge_facility_groups
+from api.matching import (MODEL_FIELDS,
+                          MatchDefaults,
+                          clean,
+                          get_training_file_path)
+from api.models import Facility, FacilityDuplicateCluster
+
+TRAINING_RECORD_COUNT = 50000
+
+# The trained model and threshold loaded once by each worker process
+_worker_deduper = None
+_worker_threshold = None
+
+
+def get_dedupe_records(queryset):
+    """
+    Create a dictionary of `Facility` records suitable for use by a Dedupe
+    model, keyed by OAR ID, reading the facilities through a server-side
+    cursor.
+    """
+    return {
+        str(f['id']): {
+            'country': clean(f['country_code']),
+            'name': clean(f['name']),
+            'address': clean(f['address']),
+        }
+        for f
+        in queryset
+        .values('id', 'country_code', 'name', 'address')
+        .iterator()
+    }
+
+
+def train_deduper(record_count=TRAINING_RECORD_COUNT,
+                  recall_weight=MatchDefaults.RECALL_WEIGHT):
+    """
+    Train a `dedupe.Dedupe` model on a random sample of facilities and the
+    labeled pairs used to train the matching gazetteer.
+
+    Returns:
+    A tuple of the serialized model settings and the score threshold that
+    balances precision and recall according to `recall_weight`.
+    """
+    data = get_dedupe_records(
+        Facility.objects.order_by('?')[:record_count])
+    deduper = dedupe.Dedupe(MODEL_FIELDS, num_cores=1)
+    deduper.sample(data, 15000)
+    with open(get_training_file_path()) as tf:
+        deduper.readTraining(tf)
+    deduper.train()
+    threshold = deduper.threshold(data, recall_weight=recall_weight)
+    deduper.cleanupTraining()
+
+    settings_file = io.BytesIO()
+    deduper.writeSettings(settings_file)
+    return settings_file.getvalue(), threshold
+
+
+def get_country_codes_by_size(exclude=()):
+    """
+    Return the codes of the countries that have facilities, largest first so
+    that the longest running partitions are started first.
+    """
+    return list(
+        Facility
+        .objects
+        .exclude(country_code__in=exclude)
+        .values('country_code')
+        .annotate(facility_count=Count('id'))
+        .order_by('-facility_count')
+        .values_list('country_code', flat=True))
+
+
+def init_worker(model_settings, threshold):
+    global _worker_deduper, _worker_threshold
+    _worker_deduper = dedupe.StaticDedupe(io.BytesIO(model_settings),
+                                          num_cores=1)
+    _worker_threshold = threshold
+
+
+def find_country_clusters(country_code):
+    """
+    Find clusters of likely duplicates among the facilities in one country
+    using the model loaded by `init_worker`. Only one country's facilities
+    are held in memory at a time.
+
+    Returns:
+    A tuple of the country code and a list of clusters, each of which is a
+    tuple of a list of OAR IDs and a list of their scores.
+    """
+    data = get_dedupe_records(
+        Facility.objects.filter(country_code=country_code))
+    if len(data) < 2:
+        return country_code, []
+
+    try:
+        clusters = _worker_deduper.match(data, threshold=_worker_threshold)
+    except dedupe.core.BlockingError:
+        clusters = []
+
+    return country_code, [
+        (list(oar_ids), [float(score) for score in scores])
+        for oar_ids, scores in clusters
+    ]
+
+
+@transaction.atomic
+def save_country_clusters(run, country_code, clusters):
+    """
+    Save the clusters found in a country for review and record the country
+    as completed in the run, so that a resumed run skips it.
+    """
+    created_at = dict(
+        Facility
+        .objects
+        .filter(id__in=[i for oar_ids, _ in clusters for i in oar_ids])
+        .values_list('id', 'created_at'))
+
+    duplicate_clusters = []
+    for oar_ids, scores in clusters:
+        # Facilities may have been merged or deleted since they were read
+        members = [(i, s) for i, s in zip(oar_ids, scores) if i in created_at]
+        if len(members) < 2:
+            continue
+        duplicate_clusters.append(FacilityDuplicateCluster(
+            run=run,
+            country_code=country_code,
+            oar_ids=[i for i, _ in members],
+            scores=[s for _, s in members],
+            score=min(s for _, s in members),
+            target_oar_id=min((i for i, _ in members), key=created_at.get)))
+    FacilityDuplicateCluster.objects.bulk_create(duplicate_clusters)
+
+    run.completed_countries.append(country_code)
+    run.save(update_fields=['completed_countries', 'updated_at'])
+    return len(duplicate_clusters)
+
+
+def merge_approved_clusters(run_id, user=None, chunk_size=MERGE_CHUNK_SIZE):
+    """
+    Merge the facilities in each approved cluster of a run into its target
+    and mark the clusters in which every merge succeeded as merged.
+
+    Returns:
+    See `merge_facility_groups`.
+    """
+    clusters = list(FacilityDuplicateCluster.objects.filter(
+        run_id=run_id, status=FacilityDuplicateCluster.APPROVED))
+    groups = [c.merge_group() for c in clusters]
+
+    merged_count, errors = merge_facility_groups(groups, user=user,
+                                                 chunk_size=chunk_size)
+
+    failed = {(e['target'], e['merge']) for e in errors}
+    FacilityDuplicateCluster \
+        .objects \
+        .filter(id__in=[
+            c.id for c, group in zip(clusters, groups)
+            if not any((group['target'], merge_id) in failed
+                       for merge_id in group['merge'])
+        ]) \
+        .update(status=FacilityDuplicateCluster.MERGED,
+                updated_at=timezone.now())
+
+    return merged_count, errors
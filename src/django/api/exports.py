@@ -0,0 +1,188 @@
+import csv
+import json
+
+from rest_framework.utils.encoders import JSONEncoder
+
+from api.models import (Facility,
+                        FacilityClaim,
+                        FacilityLocation,
+                        FacilityMatch)
+from api.serializers import (FacilityDetailsSerializer,
+                             FacilityListItemSerializer,
+                             FacilitySerializer)
+
+EXPORT_BATCH_SIZE = 2000
+
+# These headers must be kept in sync with the client's `csvHeaders` in
+# `util.facilitiesCSV.js`
+CSV_HEADERS = ('oar_id', 'name', 'address', 'country_code', 'country_name',
+               'lat', 'lng', 'contributors')
+
+
+class Echo:
+    """
+    A file-like object that returns what is written to it, allowing
+    `csv.writer` to format rows for a streaming response one at a time.
+    """
+    def write(self, value):
+        return value
+
+
+def _serialize_batch(facilities, user):
+    sources_by_facility = Facility.sources_for_facilities(
+        [f.id for f in facilities], user=user)
+    return FacilitySerializer(
+        facilities, many=True,
+        context={'sources_by_facility': sources_by_facility}).data['features']
+
+
+def iter_batches(queryset, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Yield lists of up to `batch_size` objects read from a queryset through a
+    server-side cursor.
+    """
+    batch = []
+    for obj in queryset.iterator(chunk_size=batch_size):
+        batch.append(obj)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_facility_features(queryset, user=None, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Yield the GeoJSON features of the facilities in a queryset, reading the
+    facilities through a server-side cursor and loading the contributors of
+    each batch of facilities in a single query so that memory use does not
+    depend on the number of facilities.
+
+    Arguments:
+    queryset -- A Facility queryset
+    user -- The user whose permissions determine which contributors are
+            listed by name
+    batch_size -- The number of facilities to read from the cursor and
+                  serialize at a time
+    """
+    for batch in iter_batches(queryset, batch_size):
+        yield from _serialize_batch(batch, user)
+
+
+def load_facility_details_context(facility_ids):
+    """
+    Load the matches, locations, and approved claims used by
+    `FacilityDetailsSerializer` for a batch of facilities with one query
+    each, rather than with several queries per facility.
+    """
+    matches_by_facility = {}
+    for match in FacilityMatch \
+            .objects \
+            .filter(facility_id__in=facility_ids) \
+            .select_related('facility_list_item__source__contributor',
+                            'facility_list_item__source__facility_list') \
+            .order_by('id'):
+        matches_by_facility.setdefault(match.facility_id, []).append(match)
+
+    locations_by_facility = {}
+    for location in FacilityLocation \
+            .objects \
+            .filter(facility_id__in=facility_ids) \
+            .select_related('contributor') \
+            .order_by('id'):
+        locations_by_facility.setdefault(
+            location.facility_id, []).append(location)
+
+    approved_claims_by_facility = {
+        claim.facility_id: claim
+        for claim in FacilityClaim
+        .objects
+        .filter(facility_id__in=facility_ids,
+                status=FacilityClaim.APPROVED)
+        .select_related('parent_company')
+    }
+
+    return {
+        'matches_by_facility': matches_by_facility,
+        'locations_by_facility': locations_by_facility,
+        'approved_claims_by_facility': approved_claims_by_facility,
+    }
+
+
+def iter_facility_details_batches(queryset, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Yield lists of the public GeoJSON details features of the facilities in
+    a queryset, one list per batch of facilities read from a server-side
+    cursor.
+    """
+    for batch in iter_batches(queryset, batch_size):
+        context = load_facility_details_context([f.id for f in batch])
+        yield FacilityDetailsSerializer(
+            batch, many=True, context=context).data['features']
+
+
+def make_facility_csv_row(feature):
+    properties = feature['properties']
+    lng, lat = feature['geometry']['coordinates']
+    return [
+        properties['oar_id'],
+        properties['name'],
+        properties['address'],
+        properties['country_code'],
+        properties['country_name'],
+        lat,
+        lng,
+        '|'.join(c['name'] for c in properties['contributors']),
+    ]
+
+
+def iter_facilities_csv(features):
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_HEADERS)
+    for feature in features:
+        yield writer.writerow(make_facility_csv_row(feature))
+
+
+def iter_facilities_ndjson(features):
+    for feature in features:
+        yield json.dumps(feature, cls=JSONEncoder) + '\n'
+
+
+def load_facility_list_items_context(item_ids):
+    """
+    Load the matches and matched facilities used by
+    `FacilityListItemSerializer` for a batch of list items with one query,
+    rather than with a query per item and per match.
+    """
+    matches_by_item = {}
+    for match in FacilityMatch \
+            .objects \
+            .filter(facility_list_item_id__in=item_ids) \
+            .select_related('facility') \
+            .order_by('id'):
+        matches_by_item.setdefault(
+            match.facility_list_item_id, []).append(match)
+
+    return {'matches_by_item': matches_by_item}
+
+
+def serialize_facility_list_items(items):
+    context = load_facility_list_items_context([i.id for i in items])
+    return FacilityListItemSerializer(
+        items, many=True, context=context).data
+
+
+def iter_facility_list_items_ndjson(queryset, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Yield the serialized list items in a queryset as lines of newline
+    delimited JSON, reading the items through a server-side cursor and
+    loading the matches of each batch of items in a single query.
+
+    Arguments:
+    queryset -- A FacilityListItem queryset that selects the related facility
+    batch_size -- The number of items to read from the cursor and serialize
+                  at a time
+    """
+    for batch in iter_batches(queryset, batch_size):
+        for item in serialize_facility_list_items(batch):
+            yield json.dumps(item, cls=JSONEncoder) + '\n'
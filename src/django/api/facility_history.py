@@ -1,10 +1,16 @@
-from django.db.models import F
+from functools import reduce
+from operator import or_
+
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
 from api.constants import ProcessingAction, FacilityHistoryActions
-from api.models import (FacilityMatch,
+from api.models import (Facility,
                         FacilityClaim,
+                        FacilityEvent,
                         FacilityListItem,
-                        FacilityList)
+                        FacilityMatch)
 from api.helpers import prefix_a_an
 
 
@@ -116,13 +122,13 @@ def create_dissociate_inactive_item_detail(facility_list_item,
     )
 
 
-def create_geojson_diff_for_location_change(entry):
+def create_geojson_diff_for_location_change(entry, prev_record):
     return {
         'old': {
             'type': 'Point',
             'coordinates': [
-                entry.prev_record.location.x,
-                entry.prev_record.location.y,
+                prev_record.location.x,
+                prev_record.location.y,
             ],
         },
         'new': {
@@ -135,11 +141,11 @@ def create_geojson_diff_for_location_change(entry):
     }
 
 
-def get_change_diff_for_history_entry(entry):
-    if entry.prev_record is None:
+def get_change_diff_for_history_entry(entry, prev_record):
+    if prev_record is None:
         return {}
 
-    delta = entry.diff_against(entry.prev_record)
+    delta = entry.diff_against(prev_record)
     changes = {}
 
     for change in delta.changes:
@@ -152,103 +158,97 @@ def get_change_diff_for_history_entry(entry):
     return changes
 
 
-def create_facility_history_dictionary(entry):
-    updated_at = str(entry.history_date)
+def make_facility_event(entry, prev_record):
+    """
+    Make an unsaved `FacilityEvent` describing a historical `Facility`
+    record.
+
+    Arguments:
+    entry -- A historical `Facility` record
+    prev_record -- The previous historical record of the same facility or
+                   None if there is none
+    """
     change_reason = entry.history_change_reason or ''
     history_type_display = entry.get_history_type_display()
-    changes = get_change_diff_for_history_entry(entry)
+    changes = get_change_diff_for_history_entry(entry, prev_record)
 
-    if 'FacilityLocation' in change_reason:
-        changes['location'] = create_geojson_diff_for_location_change(entry)
+    if prev_record is not None and (
+            'location' in changes
+            or 'FacilityLocation' in change_reason
+            or 'Promoted' in change_reason):
+        changes['location'] = create_geojson_diff_for_location_change(
+            entry, prev_record)
 
-        return {
-            'updated_at': updated_at,
-            'action': FacilityHistoryActions.UPDATE,
-            'detail': change_reason,
-            'changes': changes,
-        }
+    if 'FacilityLocation' in change_reason:
+        action, detail = FacilityHistoryActions.UPDATE, change_reason
     elif 'Merged with' in change_reason:
-        return {
-            'updated_at': updated_at,
-            'action': FacilityHistoryActions.MERGE,
-            'detail': change_reason,
-            'changes': changes,
-        }
+        action, detail = FacilityHistoryActions.MERGE, change_reason
     elif 'Promoted' in change_reason:
-        changes['location'] = create_geojson_diff_for_location_change(entry)
-
-        return {
-            'updated_at': updated_at,
-            'action': FacilityHistoryActions.UPDATE,
-            'detail': change_reason,
-            'changes': changes,
-        }
+        action, detail = FacilityHistoryActions.UPDATE, change_reason
     elif 'Created' in history_type_display:
-        return {
-            'updated_at': updated_at,
-            'action': FacilityHistoryActions.CREATE,
-            'detail': history_type_display,
-            'changes': changes,
-        }
+        action, detail = FacilityHistoryActions.CREATE, history_type_display
     elif 'Deleted' in history_type_display:
-        return {
-            'updated_at': updated_at,
-            'action': FacilityHistoryActions.DELETE,
-            'detail': history_type_display,
-            'changes': changes,
-        }
+        action, detail = FacilityHistoryActions.DELETE, history_type_display
     else:
-        return {
-            'updated_at': updated_at,
-            'action': FacilityHistoryActions.OTHER,
-            'detail': history_type_display,
-            'changes': changes,
-        }
-
-
-def maybe_get_split_action_time_from_processing_results(item):
-    split_processing_times = [
-        r.get('finished_at', None)
-        for r
-        in item.processing_results
-        if r.get('action', None) == ProcessingAction.SPLIT_FACILITY
-    ]
-
-    return next(iter(split_processing_times), None)
-
-
-def processing_results_has_split_action_for_oar_id(list_item, facility_id):
-    return facility_id in [
-        r.get('previous_facility_oar_id', None)
-        for r
-        in list_item.processing_results
-        if r.get('action', None) == ProcessingAction.SPLIT_FACILITY
-    ]
-
-
-def create_facility_claim_entry(claim):
+        action, detail = FacilityHistoryActions.OTHER, history_type_display
+
+    return FacilityEvent(
+        facility_id=entry.id,
+        action=action,
+        detail=detail,
+        anonymous_detail=detail,
+        changes=changes,
+        occurred_at=entry.history_date)
+
+
+def make_facility_match_event(entry):
+    """
+    Make an unsaved `FacilityEvent` associating or dissociating a facility
+    and a contributor for a historical `FacilityMatch` record, or return
+    None if the match does not link the facility to the contributor.
+    """
+    if entry.status not in (FacilityMatch.CONFIRMED,
+                            FacilityMatch.AUTOMATIC):
+        return None
+
+    if entry.is_active:
+        action = FacilityHistoryActions.ASSOCIATE
+        create_detail = create_associate_match_entry_detail
+    else:
+        action = FacilityHistoryActions.DISSOCIATE
+        create_detail = create_dissociate_match_entry_detail
+
+    return FacilityEvent(
+        facility_id=entry.facility_id,
+        action=action,
+        detail=create_detail(entry, entry.facility_id, True),
+        anonymous_detail=create_detail(entry, entry.facility_id, False),
+        occurred_at=entry.history_date)
+
+
+def make_facility_claim_event(claim, prev_record):
+    """
+    Make an unsaved `FacilityEvent` for a historical `FacilityClaim` record
+    that approves, revokes, or changes the public data of a claim, or return
+    None if the record does none of these.
+    """
     if claim.status == FacilityClaim.REVOKED:
-        return {
-            'updated_at': str(claim.history_date),
-            'action': FacilityHistoryActions.CLAIM_REVOKE,
-            'detail': 'Claim on facility {} by {} was revoked'.format(
-                claim.facility.id,
-                claim.contributor.name,
-            ),
-        }
-
-    if claim.status == FacilityClaim.APPROVED \
-       and claim.prev_record.status == FacilityClaim.PENDING:
-        return {
-            'updated_at': str(claim.history_date),
-            'action': FacilityHistoryActions.CLAIM,
-            'detail': 'Facility {} was claimed by {}'.format(
-                claim.facility.id,
-                claim.contributor.name,
-            ),
-        }
-
-    if claim.status == FacilityClaim.APPROVED:
+        action = FacilityHistoryActions.CLAIM_REVOKE
+        detail = 'Claim on facility {} by {} was revoked'.format(
+            claim.facility_id,
+            claim.contributor.name,
+        )
+        changes = None
+    elif claim.status == FacilityClaim.APPROVED \
+            and prev_record is not None \
+            and prev_record.status == FacilityClaim.PENDING:
+        action = FacilityHistoryActions.CLAIM
+        detail = 'Facility {} was claimed by {}'.format(
+            claim.facility_id,
+            claim.contributor.name,
+        )
+        changes = None
+    elif claim.status == FacilityClaim.APPROVED:
         public_claim_data_keys = [
             'facility_description',
             'facility_name_english',
@@ -265,120 +265,255 @@ def create_facility_claim_entry(claim):
             'facility_parent_company',
         ]
 
-        public_changes = {
+        changes = {
             k: v
             for k, v
-            in get_change_diff_for_history_entry(claim).items()
+            in get_change_diff_for_history_entry(claim, prev_record).items()
             if k in public_claim_data_keys
         }
 
-        if any(public_changes):
-            return {
-                'updated_at': str(claim.history_date),
-                'action': FacilityHistoryActions.CLAIM_UPDATE,
-                'detail': 'Facility {} claim public data was updated'.format(
-                    claim.facility.id,
-                ),
-                'changes': public_changes,
-            }
+        if not any(changes):
+            return None
 
-    return None
+        action = FacilityHistoryActions.CLAIM_UPDATE
+        detail = 'Facility {} claim public data was updated'.format(
+            claim.facility_id,
+        )
+    else:
+        return None
+
+    return FacilityEvent(
+        facility_id=claim.facility_id,
+        action=action,
+        detail=detail,
+        anonymous_detail=detail,
+        changes=changes,
+        occurred_at=claim.history_date)
+
+
+def make_facility_split_event(previous_facility_id, facility_id,
+                              occurred_at):
+    detail = '{} was split from {}'.format(facility_id, previous_facility_id)
+    return FacilityEvent(
+        facility_id=previous_facility_id,
+        action=FacilityHistoryActions.SPLIT,
+        detail=detail,
+        anonymous_detail=detail,
+        occurred_at=occurred_at)
+
+
+def make_replaced_item_events(facility_list_items, occurred_at):
+    """
+    Make unsaved `FacilityEvent`s dissociating facilities from the items of a
+    list that has been replaced.
+
+    We don't have a historical model tracking when the `is_active` property
+    of a list source switches from True to False, so the `created_at` of the
+    replacing list is used as the date and time at which each item was
+    dissociated.
+    """
+    return [
+        FacilityEvent(
+            facility_id=item.facility_id,
+            action=FacilityHistoryActions.DISSOCIATE,
+            detail=create_dissociate_inactive_item_detail(item, True),
+            anonymous_detail=create_dissociate_inactive_item_detail(
+                item, False),
+            occurred_at=occurred_at)
+        for item in facility_list_items
+        if item.facility_id is not None
+    ]
+
+
+def bulk_create_history(model, instances, change_reason=None, user=None,
+                        history_type='~'):
+    """
+    Write change history records for model instances that were updated with
+    a queryset `update` or created with `bulk_create`, which do not write
+    them, and write the `FacilityEvent`s that describe changes to matches and
+    the creation of facilities.
+
+    Arguments:
+    model -- A model class with a `history` manager
+    instances -- Instances of the model with their new field values
+    change_reason -- The change reason saved with each record that does not
+                     have its own `changeReason`
+    user -- The user who made the change
+    history_type -- '~' for updated instances or '+' for created instances
+    """
+    HistoricalModel = model.history.model
+    history_date = timezone.now()
+    if user is not None and not user.is_authenticated:
+        user = None
+
+    records = []
+    for instance in instances:
+        record = HistoricalModel(
+            history_date=history_date,
+            history_type=history_type,
+            history_change_reason=getattr(instance, 'changeReason',
+                                          change_reason),
+            history_user=user,
+            **{field.attname: getattr(instance, field.attname)
+               for field in model._meta.fields})
+        # Reuse related objects loaded with the instance when describing the
+        # change, unless the foreign key has been changed since they were
+        for field in model._meta.fields:
+            if field.is_relation and field.is_cached(instance):
+                related = field.get_cached_value(instance)
+                if related is not None \
+                        and related.pk == getattr(instance, field.attname):
+                    field.set_cached_value(record, related)
+        records.append(record)
+    HistoricalModel.objects.bulk_create(records)
+
+    if model is FacilityMatch:
+        events = [make_facility_match_event(r) for r in records]
+        FacilityEvent.objects.bulk_create(
+            [e for e in events if e is not None])
+    elif model is Facility and history_type == '+':
+        FacilityEvent.objects.bulk_create(
+            [make_facility_event(r, None) for r in records])
+
+    return records
+
+
+def get_split_time(processing_result):
+    finished_at = parse_datetime(processing_result.get('finished_at') or '')
+    if finished_at is not None and timezone.is_naive(finished_at):
+        # Processing results are timestamped with `datetime.utcnow()`
+        finished_at = timezone.make_aware(finished_at, timezone.utc)
+    return finished_at
+
+
+def make_split_events_for_list_item(facility_list_item):
+    return [
+        make_facility_split_event(r['previous_facility_oar_id'],
+                                  facility_list_item.facility_id,
+                                  get_split_time(r))
+        for r in facility_list_item.processing_results
+        if r.get('action', None) == ProcessingAction.SPLIT_FACILITY
+        and facility_list_item.facility_id is not None
+        and get_split_time(r) is not None
+    ]
 
 
-def create_facility_history_list(entries, facility_id, user=None):
+def iter_history_with_prev_records(queryset):
+    """
+    Yield each record of a historical queryset along with the previous
+    record of the same object, or None if it is the first.
+    """
+    prev_record = None
+    for entry in queryset.order_by('id', 'history_date').iterator():
+        if prev_record is not None and prev_record.id != entry.id:
+            prev_record = None
+        yield entry, prev_record
+        prev_record = entry
+
+
+def iter_facility_events_from_history(facility_ids=None):
+    """
+    Yield unsaved `FacilityEvent`s replayed from the historical records of
+    facilities, matches, and claims, the split actions recorded in list item
+    processing results, and the items of replaced lists.
+
+    The related rows used to describe each event are loaded with the records
+    so that the number of queries does not depend on the number of records.
+
+    Arguments:
+    facility_ids -- An optional list of the IDs of the facilities for which
+                    events are replayed. All facilities are replayed if it is
+                    None.
+    """
+    facility_history = Facility.history.all()
+    match_history = FacilityMatch \
+        .history \
+        .filter(status__in=[FacilityMatch.CONFIRMED,
+                            FacilityMatch.AUTOMATIC]) \
+        .select_related('facility_list_item__source__contributor',
+                        'facility_list_item__source__facility_list')
+    claim_history = FacilityClaim.history.select_related('contributor')
+    split_action = {'action': ProcessingAction.SPLIT_FACILITY}
+    split_items = FacilityListItem.objects.filter(
+        processing_results__contains=[split_action])
+    replaced_items = FacilityListItem \
+        .objects \
+        .filter(source__is_active=False,
+                source__facility_list__facilitylist__isnull=False,
+                facility__isnull=False) \
+        .annotate(replaced_at=F(
+            'source__facility_list__facilitylist__created_at')) \
+        .select_related('source__contributor', 'source__facility_list')
+
+    if facility_ids is not None:
+        facility_history = facility_history.filter(id__in=facility_ids)
+        match_history = match_history.filter(facility_id__in=facility_ids)
+        claim_history = claim_history.filter(facility_id__in=facility_ids)
+        split_items = FacilityListItem.objects.filter(reduce(or_, [
+            Q(processing_results__contains=[
+                dict(split_action, previous_facility_oar_id=facility_id)])
+            for facility_id in facility_ids
+        ], Q(pk__in=[])))
+        replaced_items = replaced_items.filter(facility_id__in=facility_ids)
+
+    for entry, prev_record in iter_history_with_prev_records(
+            facility_history):
+        yield make_facility_event(entry, prev_record)
+
+    for entry in match_history.iterator():
+        yield make_facility_match_event(entry)
+
+    for claim, prev_record in iter_history_with_prev_records(claim_history):
+        event = make_facility_claim_event(claim, prev_record)
+        if event is not None:
+            yield event
+
+    for item in split_items.iterator():
+        for event in make_split_events_for_list_item(item):
+            if facility_ids is None or event.facility_id in facility_ids:
+                yield event
+
+    for item in replaced_items.iterator():
+        yield from make_replaced_item_events([item], item.replaced_at)
+
+
+def create_facility_history_dictionary(event, user_can_see_detail):
+    entry = {
+        'updated_at': str(event.occurred_at),
+        'action': event.action,
+        'detail': event.detail if user_can_see_detail
+        else event.anonymous_detail,
+    }
+    if event.changes is not None:
+        entry['changes'] = event.changes
+    return entry
+
+
+def create_facility_history_list(facility_id, user=None):
+    """
+    Return the history of a facility, newest first, as read from the
+    `FacilityEvent` log. Every facility created since the log was introduced,
+    or backfilled into it, has a `CREATE` event, so facilities without one
+    have history that predates the log and has not been backfilled, and
+    their events are replayed from the historical records instead.
+    """
     if user is not None and not user.is_anonymous:
         user_can_see_detail = user.can_view_full_contrib_details
     else:
         user_can_see_detail = True
 
-    facility_split_entries = [
-        {
-            'updated_at': maybe_get_split_action_time_from_processing_results(
-                m.facility_list_item
-            ),
-            'action': FacilityHistoryActions.SPLIT,
-            'detail': '{} was split from {}'.format(
-                m.facility.id,
-                facility_id,
-            )
-        }
-        for m
-        in FacilityMatch
-        .objects
-        .annotate(
-            processing_results=F('facility_list_item__processing_results'))
-        .extra(
-            where=['processing_results @> \'[{"action": "split_facility"}]\''])
-        if processing_results_has_split_action_for_oar_id(
-            m.facility_list_item,
-            facility_id,
-        )
-    ]
-
-    facility_match_entries = [
-        {
-            'updated_at': str(m.history_date),
-            'action': FacilityHistoryActions.ASSOCIATE
-            if m.is_active else FacilityHistoryActions.DISSOCIATE,
-            'detail': create_associate_match_entry_detail(
-                m, facility_id, user_can_see_detail)
-            if m.is_active else create_dissociate_match_entry_detail(
-                    m,
-                    facility_id,
-                    user_can_see_detail,
-            ),
-        }
-        for m
-        in FacilityMatch
-        .history
-        .filter(status__in=[
-            FacilityMatch.CONFIRMED,
-            FacilityMatch.AUTOMATIC,
-        ])
-        .filter(facility_id=facility_id)
-    ]
-
-    # We don't have a historical model tracking when the `is_active` property
-    # of a list source switches from True to False, but we want to have a
-    # DISSOCIATE entry in the history when this happens.
-    # We use the `created_at` of the replacing list as the date and time at
-    # which the now inactive item was dissociated.
-    replaced_entries = []
-    inactive_items = FacilityListItem.objects.filter(
-        facility_id=facility_id, source__is_active=False)
-    for item in inactive_items:
-        if item.source.facility_list is not None:
-            replacing_list_filter = \
-                FacilityList.objects.filter(replaces=item.source.facility_list)
-            if replacing_list_filter.exists():
-                replaced_entries.append({
-                    'updated_at':
-                    str(replacing_list_filter.first().created_at),
-                    'action': FacilityHistoryActions.DISSOCIATE,
-                    'detail': create_dissociate_inactive_item_detail(
-                        item, user_can_see_detail)
-                })
-
-    facility_claim_entries = [
-        create_facility_claim_entry(c)
-        for c
-        in FacilityClaim
-        .history
-        .filter(status__in=[
-            FacilityClaim.APPROVED,
-            FacilityClaim.REVOKED,
-        ])
-        if c.facility.id == facility_id
-        if create_facility_claim_entry(c) is not None
+    events = list(FacilityEvent
+                  .objects
+                  .filter(facility_id=facility_id)
+                  .order_by('-occurred_at', '-id'))
+    if not any(event.action == FacilityHistoryActions.CREATE
+               for event in events):
+        events = sorted(
+            iter_facility_events_from_history(facility_ids=[facility_id]),
+            key=lambda event: event.occurred_at,
+            reverse=True)
+
+    return [
+        create_facility_history_dictionary(event, user_can_see_detail)
+        for event in events
     ]
-
-    history_entries = [
-        create_facility_history_dictionary(entry)
-        for entry
-        in entries
-    ]
-
-    return sorted(history_entries + facility_split_entries +
-                  facility_match_entries + facility_claim_entries +
-                  replaced_entries,
-                  key=lambda entry: entry['updated_at'], reverse=True)
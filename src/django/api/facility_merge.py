@@ -0,0 +1,153 @@
+import json
+
+from datetime import datetime
+
+from django.db import connection, transaction
+from django.db.models import ProtectedError
+from django.utils import timezone
+
+from api.cache_invalidation import (defer_facility_cache_invalidation,
+                                    invalidate_facility_caches)
+from api.constants import ProcessingAction
+from api.facility_history import bulk_create_history
+from api.models import (Facility,
+                        FacilityAlias,
+                        FacilityContributor,
+                        FacilityMatch)
+
+MERGE_CHUNK_SIZE = 50
+
+
+def merge_facilities(target, merge, user=None):
+    """
+    Merge one facility into another. The matches, list items, and aliases of
+    the merged facility are moved to the target with one statement each
+    rather than by saving each row, the change history of the moved rows is
+    written in bulk, and the merged facility is deleted.
+
+    Arguments:
+    target -- The `Facility` that will remain
+    merge -- The `Facility` that will be merged into the target and deleted
+    user -- The user performing the merge
+    """
+    updated_at = timezone.now()
+    now = str(datetime.utcnow())
+
+    matches = list(FacilityMatch.objects.filter(facility=merge))
+    FacilityMatch \
+        .objects \
+        .filter(id__in=[m.id for m in matches]) \
+        .update(facility=target,
+                status=FacilityMatch.MERGED,
+                updated_at=updated_at)
+    for match in matches:
+        match.facility_id = target.id
+        match.status = FacilityMatch.MERGED
+        match.updated_at = updated_at
+    bulk_create_history(FacilityMatch, matches,
+                        'Merged {} into {}'.format(merge.id, target.id),
+                        user=user)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'UPDATE api_facilitylistitem '
+            'SET facility_id = %s, '
+            '    processing_results = '
+            '        COALESCE(processing_results, \'[]\'::jsonb) '
+            '        || %s::jsonb, '
+            '    updated_at = %s '
+            'WHERE id = ANY(%s)',
+            [target.id,
+             json.dumps([{
+                 'action': ProcessingAction.MERGE_FACILITY,
+                 'started_at': now,
+                 'error': False,
+                 'finished_at': now,
+                 'merged_oar_id': merge.id,
+             }]),
+             updated_at,
+             [m.facility_list_item_id for m in matches]])
+
+    aliases = list(FacilityAlias.objects.filter(facility=merge))
+    FacilityAlias \
+        .objects \
+        .filter(id__in=[a.id for a in aliases]) \
+        .update(facility=target,
+                reason=FacilityAlias.MERGE,
+                updated_at=updated_at)
+    for alias in aliases:
+        alias.facility_id = target.id
+        alias.reason = FacilityAlias.MERGE
+        alias.updated_at = updated_at
+    bulk_create_history(FacilityAlias, aliases,
+                        'Merging {} into {}'.format(merge.id, target.id),
+                        user=user)
+
+    FacilityAlias.objects.create(
+        oar_id=merge.id,
+        facility=target,
+        reason=FacilityAlias.MERGE)
+
+    # Queryset updates do not send the `post_save` signals that keep cached
+    # and denormalized data up to date
+    invalidate_facility_caches()
+    FacilityContributor.objects.refresh([target.id])
+
+    # any change to this message will also need to
+    # be made in the `facility_history.py` module's
+    # `make_facility_event` function
+    merge.changeReason = 'Merged with {}'.format(target.id)
+    merge.delete()
+
+
+def merge_facility_groups(groups, user=None, chunk_size=MERGE_CHUNK_SIZE):
+    """
+    Merge groups of facilities into target facilities, committing one
+    transaction per chunk of groups and invalidating the facility caches once
+    at the end rather than once per merge.
+
+    A merge that fails, for example because one of the facilities was
+    already merged, is rolled back and reported without stopping the other
+    merges.
+
+    Arguments:
+    groups -- A list of dictionaries with a `target` facility ID and a list
+              of facility IDs to `merge` into it
+    user -- The user performing the merges
+    chunk_size -- The number of groups to merge in each transaction
+
+    Returns:
+    A tuple of the number of facilities merged and a list of dictionaries
+    describing the merges that failed.
+    """
+    merged_count = 0
+    errors = []
+    with defer_facility_cache_invalidation():
+        for start in range(0, len(groups), chunk_size):
+            with transaction.atomic():
+                for group in groups[start:start + chunk_size]:
+                    target_id = group['target']
+                    for merge_id in group['merge']:
+                        try:
+                            with transaction.atomic():
+                                merge_facilities(
+                                    Facility.objects.get(id=target_id),
+                                    Facility.objects.get(id=merge_id),
+                                    user=user)
+                            merged_count += 1
+                        except Facility.DoesNotExist:
+                            errors.append({
+                                'target': target_id,
+                                'merge': merge_id,
+                                'error': 'Facility {} or {} does not '
+                                         'exist.'.format(target_id, merge_id),
+                            })
+                        except ProtectedError:
+                            errors.append({
+                                'target': target_id,
+                                'merge': merge_id,
+                                'error': 'Facility {} is referenced by '
+                                         'records that prevent it from '
+                                         'being deleted.'.format(merge_id),
+                            })
+    return merged_count, errors
@@ -0,0 +1,276 @@
+import hashlib
+import json
+import threading
+import time
+
+from array import array
+from collections import OrderedDict
+
+from django.contrib.gis.db.models import Extent
+from django.core.cache import cache
+from django.db.models import Count
+from waffle import switch_is_active
+
+from api.cache_invalidation import FacilityCacheGeneration
+from api.constants import FacilitiesQueryParams
+from api.models import Facility, FacilityCount
+
+FILTER_CACHE_TIMEOUT = 60 * 60
+FILTER_CACHE_MAX_IDS = 500000
+# Cached in place of the keys of a filter that matches more than
+# `FILTER_CACHE_MAX_IDS` facilities, so that they are not read again
+FILTER_CACHE_TOO_LARGE = 'too-large'
+COUNT_CACHE_TIMEOUT = 60 * 10
+COUNT_CACHE_MAX_ENTRIES = 1000
+
+SINGLE_VALUE_PARAMS = (
+    FacilitiesQueryParams.Q,
+    FacilitiesQueryParams.NAME,
+    FacilitiesQueryParams.COMBINE_CONTRIBUTORS,
+    FacilitiesQueryParams.BOUNDARY,
+)
+
+LIST_PARAMS = (
+    FacilitiesQueryParams.CONTRIBUTORS,
+    FacilitiesQueryParams.CONTRIBUTOR_TYPES,
+    FacilitiesQueryParams.COUNTRIES,
+)
+
+# Filtering by country or boundary alone uses indexes on `api_facility`
+# directly and is not worth caching. Text search and contributor filters
+# require scans or joins through matches, list items, and sources.
+EXPENSIVE_PARAMS = (
+    FacilitiesQueryParams.Q,
+    FacilitiesQueryParams.NAME,
+    FacilitiesQueryParams.CONTRIBUTORS,
+    FacilitiesQueryParams.CONTRIBUTOR_TYPES,
+)
+
+
+def normalize_filter_params(params):
+    """
+    Reduce facility query params to a dictionary that is equal for any two
+    requests that select the same facilities, regardless of param order,
+    duplicate values, or unrelated params like `page`.
+
+    Arguments:
+    params (QueryDict) -- Request query parameters whose potential choices are
+                          enumerated in `api.constants.FacilitiesQueryParams`
+
+    Returns:
+    A dictionary containing only the filter params that have values.
+    """
+    normalized = {}
+    for param in SINGLE_VALUE_PARAMS:
+        value = params.get(param, None)
+        if value is not None:
+            normalized[param] = value
+    for param in LIST_PARAMS:
+        values = sorted(set(v for v in params.getlist(param) if v))
+        if values:
+            normalized[param] = values
+    if FacilitiesQueryParams.Q in normalized \
+       or FacilitiesQueryParams.NAME in normalized:
+        # Text searches return different results when other names are
+        # searched.
+        normalized['search_other_names'] = \
+            switch_is_active('search_other_names')
+    if FacilitiesQueryParams.CONTRIBUTORS in normalized:
+        normalized[FacilitiesQueryParams.COMBINE_CONTRIBUTORS] = \
+            normalized.get(FacilitiesQueryParams.COMBINE_CONTRIBUTORS,
+                           '').upper()
+    else:
+        normalized.pop(FacilitiesQueryParams.COMBINE_CONTRIBUTORS, None)
+    return normalized
+
+
+def is_cacheable(normalized_params):
+    return any(p in normalized_params for p in EXPENSIVE_PARAMS)
+
+
+def get_filter_cache_key(normalized_params, prefix='facility-filter'):
+    """
+    Build a cache key for a normalized filter that changes whenever the tile
+    cache key changes, or this process changes facility data, so that entries
+    never need to be deleted explicitly.
+    """
+    try:
+        tile_cache_key = Facility.current_tile_cache_key()
+    except Facility.DoesNotExist:
+        return None
+
+    filter_hash = hashlib.md5(
+        json.dumps(normalized_params, sort_keys=True).encode()).hexdigest()
+    return '{}:{}:{}:{}'.format(
+        prefix, tile_cache_key, FacilityCacheGeneration.get(), filter_hash)
+
+
+def get_filtered_facility_keys(params):
+    """
+    Return the `created_from_id` values of the facilities matching a set of
+    query params as a sorted `array` of integers, reading from and writing
+    to the cache. Every facility is created from exactly one list item, so
+    these integers identify facilities far more compactly than OAR IDs.
+
+    Returns None if the filter is not worth caching, or if it matches more
+    than `FILTER_CACHE_MAX_IDS` facilities, in which case passing the keys
+    to every query would cost more than evaluating the filter.
+    """
+    normalized_params = normalize_filter_params(params)
+    if not is_cacheable(normalized_params):
+        return None
+
+    cache_key = get_filter_cache_key(normalized_params)
+    if cache_key is None:
+        return None
+
+    keys = cache.get(cache_key)
+    if keys is None:
+        # Read one more key than the limit to learn whether it is exceeded
+        # without reading every matching facility
+        keys = array('l', sorted(
+            Facility
+            .objects
+            .filter_by_query_params(params)
+            .values_list('created_from_id', flat=True)
+            [:FILTER_CACHE_MAX_IDS + 1]))
+        if len(keys) > FILTER_CACHE_MAX_IDS:
+            keys = FILTER_CACHE_TOO_LARGE
+        cache.set(cache_key, keys, FILTER_CACHE_TIMEOUT)
+    if keys == FILTER_CACHE_TOO_LARGE:
+        return None
+    return keys
+
+
+def get_filtered_facilities(params):
+    """
+    Create a Facility queryset filtered by a list of request query params,
+    using the cached set of matching facilities when the filter is
+    expensive to evaluate.
+
+    Arguments:
+    params (QueryDict) -- Request query parameters whose potential choices are
+                          enumerated in `api.constants.FacilitiesQueryParams`
+
+    Returns:
+    A queryset on the Facility model
+    """
+    keys = get_filtered_facility_keys(params)
+    if keys is None:
+        return Facility.objects.filter_by_query_params(params)
+    if len(keys) == 0:
+        return Facility.objects.none()
+    # Joining against an unnested array lets PostgreSQL hash the keys rather
+    # than scan the whole array for each row, as it would for `= ANY(...)`.
+    return Facility.objects.extra(
+        where=['"api_facility"."created_from_id" IN '
+               '(SELECT unnest(%s::integer[]))'],
+        params=[list(keys)])
+
+
+class FacilityCountCache:
+    """
+    An in-process cache of facility counts for filters that are not
+    answered by `FacilityCount`. Entries expire after a fixed time, and the
+    oldest entries are evicted when the cache is full. Keys include the tile
+    cache key, so entries are never stale, only unused.
+    """
+    _lock = threading.Lock()
+    _entries = OrderedDict()
+
+    @classmethod
+    def get(cls, key):
+        with cls._lock:
+            entry = cls._entries.get(key)
+            if entry is None:
+                return None
+            count, expires = entry
+            if expires < time.monotonic():
+                del cls._entries[key]
+                return None
+            return count
+
+    @classmethod
+    def set(cls, key, count):
+        with cls._lock:
+            cls._entries.pop(key, None)
+            cls._entries[key] = (count,
+                                 time.monotonic() + COUNT_CACHE_TIMEOUT)
+            while len(cls._entries) > COUNT_CACHE_MAX_ENTRIES:
+                cls._entries.popitem(last=False)
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._entries.clear()
+
+
+def get_facility_count_names(normalized_params):
+    """
+    Return the names of the `FacilityCount` rows whose sum is the number of
+    facilities matching a normalized filter, or None if the filter cannot be
+    answered from maintained counts.
+    """
+    params = dict(normalized_params)
+    params.pop(FacilitiesQueryParams.COMBINE_CONTRIBUTORS, None)
+    if len(params) == 0:
+        return [FacilityCount.TOTAL]
+    if list(params) == [FacilitiesQueryParams.COUNTRIES]:
+        # A facility is in exactly one country, so country counts can be
+        # added together
+        return [FacilityCount.country_name(c)
+                for c in params[FacilitiesQueryParams.COUNTRIES]]
+    if list(params) == [FacilitiesQueryParams.CONTRIBUTORS] \
+       and len(params[FacilitiesQueryParams.CONTRIBUTORS]) == 1:
+        return [FacilityCount.contributor_name(
+            params[FacilitiesQueryParams.CONTRIBUTORS][0])]
+    return None
+
+
+def count_filtered_facilities(params):
+    """
+    Count the facilities matching a set of query params, using maintained
+    counts for unfiltered, country, and single contributor requests and an
+    in-process cache for other filters.
+    """
+    normalized_params = normalize_filter_params(params)
+    count_names = get_facility_count_names(normalized_params)
+    if count_names is not None:
+        return FacilityCount.objects.get_total(count_names)
+
+    cache_key = get_filter_cache_key(normalized_params,
+                                     prefix='facility-count')
+    count = FacilityCountCache.get(cache_key) \
+        if cache_key is not None else None
+    if count is None:
+        keys = get_filtered_facility_keys(params)
+        if keys is None:
+            count = Facility.objects.filter_by_query_params(params).count()
+        else:
+            count = len(keys)
+        if cache_key is not None:
+            FacilityCountCache.set(cache_key, count)
+    return count
+
+
+def get_filtered_facilities_count_and_extent(params):
+    """
+    Return the number of facilities matching a set of query params and the
+    extent of their locations, computed together in a single aggregate query
+    and cached for each normalized filter, so that paging through results
+    does not scan the filtered facilities again for every page.
+
+    Returns:
+    A tuple of the count and the extent as (xmin, ymin, xmax, ymax), or None
+    if no facilities match
+    """
+    cache_key = get_filter_cache_key(normalize_filter_params(params),
+                                     prefix='facility-count-extent')
+    result = cache.get(cache_key) if cache_key is not None else None
+    if result is None:
+        aggregates = get_filtered_facilities(params).aggregate(
+            count=Count('id'), extent=Extent('location'))
+        result = (aggregates['count'] or 0, aggregates['extent'])
+        if cache_key is not None:
+            cache.set(cache_key, result, FILTER_CACHE_TIMEOUT)
+    return result
@@ -0,0 +1,159 @@
+import hashlib
+
+from datetime import datetime
+
+from django.db.models import F
+from django.utils import timezone
+
+from api.cache_invalidation import (invalidate_contributor_lookups,
+                                    invalidate_facility_caches)
+from api.constants import ProcessingAction
+from api.facility_history import bulk_create_history
+from api.models import (FacilityContributor,
+                        FacilityListItem,
+                        FacilityListItemStatusCount,
+                        FacilityMatch,
+                        Source)
+from api.processing import parse_csv_line
+
+
+def hash_row(raw_data):
+    return hashlib.sha256(raw_data.encode('utf-8')).hexdigest()
+
+
+def get_header_fields(header):
+    return [f.lower() for f in parse_csv_line(header)]
+
+
+def get_items_to_process(source):
+    """
+    Return the items of a source that must be run through the parse,
+    geocode, and match steps, which excludes the items that inherited the
+    results of an unchanged row in a replaced list. Ordered by row index so
+    that the position of an item can be used as an AWS Batch array index.
+    """
+    return FacilityListItem \
+        .objects \
+        .filter(source=source) \
+        .exclude(processing_results__contains=[
+            {'action': ProcessingAction.INHERIT}]) \
+        .order_by('row_index')
+
+
+def get_inheritable_items(replaced_sources):
+    """
+    Return a dictionary mapping the hashes of the raw rows of the replaced
+    sources to tuples of an item and its match, for the items that were
+    matched to a facility by a match that the contributor has not removed.
+    Items that were not matched, or are still awaiting a decision, are left
+    to be processed again.
+    """
+    items = {}
+    for match in FacilityMatch \
+            .objects \
+            .filter(facility_list_item__source__in=replaced_sources,
+                    facility_list_item__status__in=(
+                        FacilityListItem.COMPLETE_STATUSES),
+                    facility_list_item__facility_id=F('facility_id'),
+                    status__in=(FacilityMatch.AUTOMATIC,
+                                FacilityMatch.CONFIRMED),
+                    is_active=True) \
+            .select_related('facility_list_item') \
+            .order_by('facility_list_item__row_index') \
+            .iterator():
+        item = match.facility_list_item
+        items.setdefault(hash_row(item.raw_data), (item, match))
+    return items
+
+
+def inherit_item(source, row_index, raw_data, replaced_item, timestamp):
+    now = timezone.now()
+    return FacilityListItem(
+        source=source,
+        row_index=row_index,
+        raw_data=raw_data,
+        status=replaced_item.status,
+        name=replaced_item.name,
+        address=replaced_item.address,
+        country_code=replaced_item.country_code,
+        geocoded_point=replaced_item.geocoded_point,
+        geocoded_address=replaced_item.geocoded_address,
+        facility_id=replaced_item.facility_id,
+        processing_started_at=now,
+        processing_completed_at=now,
+        processing_results=replaced_item.processing_results + [{
+            'action': ProcessingAction.INHERIT,
+            'started_at': timestamp,
+            'error': False,
+            'inherited_from_list_item_id': replaced_item.id,
+            'finished_at': timestamp,
+        }])
+
+
+def create_list_items(source, rows, replaced_list=None, user=None):
+    """
+    Create the items of an uploaded list. When the list replaces another
+    list with the same header, each row that is identical to a matched row
+    of the replaced list inherits that row's parsed fields, geocode, and
+    match instead of being processed again.
+
+    Arguments:
+    source -- The `Source` of the uploaded list
+    rows -- The raw rows of the uploaded list
+    replaced_list -- The `FacilityList` replaced by the uploaded list, if any
+    user -- The user uploading the list
+
+    Returns:
+    The number of items that must be processed.
+    """
+    inheritable_items = {}
+    if replaced_list is not None and \
+            get_header_fields(replaced_list.header) == \
+            get_header_fields(source.facility_list.header):
+        inheritable_items = get_inheritable_items(
+            Source.objects.filter(facility_list=replaced_list))
+
+    timestamp = str(datetime.utcnow())
+    items = []
+    inherited_matches = {}
+    for row_index, row in enumerate(rows):
+        replaced = inheritable_items.get(hash_row(row))
+        if replaced is None:
+            items.append(FacilityListItem(row_index=row_index,
+                                          raw_data=row,
+                                          source=source))
+        else:
+            replaced_item, replaced_match = replaced
+            item = inherit_item(source, row_index, row, replaced_item,
+                                timestamp)
+            items.append(item)
+            inherited_matches[row_index] = replaced_match
+    FacilityListItem.objects.bulk_create(items)
+
+    matches = [
+        FacilityMatch(facility_list_item=item,
+                      facility_id=item.facility_id,
+                      confidence=inherited_matches[item.row_index].confidence,
+                      status=inherited_matches[item.row_index].status,
+                      results=inherited_matches[item.row_index].results)
+        for item in items
+        if item.row_index in inherited_matches
+    ]
+    FacilityMatch.objects.bulk_create(matches)
+    bulk_create_history(FacilityMatch, matches, user=user, history_type='+')
+
+    # Bulk creation does not send the `post_save` signals that maintain the
+    # status counts and the cached and denormalized facility data
+    status_deltas = {}
+    for item in items:
+        key = (source.id, item.status)
+        status_deltas[key] = status_deltas.get(key, 0) + 1
+    FacilityListItemStatusCount.objects.add(status_deltas)
+
+    if len(matches) > 0:
+        facility_ids = {m.facility_id for m in matches}
+        invalidate_facility_caches()
+        FacilityContributor.objects.refresh(facility_ids)
+        invalidate_contributor_lookups()
+
+    return len(items) - len(matches)
@@ -0,0 +1,46 @@
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.facility_history import iter_facility_events_from_history
+from api.models import FacilityEvent
+
+
+class Command(BaseCommand):
+    help = ('Replace the facility event log read by the facility history '
+            'endpoint with events replayed from the existing history of '
+            'facilities, matches, claims, and list items, either for all '
+            'facilities or for the facilities given.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-b', '--batch-size',
+            type=int,
+            default=1000,
+            help='The number of events to insert at once')
+        parser.add_argument(
+            '-f', '--facility-id',
+            action='append',
+            dest='facility_ids',
+            help=('The OAR ID of a facility for which to replay events. May '
+                  'be repeated. All facilities are replayed if omitted.'))
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        facility_ids = options['facility_ids']
+        existing_events = FacilityEvent.objects.all()
+        if facility_ids is not None:
+            existing_events = existing_events.filter(
+                facility_id__in=facility_ids)
+        existing_events.delete()
+
+        event_count = 0
+        events = iter_facility_events_from_history(facility_ids)
+        while True:
+            batch = list(islice(events, options['batch_size']))
+            if not batch:
+                break
+            FacilityEvent.objects.bulk_create(batch)
+            event_count += len(batch)
+            self.stdout.write('Wrote {} events'.format(event_count))
@@ -0,0 +1,70 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.duplicates import merge_approved_clusters
+from api.facility_merge import MERGE_CHUNK_SIZE, merge_facility_groups
+from api.models import User
+from api.serializers import FacilityBatchMergeSerializer
+
+
+class Command(BaseCommand):
+    help = ('Merge groups of facilities read from a JSON file containing a '
+            'list of objects with a "target" facility ID and a list of '
+            'facility IDs to "merge" into it, or the approved duplicate '
+            'clusters found by a run of find_duplicate_facilities.')
+
+    def add_arguments(self, parser):
+        source = parser.add_mutually_exclusive_group(required=True)
+        source.add_argument(
+            '-f', '--file',
+            help='The JSON file of groups to merge, or - to read from stdin')
+        source.add_argument(
+            '-r', '--run',
+            type=int,
+            help='The ID of a duplicate run whose approved clusters to merge')
+        parser.add_argument(
+            '-c', '--chunk-size',
+            type=int,
+            default=MERGE_CHUNK_SIZE,
+            help='The number of groups to merge in each transaction')
+        parser.add_argument(
+            '-e', '--email',
+            help='The email address of the user recorded in the history')
+
+    def handle(self, *args, **options):
+        user = None
+        if options['email'] is not None:
+            try:
+                user = User.objects.get(email=options['email'])
+            except User.DoesNotExist:
+                raise CommandError(
+                    'User {} does not exist'.format(options['email']))
+
+        if options['run'] is not None:
+            merged_count, errors = merge_approved_clusters(
+                options['run'], user=user, chunk_size=options['chunk_size'])
+        else:
+            merged_count, errors = merge_facility_groups(
+                self.read_groups(options['file']),
+                user=user,
+                chunk_size=options['chunk_size'])
+
+        for error in errors:
+            self.stderr.write(
+                'Could not merge {merge} into {target}: {error}'.format(
+                    **error))
+        self.stdout.write('Merged {} facilities'.format(merged_count))
+
+    def read_groups(self, file_name):
+        if file_name == '-':
+            groups = json.load(sys.stdin)
+        else:
+            with open(file_name) as f:
+                groups = json.load(f)
+
+        params = FacilityBatchMergeSerializer(data={'groups': groups})
+        if not params.is_valid():
+            raise CommandError(params.errors)
+        return params.validated_data['groups']
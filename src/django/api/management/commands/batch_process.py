@@ -5,6 +5,7 @@ from django.core.management.base import BaseCommand
 from django.db import transaction
 
 from api.constants import ProcessingAction
+from api.list_replacement import get_items_to_process
 from api.models import FacilityList, FacilityListItem
 from api.matching import match_facility_list_items
 from api.processing import (parse_facility_list_item,
@@ -24,8 +25,10 @@ VALID_ACTIONS = list(LINE_ITEM_ACTIONS.keys()) + list(LIST_ACTIONS)
 class Command(BaseCommand):
     help = 'Run an action on all items in a facility list. If ' \
            'AWS_BATCH_JOB_ARRAY_INDEX environment variable is set, will ' \
-           'process those items whose row_index matches it. Otherwise, will ' \
-           'process all items for the given facility list.'
+           'process the item at that position among the items to be ' \
+           'processed, ordered by row_index. Otherwise, will process all ' \
+           'items for the given facility list. Items that inherited the ' \
+           'results of an unchanged row in a replaced list are skipped.'
 
     def add_arguments(self, parser):
         # Create a group of arguments explicitly labeled as required,
@@ -66,7 +69,7 @@ class Command(BaseCommand):
         elif action == ProcessingAction.MATCH:
             facility_list = FacilityList.objects.get(id=list_id)
             total_item_count = \
-                facility_list.source.facilitylistitem_set.count()
+                get_items_to_process(facility_list.source).count()
 
             result = match_facility_list_items(facility_list)
             success_count = len(result['processed_list_item_ids'])
@@ -87,14 +90,13 @@ class Command(BaseCommand):
                             action, fail_count)))
 
     def process_items(self, facility_list, action, process):
-        row_index = os.environ.get('AWS_BATCH_JOB_ARRAY_INDEX')
-        if row_index:
-            items = FacilityListItem.objects.filter(
-                source=facility_list.source,
-                row_index=row_index)
-        else:
-            items = FacilityListItem.objects.filter(
-                source=facility_list.source)
+        array_index = os.environ.get('AWS_BATCH_JOB_ARRAY_INDEX')
+        items = get_items_to_process(facility_list.source)
+        if array_index:
+            # The array size is the number of items to process, so the index
+            # is a position among them rather than a row index
+            array_index = int(array_index)
+            items = items[array_index:array_index + 1]
 
         result = {
             'success': 0,
@@ -0,0 +1,84 @@
+from multiprocessing import Pool
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+
+from api.duplicates import (TRAINING_RECORD_COUNT,
+                            find_country_clusters,
+                            get_country_codes_by_size,
+                            init_worker,
+                            save_country_clusters,
+                            train_deduper)
+from api.matching import MatchDefaults
+from api.models import FacilityDuplicateRun
+
+
+class Command(BaseCommand):
+    help = ('Search every country for clusters of facilities that are likely '
+            'to be duplicates of each other and save them for review. Each '
+            'country is searched by a pool of worker processes and recorded '
+            'as completed once its clusters are saved, so an interrupted '
+            'run can be resumed with --resume.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-p', '--processes',
+            type=int,
+            default=None,
+            help='The number of worker processes. Defaults to the CPU count')
+        parser.add_argument(
+            '-s', '--sample-size',
+            type=int,
+            default=TRAINING_RECORD_COUNT,
+            help='The number of facilities sampled to train the model')
+        parser.add_argument(
+            '-w', '--recall-weight',
+            type=float,
+            default=MatchDefaults.RECALL_WEIGHT,
+            help='The weight of recall relative to precision')
+        parser.add_argument(
+            '-r', '--resume',
+            action='store_true',
+            help='Resume the most recent run that has not finished')
+
+    def handle(self, *args, **options):
+        if options['resume']:
+            run = FacilityDuplicateRun \
+                .objects \
+                .filter(finished_at__isnull=True) \
+                .order_by('-created_at') \
+                .first()
+            if run is None:
+                raise CommandError('There is no unfinished run to resume')
+            self.stdout.write('Resuming run {}'.format(run.id))
+        else:
+            self.stdout.write('Training')
+            model_settings, threshold = train_deduper(
+                record_count=options['sample_size'],
+                recall_weight=options['recall_weight'])
+            run = FacilityDuplicateRun.objects.create(
+                model_settings=model_settings,
+                threshold=threshold)
+            self.stdout.write('Started run {} with threshold {}'.format(
+                run.id, threshold))
+
+        country_codes = get_country_codes_by_size(
+            exclude=run.completed_countries)
+
+        # Worker processes must open their own database connections rather
+        # than share the ones inherited from this process
+        connections.close_all()
+        with Pool(options['processes'],
+                  initializer=init_worker,
+                  initargs=(bytes(run.model_settings), run.threshold)) as pool:
+            for country_code, clusters in pool.imap_unordered(
+                    find_country_clusters, country_codes):
+                cluster_count = save_country_clusters(
+                    run, country_code, clusters)
+                self.stdout.write('{}: {} clusters'.format(
+                    country_code, cluster_count))
+
+        run.finished_at = timezone.now()
+        run.save(update_fields=['finished_at', 'updated_at'])
+        self.stdout.write('Finished run {}'.format(run.id))
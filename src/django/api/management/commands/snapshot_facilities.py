@@ -0,0 +1,173 @@
+import csv
+import gzip
+import json
+import os
+
+import boto3
+import pyarrow
+import pyarrow.parquet
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.exports import EXPORT_BATCH_SIZE, iter_facility_details_batches
+from api.models import Facility
+
+SNAPSHOT_COLUMNS = ('oar_id', 'name', 'address', 'country_code',
+                    'country_name', 'lat', 'lng', 'contributors',
+                    'other_names', 'other_addresses', 'other_locations')
+
+MANIFEST_FILE_NAME = 'facilities-latest.json'
+
+
+def make_snapshot_row(feature):
+    properties = feature['properties']
+    lng, lat = feature['geometry']['coordinates']
+    return {
+        'oar_id': properties['oar_id'],
+        'name': properties['name'],
+        'address': properties['address'],
+        'country_code': properties['country_code'],
+        'country_name': properties['country_name'],
+        'lat': lat,
+        'lng': lng,
+        'contributors': [c['name'] for c in properties['contributors']],
+        'other_names': sorted(properties['other_names']),
+        'other_addresses': sorted(properties['other_addresses']),
+        'other_locations': [{'lat': loc['lat'], 'lng': loc['lng']}
+                            for loc in properties['other_locations']],
+    }
+
+
+def make_csv_row(row):
+    return [
+        row['oar_id'],
+        row['name'],
+        row['address'],
+        row['country_code'],
+        row['country_name'],
+        row['lat'],
+        row['lng'],
+        '|'.join(row['contributors']),
+        '|'.join(row['other_names']),
+        '|'.join(row['other_addresses']),
+        '|'.join('{},{}'.format(loc['lat'], loc['lng'])
+                 for loc in row['other_locations']),
+    ]
+
+
+def make_parquet_schema():
+    return pyarrow.schema([
+        ('oar_id', pyarrow.string()),
+        ('name', pyarrow.string()),
+        ('address', pyarrow.string()),
+        ('country_code', pyarrow.string()),
+        ('country_name', pyarrow.string()),
+        ('lat', pyarrow.float64()),
+        ('lng', pyarrow.float64()),
+        ('contributors', pyarrow.list_(pyarrow.string())),
+        ('other_names', pyarrow.list_(pyarrow.string())),
+        ('other_addresses', pyarrow.list_(pyarrow.string())),
+        ('other_locations', pyarrow.list_(pyarrow.struct([
+            ('lat', pyarrow.float64()),
+            ('lng', pyarrow.float64()),
+        ]))),
+    ])
+
+
+class Command(BaseCommand):
+    help = ('Write a versioned snapshot of every facility with its '
+            'contributors, other names, other addresses, and other '
+            'locations as gzipped CSV and Parquet files. If a bucket is '
+            'configured, the files are uploaded to S3 to be served as static '
+            'files.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-o', '--output-dir',
+            default=settings.SNAPSHOT_DIR,
+            help='The directory in which to write the snapshot files')
+        parser.add_argument(
+            '-b', '--bucket',
+            default=settings.SNAPSHOT_BUCKET,
+            help='The S3 bucket to which the snapshot files are uploaded')
+        parser.add_argument(
+            '-c', '--chunk-size',
+            type=int,
+            default=EXPORT_BATCH_SIZE,
+            help='The number of facilities to read from the database at once')
+
+    def handle(self, *args, **options):
+        output_dir = options['output_dir']
+        os.makedirs(output_dir, exist_ok=True)
+
+        created_at = timezone.now()
+        version = created_at.strftime('%Y%m%dT%H%M%SZ')
+        csv_name = 'facilities-{}.csv.gz'.format(version)
+        parquet_name = 'facilities-{}.parquet'.format(version)
+
+        csv_path = os.path.join(output_dir, csv_name)
+        parquet_path = os.path.join(output_dir, parquet_name)
+
+        schema = make_parquet_schema()
+        parquet_writer = pyarrow.parquet.ParquetWriter(
+            parquet_path + '.tmp', schema, compression='snappy')
+
+        facility_count = 0
+        queryset = Facility.objects.order_by('id')
+        with gzip.open(csv_path + '.tmp', 'wt', newline='') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(SNAPSHOT_COLUMNS)
+            for features in iter_facility_details_batches(
+                    queryset, batch_size=options['chunk_size']):
+                rows = [make_snapshot_row(f) for f in features]
+                writer.writerows(make_csv_row(row) for row in rows)
+                # Each batch is written as a separate row group so that only
+                # one batch is held in memory at a time
+                parquet_writer.write_table(pyarrow.Table.from_pydict(
+                    {c: [row[c] for row in rows] for c in SNAPSHOT_COLUMNS},
+                    schema=schema))
+                facility_count += len(rows)
+                self.stdout.write('Wrote {} facilities'.format(
+                    facility_count))
+
+        # Files are written under temporary names and renamed once they are
+        # complete so that a partially written snapshot is never served
+        parquet_writer.close()
+        os.replace(csv_path + '.tmp', csv_path)
+        os.replace(parquet_path + '.tmp', parquet_path)
+        files = [csv_name, parquet_name]
+
+        manifest = {
+            'version': version,
+            'created_at': created_at.isoformat(),
+            'facility_count': facility_count,
+            'columns': SNAPSHOT_COLUMNS,
+            'files': files,
+        }
+        manifest_path = os.path.join(output_dir, MANIFEST_FILE_NAME)
+        with open(manifest_path + '.tmp', 'w') as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+        os.replace(manifest_path + '.tmp', manifest_path)
+        self.stdout.write('Wrote snapshot {} to {}'.format(version,
+                                                           output_dir))
+
+        if options['bucket']:
+            self.upload(options['bucket'], output_dir,
+                        files + [MANIFEST_FILE_NAME])
+
+    def upload(self, bucket, output_dir, file_names):
+        client = boto3.client('s3')
+        # The manifest is last in the list so that it never refers to files
+        # that have not been uploaded yet
+        for file_name in file_names:
+            key = 'snapshots/{}'.format(file_name)
+            content_type = {
+                '.gz': 'application/gzip',
+                '.parquet': 'application/octet-stream',
+                '.json': 'application/json',
+            }[os.path.splitext(file_name)[1]]
+            client.upload_file(os.path.join(output_dir, file_name), bucket,
+                               key, ExtraArgs={'ContentType': content_type})
+            self.stdout.write('Uploaded s3://{}/{}'.format(bucket, key))
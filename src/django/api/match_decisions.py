@@ -0,0 +1,255 @@
+from datetime import datetime
+
+from django.utils import timezone
+
+from api.cache_invalidation import (invalidate_contributor_lookups,
+                                    invalidate_facility_caches)
+from api.constants import FacilityMatchDecisions, ProcessingAction
+from api.facility_history import (bulk_create_history,
+                                  create_associate_match_change_reason)
+from api.models import (Facility,
+                        FacilityContributor,
+                        FacilityCount,
+                        FacilityListItem,
+                        FacilityListItemStatusCount,
+                        FacilityMatch)
+from api.oar_id import make_oar_id
+
+
+def make_facility_ids(country_codes):
+    """
+    Return a new, unused OAR ID for each of the country codes, checking the
+    generated IDs against existing facilities with one query per round of
+    generation rather than one per ID.
+    """
+    ids = [None] * len(country_codes)
+    while None in ids:
+        candidates = {
+            index: make_oar_id(country_codes[index])
+            for index, oar_id in enumerate(ids)
+            if oar_id is None
+        }
+        in_use = set(Facility
+                     .objects
+                     .filter(id__in=candidates.values())
+                     .values_list('id', flat=True))
+        in_use.update(ids)
+        for index, candidate in candidates.items():
+            if candidate not in in_use:
+                ids[index] = candidate
+                in_use.add(candidate)
+    return ids
+
+
+def create_facilities_from_items(items, user=None):
+    """
+    Create a facility and a confirmed match from each of the geocoded list
+    items with bulk inserts, and write their history.
+
+    Returns:
+    A list of the new facilities, in the same order as the items.
+    """
+    if len(items) == 0:
+        return []
+
+    facilities = [
+        Facility(id=oar_id,
+                 name=item.name,
+                 address=item.address,
+                 country_code=item.country_code,
+                 location=item.geocoded_point,
+                 created_from=item)
+        for item, oar_id
+        in zip(items, make_facility_ids([i.country_code for i in items]))
+    ]
+    Facility.objects.bulk_create(facilities)
+    bulk_create_history(Facility, facilities, user=user, history_type='+')
+
+    matches = [
+        FacilityMatch(facility_list_item=item,
+                      facility=facility,
+                      confidence=1.0,
+                      status=FacilityMatch.CONFIRMED,
+                      results={
+                          'match_type': 'all_potential_matches_rejected',
+                      })
+        for item, facility in zip(items, facilities)
+    ]
+    FacilityMatch.objects.bulk_create(matches)
+    bulk_create_history(FacilityMatch, matches, user=user, history_type='+')
+
+    # Bulk creation does not send the `post_save` signals that maintain the
+    # facility counts
+    deltas = {FacilityCount.TOTAL: len(facilities)}
+    for facility in facilities:
+        name = FacilityCount.country_name(facility.country_code)
+        deltas[name] = deltas.get(name, 0) + 1
+    FacilityCount.objects.add(deltas)
+
+    return facilities
+
+
+def apply_match_decisions(decisions, contributor, user=None):
+    """
+    Confirm or reject many potential matches to the contributor's list items
+    at once. Confirming a match rejects the other matches to its item, as the
+    `confirm` action does, and rejecting the last pending match to an item
+    creates a new facility from the item, as the `reject` action does.
+
+    The matches and items are changed with set-based updates, their history
+    is written in bulk, and the new facilities are created with bulk inserts,
+    so the number of queries does not depend on the number of decisions.
+
+    Arguments:
+    decisions -- A list of dictionaries with the `id` of a match and a
+                 `decision` of `confirm` or `reject`
+    contributor -- The contributor whose list items the matches must belong
+                   to
+    user -- The user making the decisions
+
+    Returns:
+    A tuple of the list of updated `FacilityListItem`s and a list of
+    dictionaries describing the decisions that could not be applied.
+    """
+    decisions_by_id = {d['id']: d['decision'] for d in decisions}
+    errors = []
+
+    def add_error(match_id, message):
+        errors.append({'id': match_id, 'error': message})
+
+    matches_by_id = FacilityMatch \
+        .objects \
+        .filter(facility_list_item__source__contributor=contributor) \
+        .select_related('facility_list_item') \
+        .in_bulk(decisions_by_id.keys())
+
+    item_decisions = {}
+    for match_id, decision in decisions_by_id.items():
+        match = matches_by_id.get(match_id)
+        if match is None:
+            add_error(match_id,
+                      'Facility match {} does not exist.'.format(match_id))
+        elif match.facility_list_item.status != \
+                FacilityListItem.POTENTIAL_MATCH:
+            add_error(match_id,
+                      'facility list item status must be POTENTIAL_MATCH')
+        elif match.status != FacilityMatch.PENDING:
+            add_error(match_id, 'facility match status must be PENDING')
+        else:
+            item_decisions.setdefault(
+                match.facility_list_item_id, {})[match_id] = decision
+
+    for item_id, decisions_for_item in list(item_decisions.items()):
+        confirm_count = list(decisions_for_item.values()) \
+            .count(FacilityMatchDecisions.CONFIRM)
+        if confirm_count > 1:
+            for match_id in decisions_for_item:
+                add_error(match_id,
+                          'Only one match to a facility list item can be '
+                          'confirmed.')
+            del item_decisions[item_id]
+
+    matches_by_item = {}
+    for match in FacilityMatch \
+            .objects \
+            .filter(facility_list_item_id__in=item_decisions.keys()) \
+            .select_related('facility',
+                            'facility_list_item__source__contributor',
+                            'facility_list_item__source__facility_list') \
+            .order_by('id'):
+        matches_by_item.setdefault(match.facility_list_item_id, []).append(
+            match)
+
+    timestamp = str(datetime.utcnow())
+    items = []
+    changed_matches = []
+    items_without_matches = []
+    for item_id, decisions_for_item in item_decisions.items():
+        matches = matches_by_item[item_id]
+        item = matches[0].facility_list_item
+        items.append(item)
+
+        confirmed = next(
+            (m for m in matches
+             if decisions_for_item.get(m.id) ==
+             FacilityMatchDecisions.CONFIRM),
+            None)
+        if confirmed is not None:
+            confirmed.status = FacilityMatch.CONFIRMED
+            confirmed.changeReason = create_associate_match_change_reason(
+                item, confirmed.facility)
+            changed_matches.append(confirmed)
+            for match in matches:
+                if match is not confirmed \
+                        and match.status != FacilityMatch.REJECTED:
+                    match.status = FacilityMatch.REJECTED
+                    changed_matches.append(match)
+            item.status = FacilityListItem.CONFIRMED_MATCH
+            item.facility = confirmed.facility
+            continue
+
+        for match in matches:
+            if match.id in decisions_for_item:
+                match.status = FacilityMatch.REJECTED
+                changed_matches.append(match)
+
+        if any(m.status == FacilityMatch.PENDING for m in matches):
+            continue
+        if item.geocoded_point is None:
+            item.status = FacilityListItem.ERROR_MATCHING
+            item.processing_results.append({
+                'action': ProcessingAction.CONFIRM,
+                'started_at': timestamp,
+                'error': True,
+                'message': ('Unable to create a new facility from an '
+                            'item with no geocoded location'),
+                'finished_at': timestamp,
+            })
+        else:
+            items_without_matches.append(item)
+
+    updated_at = timezone.now()
+    for status in (FacilityMatch.CONFIRMED, FacilityMatch.REJECTED):
+        FacilityMatch \
+            .objects \
+            .filter(id__in=[m.id for m in changed_matches
+                            if m.status == status]) \
+            .update(status=status, updated_at=updated_at)
+    for match in changed_matches:
+        match.updated_at = updated_at
+    bulk_create_history(FacilityMatch, changed_matches, user=user)
+
+    new_facilities = create_facilities_from_items(items_without_matches,
+                                                  user=user)
+    for item, facility in zip(items_without_matches, new_facilities):
+        item.status = FacilityListItem.CONFIRMED_MATCH
+        item.facility = facility
+
+    changed_items = [i for i in items
+                     if i.status != FacilityListItem.POTENTIAL_MATCH]
+    for item in changed_items:
+        item.updated_at = updated_at
+    FacilityListItem.objects.bulk_update(
+        changed_items,
+        ['status', 'facility', 'processing_results', 'updated_at'])
+
+    # Queryset and bulk updates do not send the `post_save` signals that
+    # keep counts, cached data, and denormalized data up to date
+    status_deltas = {}
+    for item in changed_items:
+        for key, delta in (
+                ((item.source_id, FacilityListItem.POTENTIAL_MATCH), -1),
+                ((item.source_id, item.status), 1)):
+            status_deltas[key] = status_deltas.get(key, 0) + delta
+    FacilityListItemStatusCount.objects.add(status_deltas)
+
+    facility_ids = {m.facility_id for m in changed_matches} \
+        | {f.id for f in new_facilities}
+    if len(facility_ids) > 0:
+        invalidate_facility_caches()
+        FacilityContributor.objects.refresh(facility_ids)
+    if any(i.status in FacilityListItem.COMPLETE_STATUSES
+           for i in changed_items):
+        invalidate_contributor_lookups()
+
+    return items, errors
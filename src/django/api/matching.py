@@ -144,6 +144,21 @@ def get_messy_items_for_training(mod_factor=5):
             for i in records}
 
 
+MODEL_FIELDS = [
+    {'field': 'country', 'type': 'Exact'},
+    {'field': 'name', 'type': 'String'},
+    {'field': 'address', 'type': 'String'},
+]
+
+
+def get_training_file_path():
+    """
+    Return the path of the file of labeled matching and distinct pairs of
+    records used to train dedupe models.
+    """
+    return os.path.join(settings.BASE_DIR, 'api', 'data', 'training.json')
+
+
 def train_gazetteer(messy, canonical, model_settings=None, should_index=False):
     """
     Train and return a dedupe.Gazetteer using the specified messy and canonical
@@ -158,17 +173,9 @@ def train_gazetteer(messy, canonical, model_settings=None, should_index=False):
     if model_settings:
         gazetteer = dedupe.StaticGazetteer(model_settings)
     else:
-        fields = [
-            {'field': 'country', 'type': 'Exact'},
-            {'field': 'name', 'type': 'String'},
-            {'field': 'address', 'type': 'String'},
-        ]
-
-        gazetteer = dedupe.Gazetteer(fields)
+        gazetteer = dedupe.Gazetteer(MODEL_FIELDS)
         gazetteer.sample(messy, canonical, 15000)
-        training_file = os.path.join(settings.BASE_DIR, 'api', 'data',
-                                     'training.json')
-        with open(training_file) as tf:
+        with open(get_training_file_path()) as tf:
             gazetteer.readTraining(tf)
         gazetteer.train()
         gazetteer.cleanupTraining()
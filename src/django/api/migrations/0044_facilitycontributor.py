@@ -0,0 +1,52 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+populate_facility_contributors = """
+    INSERT INTO api_facilitycontributor
+      (facility_id, contributor_id, contrib_type, is_public, is_active)
+    SELECT DISTINCT
+      m.facility_id, s.contributor_id, c.contrib_type, s.is_public,
+      s.is_active
+    FROM api_facilitymatch m
+    JOIN api_facilitylistitem i ON i.id = m.facility_list_item_id
+    JOIN api_source s ON s.id = i.source_id
+    JOIN api_contributor c ON c.id = s.contributor_id
+    WHERE m.is_active
+    AND m.status IN ('AUTOMATIC', 'CONFIRMED')
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0043_facility_claim_parent_company_verbose_name_change'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FacilityContributor',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('contrib_type', models.CharField(choices=[('Auditor', 'Auditor'), ('Brand/Retailer', 'Brand/Retailer'), ('Civil Society Organization', 'Civil Society Organization'), ('Factory / Facility', 'Factory / Facility'), ('Manufacturing Group / Supplier / Vendor', 'Manufacturing Group / Supplier / Vendor'), ('Multi Stakeholder Initiative', 'Multi Stakeholder Initiative'), ('Researcher / Academic', 'Researcher / Academic'), ('Service Provider', 'Service Provider'), ('Union', 'Union'), ('Other', 'Other')], help_text='A copy of the contributor type', max_length=200)),
+                ('is_public', models.BooleanField(help_text='A copy of the source is_public flag')),
+                ('is_active', models.BooleanField(help_text='A copy of the source is_active flag')),
+                ('contributor', models.ForeignKey(help_text='The contributor matched to the facility', on_delete=django.db.models.deletion.CASCADE, to='api.Contributor')),
+                ('facility', models.ForeignKey(help_text='The facility to which the contributor is matched', on_delete=django.db.models.deletion.CASCADE, to='api.Facility')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='facilitycontributor',
+            index=models.Index(fields=['contributor', 'facility'], name='api_faccontrib_contrib_fac'),
+        ),
+        migrations.AddIndex(
+            model_name='facilitycontributor',
+            index=models.Index(fields=['contrib_type', 'facility'], name='api_faccontrib_type_fac'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='facilitycontributor',
+            unique_together={('facility', 'contributor', 'contrib_type', 'is_public', 'is_active')},
+        ),
+        migrations.RunSQL(populate_facility_contributors,
+                          migrations.RunSQL.noop),
+    ]
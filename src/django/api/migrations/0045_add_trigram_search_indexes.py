@@ -0,0 +1,46 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# Django implements `icontains` on PostgreSQL as
+# `UPPER("column"::text) LIKE UPPER(%s)`, so the trigram indexes are built on
+# the same expression to be usable by the existing filters.
+create_trigram_indexes = """
+CREATE INDEX api_facility_name_upper_trgm
+ON api_facility USING gin (UPPER(name) gin_trgm_ops);
+
+CREATE INDEX api_facility_id_upper_trgm
+ON api_facility USING gin (UPPER(id) gin_trgm_ops);
+
+CREATE INDEX api_facilitylistitem_name_upper_trgm
+ON api_facilitylistitem USING gin (UPPER(name) gin_trgm_ops);
+"""
+
+drop_trigram_indexes = """
+DROP INDEX IF EXISTS api_facility_name_upper_trgm;
+DROP INDEX IF EXISTS api_facility_id_upper_trgm;
+DROP INDEX IF EXISTS api_facilitylistitem_name_upper_trgm;
+"""
+
+
+def create_search_other_names_switch(apps, schema_editor):
+    Switch = apps.get_model('waffle', 'Switch')
+    Switch.objects.create(name='search_other_names', active=False)
+
+
+def delete_search_other_names_switch(apps, schema_editor):
+    Switch = apps.get_model('waffle', 'Switch')
+    Switch.objects.filter(name='search_other_names').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0044_facilitycontributor'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunSQL(create_trigram_indexes, drop_trigram_indexes),
+        migrations.RunPython(create_search_other_names_switch,
+                             delete_search_other_names_switch),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations, models
+
+
+populate_facility_counts = """
+    INSERT INTO api_facilitycount (name, count)
+    SELECT 'total', COUNT(*) FROM api_facility;
+    INSERT INTO api_facilitycount (name, count)
+    SELECT 'country:' || country_code, COUNT(*)
+    FROM api_facility
+    GROUP BY country_code;
+    INSERT INTO api_facilitycount (name, count)
+    SELECT 'contributor:' || contributor_id, COUNT(DISTINCT facility_id)
+    FROM api_facilitycontributor
+    WHERE is_active AND is_public
+    GROUP BY contributor_id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0046_add_facility_name_id_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FacilityCount',
+            fields=[
+                ('name', models.CharField(help_text='The name of the count, like "total", "country:US", or "contributor:1"', max_length=100, primary_key=True, serialize=False)),
+                ('count', models.IntegerField(default=0, help_text='The number of facilities')),
+            ],
+        ),
+        migrations.RunSQL(populate_facility_counts,
+                          migrations.RunSQL.noop),
+    ]
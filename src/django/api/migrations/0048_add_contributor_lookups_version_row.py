@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+def create_contributor_lookups_version_row(apps, schema_editor):
+    Version = apps.get_model('api', 'Version')
+    Version.objects.create(name='contributor_lookups', version=1)
+
+
+def delete_contributor_lookups_version_row(apps, schema_editor):
+    Version = apps.get_model('api', 'Version')
+    Version.objects.filter(name='contributor_lookups').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0047_facilitycount'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_contributor_lookups_version_row,
+                             delete_contributor_lookups_version_row)
+    ]
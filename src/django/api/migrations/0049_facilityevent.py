@@ -0,0 +1,30 @@
+import django.contrib.postgres.fields.jsonb
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0048_add_contributor_lookups_version_row'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FacilityEvent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facility_id', models.CharField(help_text='The OAR ID of the facility. This is not a foreign key so that events outlive deleted facilities.', max_length=32)),
+                ('action', models.CharField(choices=[('CREATE', 'CREATE'), ('UPDATE', 'UPDATE'), ('DELETE', 'DELETE'), ('MERGE', 'MERGE'), ('SPLIT', 'SPLIT'), ('OTHER', 'OTHER'), ('ASSOCIATE', 'ASSOCIATE'), ('DISSOCIATE', 'DISSOCIATE'), ('CLAIM', 'CLAIM'), ('CLAIM_UPDATE', 'CLAIM_UPDATE'), ('CLAIM_REVOKE', 'CLAIM_REVOKE')], help_text='The kind of change', max_length=12)),
+                ('detail', models.TextField(blank=True, help_text='A description of the change')),
+                ('anonymous_detail', models.TextField(blank=True, help_text='A description of the change that names contributors by type, shown to users who may not see contributor details')),
+                ('changes', django.contrib.postgres.fields.jsonb.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, help_text='The old and new values of the changed fields', null=True)),
+                ('occurred_at', models.DateTimeField(help_text='When the change was made')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='facilityevent',
+            index=models.Index(fields=['facility_id', 'occurred_at'], name='api_facilityevent_facility'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0049_facilityevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FacilityDuplicateRun',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_settings', models.BinaryField(help_text='The trained dedupe model used by every worker in the run')),
+                ('threshold', models.FloatField(help_text='The score above which records are clustered')),
+                ('completed_countries', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=2), default=list, help_text='The codes of the countries for which clusters have been saved', size=None)),
+                ('finished_at', models.DateTimeField(help_text='When every country had been searched', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FacilityDuplicateCluster',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('country_code', models.CharField(help_text='The country of the facilities', max_length=2)),
+                ('oar_ids', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=32), help_text='The OAR IDs of the facilities in the cluster', size=None)),
+                ('scores', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(), help_text='The confidence that each facility belongs in the cluster, in the same order as the OAR IDs', size=None)),
+                ('score', models.FloatField(db_index=True, help_text='The lowest confidence of any facility in the cluster')),
+                ('target_oar_id', models.CharField(help_text='The OAR ID of the facility into which the others will be merged, which defaults to the oldest', max_length=32)),
+                ('status', models.CharField(choices=[('PENDING', 'PENDING'), ('APPROVED', 'APPROVED'), ('REJECTED', 'REJECTED'), ('MERGED', 'MERGED')], default='PENDING', help_text='The review status of the cluster', max_length=8)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('run', models.ForeignKey(help_text='The run that found the cluster', on_delete=django.db.models.deletion.CASCADE, to='api.FacilityDuplicateRun')),
+            ],
+        ),
+    ]
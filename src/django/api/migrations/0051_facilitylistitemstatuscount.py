@@ -0,0 +1,34 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+populate_facility_list_item_status_counts = """
+    INSERT INTO api_facilitylistitemstatuscount (source_id, status, count)
+    SELECT source_id, status, COUNT(*)
+    FROM api_facilitylistitem
+    GROUP BY source_id, status;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0050_facility_duplicate_clusters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FacilityListItemStatusCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('UPLOADED', 'UPLOADED'), ('PARSED', 'PARSED'), ('GEOCODED', 'GEOCODED'), ('GEOCODED_NO_RESULTS', 'GEOCODED_NO_RESULTS'), ('MATCHED', 'MATCHED'), ('POTENTIAL_MATCH', 'POTENTIAL_MATCH'), ('CONFIRMED_MATCH', 'CONFIRMED_MATCH'), ('ERROR', 'ERROR'), ('ERROR_PARSING', 'ERROR_PARSING'), ('ERROR_GEOCODING', 'ERROR_GEOCODING'), ('ERROR_MATCHING', 'ERROR_MATCHING'), ('DELETED', 'DELETED')], help_text='The status of the counted list items', max_length=200)),
+                ('count', models.IntegerField(default=0, help_text='The number of list items')),
+                ('source', models.ForeignKey(help_text='The source of the counted list items', on_delete=django.db.models.deletion.CASCADE, to='api.Source')),
+            ],
+            options={
+                'unique_together': {('source', 'status')},
+            },
+        ),
+        migrations.RunSQL(populate_facility_list_item_status_counts,
+                          migrations.RunSQL.noop),
+    ]
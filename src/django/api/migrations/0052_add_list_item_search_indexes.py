@@ -0,0 +1,35 @@
+from django.contrib.postgres.operations import BtreeGinExtension
+from django.db import migrations
+
+# The list item indexes lead with `source_id`, which requires `btree_gin`, so
+# that searching the items of one list reads only that list's entries. As in
+# 0045, the indexes are built on the `UPPER` expression used by `icontains`.
+create_list_item_search_indexes = """
+CREATE INDEX api_fli_source_name_upper_trgm
+ON api_facilitylistitem USING gin (source_id, UPPER(name) gin_trgm_ops);
+
+CREATE INDEX api_fli_source_address_upper_trgm
+ON api_facilitylistitem USING gin (source_id, UPPER(address) gin_trgm_ops);
+
+CREATE INDEX api_facility_address_upper_trgm
+ON api_facility USING gin (UPPER(address) gin_trgm_ops);
+"""
+
+drop_list_item_search_indexes = """
+DROP INDEX IF EXISTS api_fli_source_name_upper_trgm;
+DROP INDEX IF EXISTS api_fli_source_address_upper_trgm;
+DROP INDEX IF EXISTS api_facility_address_upper_trgm;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0051_facilitylistitemstatuscount'),
+    ]
+
+    operations = [
+        BtreeGinExtension(),
+        migrations.RunSQL(create_list_item_search_indexes,
+                          drop_list_item_search_indexes),
+    ]
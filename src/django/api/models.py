@@ -1,3 +1,5 @@
+import threading
+
 from collections import defaultdict
 from itertools import groupby
 
@@ -6,14 +8,16 @@ from django.contrib.auth.models import (AbstractBaseUser,
                                         PermissionsMixin)
 from django.contrib.gis.db import models as gis_models
 from django.contrib.postgres import fields as postgres
-from django.db import models
-from django.db.models import Q, Count
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, models, transaction
+from django.db.models import Q
 from django.contrib.gis.geos import GEOSGeometry
 from django.utils.dateformat import format
 from allauth.account.models import EmailAddress
 from simple_history.models import HistoricalRecords
+from waffle import switch_is_active
 
-from api.constants import FeatureGroups
+from api.constants import FacilityHistoryActions, FeatureGroups
 from api.countries import COUNTRY_CHOICES
 from api.oar_id import make_oar_id
 from api.constants import Affiliations, Certifications, FacilitiesQueryParams
@@ -1002,6 +1006,27 @@ class FacilityClaimReviewNote(models.Model):
 
 
 class FacilityManager(models.Manager):
+    def text_search_filter(self, query):
+        """
+        Create a filter matching facilities whose name or OAR ID contains a
+        search string. Both columns have trigram indexes that support the
+        case-insensitive `icontains` lookup. If the `search_other_names`
+        switch is active, facilities with a matched list item whose name
+        contains the search string are also included.
+        """
+        text_filter = Q(name__icontains=query) | Q(id__icontains=query)
+
+        if switch_is_active('search_other_names'):
+            text_filter |= Q(id__in=FacilityMatch
+                             .objects
+                             .filter(status__in=[FacilityMatch.AUTOMATIC,
+                                                 FacilityMatch.CONFIRMED])
+                             .filter(is_active=True)
+                             .filter(facility_list_item__name__icontains=query)
+                             .values('facility_id'))
+
+        return text_filter
+
     def filter_by_query_params(self, params):
         """
         Create a Facility queryset filtered by a list of request query params.
@@ -1037,82 +1062,44 @@ class FacilityManager(models.Manager):
 
         if free_text_query is not None:
             facilities_qs = facilities_qs \
-                .filter(Q(name__icontains=free_text_query) |
-                        Q(id__icontains=free_text_query))
+                .filter(self.text_search_filter(free_text_query))
 
         # `name` is deprecated in favor of `q`. We keep `name` available for
         # backward compatibility.
         if name is not None:
-            facilities_qs = facilities_qs.filter(Q(name__icontains=name) |
-                                                 Q(id__icontains=name))
+            facilities_qs = facilities_qs \
+                .filter(self.text_search_filter(name))
 
         if countries is not None and len(countries):
             facilities_qs = facilities_qs \
                 .filter(country_code__in=countries)
 
+        # Contributor filters are evaluated against the denormalized
+        # `FacilityContributor` table, which has one row per facility for
+        # each contributor with an active `AUTOMATIC` or `CONFIRMED` match.
+        facility_contributors = FacilityContributor.objects.filter(
+            is_active=True, is_public=True)
+
         if len(contributor_types):
-            facilities_qs = facilities_qs \
-                .filter(id__in=FacilityMatch
-                        .objects
-                        .filter(status__in=[FacilityMatch.AUTOMATIC,
-                                            FacilityMatch.CONFIRMED])
-                        .filter(is_active=True)
-                        .filter(facility_list_item__source__contributor__contrib_type__in=contributor_types) # NOQA
-                        .filter(facility_list_item__source__is_active=True)
-                        .filter(facility_list_item__source__is_public=True)
-                        .values('facility__id')
-                )
+            facilities_qs = facilities_qs.filter(
+                id__in=facility_contributors
+                .filter(contrib_type__in=contributor_types)
+                .values('facility_id'))
 
         if len(contributors):
             if combine_contributors.upper() == 'AND':
-                # Build an inner query for facility IDs in 4 steps.
-                # First filter sources/matches by flags and status
-                facility_ids = Source.objects.filter(
-                    is_active=True,
-                    is_public=True,
-                    facilitylistitem__facilitymatch__is_active=True,
-                    facilitylistitem__facilitymatch__status__in=[
-                        FacilityMatch.AUTOMATIC,
-                        FacilityMatch.CONFIRMED]).values(
-                            'facilitylistitem__facility')
-
-                # Next, count the number of times each specified contributor
-                # appears in the list of sources for each facility. This is
-                # done by annotating a filtered count for each contributor,
-                # which is required because a contributor could submit the same
-                # facility multiple times and we do not want that to throw off
-                # the total count
-                annotate_kwargs = {
-                    'contributor{}_count'.format(index):
-                    Count('contributor', filter=Q(contributor=c))
-                    for (index, c) in enumerate(contributors)}
-                facility_ids = facility_ids.annotate(**annotate_kwargs)
-
-                # Next filter out records where any one of the specified
-                # contributors has zero matches.
-                filter_kwargs = {
-                    'contributor{}_count__gte'.format(index): 1
-                    for (index, c) in enumerate(contributors)}
-                facility_ids = facility_ids.filter(**filter_kwargs)
-
-                # Finally, use key relationships to get a flat list of facility
-                # IDs associated with the filtered sources.
-                facility_ids = facility_ids.values_list(
-                    'facilitylistitem__facility', flat=True)
-
-                facilities_qs = facilities_qs.filter(id__in=facility_ids)
-
+                # Intersect the facilities matched to each of the specified
+                # contributors.
+                for contributor in contributors:
+                    facilities_qs = facilities_qs.filter(
+                        id__in=facility_contributors
+                        .filter(contributor=contributor)
+                        .values('facility_id'))
             else:
                 facilities_qs = facilities_qs.filter(
-                    id__in=(Source.objects.filter(
-                        is_active=True,
-                        is_public=True,
-                        facilitylistitem__facilitymatch__is_active=True,
-                        facilitylistitem__facilitymatch__status__in=[
-                            FacilityMatch.AUTOMATIC,
-                            FacilityMatch.CONFIRMED],
-                        contributor__in=contributors).values_list(
-                            'facilitylistitem__facility', flat=True)))
+                    id__in=facility_contributors
+                    .filter(contributor__in=contributors)
+                    .values('facility_id'))
 
         if boundary is not None:
             facilities_qs = facilities_qs.filter(
@@ -1128,6 +1115,10 @@ class Facility(models.Model):
     """
     class Meta:
         verbose_name_plural = "facilities"
+        indexes = [
+            # Supports keyset pagination of facilities ordered by name
+            models.Index(fields=['name', 'id'], name='api_facility_name_id'),
+        ]
 
     id = models.CharField(
         max_length=32,
@@ -1180,17 +1171,16 @@ class Facility(models.Model):
         super(Facility, self).save(*args, **kwargs)
 
     def other_names(self):
-        facility_list_item_matches = [
-            FacilityListItem.objects.get(pk=pk)
-            for (pk,)
-            in self
-            .facilitymatch_set
-            .filter(status__in=[FacilityMatch.AUTOMATIC,
-                                FacilityMatch.CONFIRMED,
-                                FacilityMatch.MERGED])
-            .filter(is_active=True)
-            .values_list('facility_list_item')
-        ]
+        facility_list_item_matches = FacilityListItem \
+            .objects \
+            .filter(id__in=self
+                    .facilitymatch_set
+                    .filter(status__in=[FacilityMatch.AUTOMATIC,
+                                        FacilityMatch.CONFIRMED,
+                                        FacilityMatch.MERGED])
+                    .filter(is_active=True)
+                    .values('facility_list_item')) \
+            .select_related('source')
 
         return {
             item.name
@@ -1204,17 +1194,16 @@ class Facility(models.Model):
         }
 
     def other_addresses(self):
-        facility_list_item_matches = [
-            FacilityListItem.objects.get(pk=pk)
-            for (pk,)
-            in self
-            .facilitymatch_set
-            .filter(status__in=[FacilityMatch.AUTOMATIC,
-                                FacilityMatch.CONFIRMED,
-                                FacilityMatch.MERGED])
-            .filter(is_active=True)
-            .values_list('facility_list_item')
-        ]
+        facility_list_item_matches = FacilityListItem \
+            .objects \
+            .filter(id__in=self
+                    .facilitymatch_set
+                    .filter(status__in=[FacilityMatch.AUTOMATIC,
+                                        FacilityMatch.CONFIRMED,
+                                        FacilityMatch.MERGED])
+                    .filter(is_active=True)
+                    .values('facility_list_item')) \
+            .select_related('source')
 
         return {
             match.address
@@ -1235,20 +1224,58 @@ class Facility(models.Model):
                                 FacilityMatch.MERGED])
 
     def sources(self, user=None):
+        return Facility.sources_for_facilities([self.id], user=user)[self.id]
+
+    @staticmethod
+    def sources_for_facilities(facility_ids, user=None):
+        """
+        Load the contributor sources for a set of facilities in a single query.
+
+        Arguments:
+        facility_ids (list) -- The IDs of the facilities.
+        user (User) -- The user viewing the sources. Users that cannot view
+                       full contributor details see contributor types in
+                       place of sources.
+
+        Returns:
+        A dictionary mapping each facility ID to a list containing `Source`
+        objects and anonymized contributor type strings.
+        """
+        matches = FacilityMatch \
+            .objects \
+            .filter(facility_id__in=facility_ids) \
+            .filter(status__in=[FacilityMatch.AUTOMATIC,
+                                FacilityMatch.CONFIRMED,
+                                FacilityMatch.MERGED]) \
+            .exclude(facility_list_item__source__contributor=None) \
+            .select_related('facility_list_item__source__contributor',
+                            'facility_list_item__source__facility_list')
+
+        user_can_see_detail = Facility.user_can_see_contributor_details(user)
+
+        matches_by_facility = defaultdict(list)
+        for match in matches:
+            matches_by_facility[match.facility_id].append(match)
+
+        return {
+            facility_id: Facility.sources_from_matches(
+                matches_by_facility[facility_id], user_can_see_detail)
+            for facility_id in facility_ids
+        }
+
+    @staticmethod
+    def user_can_see_contributor_details(user):
+        if user is not None and not user.is_anonymous:
+            return user.can_view_full_contrib_details
+        return True
+
+    @staticmethod
+    def sources_from_matches(matches, user_can_see_detail):
         sorted_matches = sorted(
-            self.complete_matches()
-                .exclude(facility_list_item__source__contributor=None)
-                .prefetch_related(
-                    'facility_list_item__source__contributor'
-                ),
+            matches,
             key=lambda m: m.source.contributor.id
         )
 
-        if user is not None and not user.is_anonymous:
-            user_can_see_detail = user.can_view_full_contrib_details
-        else:
-            user_can_see_detail = True
-
         sources = []
         anonymous_sources = []
         for contributor, matches in groupby(sorted_matches,
@@ -1536,3 +1563,502 @@ class FacilityLocation(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+
+_pending_contributor_refresh = threading.local()
+
+
+def refresh_pending_facility_contributors():
+    """
+    Refresh the `FacilityContributor` rows of the facilities passed to
+    `FacilityContributorManager.refresh_on_commit` in this thread since the
+    last refresh.
+    """
+    facility_ids = getattr(_pending_contributor_refresh, 'facility_ids', None)
+    if not facility_ids:
+        return
+    _pending_contributor_refresh.facility_ids = set()
+    with transaction.atomic():
+        FacilityContributor.objects.refresh(facility_ids)
+
+
+class FacilityContributorManager(models.Manager):
+    def get_queryset(self):
+        # Reads within a transaction see the changes it has made
+        refresh_pending_facility_contributors()
+        return super(FacilityContributorManager, self).get_queryset()
+
+    def refresh_on_commit(self, facility_ids):
+        """
+        Refresh the `FacilityContributor` rows for a set of facilities when
+        the current transaction commits, once for all of the facilities
+        passed in the transaction, rather than once per call. Pending
+        refreshes are also run before `FacilityContributor` or `FacilityCount`
+        rows are read.
+        """
+        pending = getattr(_pending_contributor_refresh, 'facility_ids', None)
+        if pending is None:
+            pending = _pending_contributor_refresh.facility_ids = set()
+        pending.update(f for f in facility_ids if f is not None)
+
+        already_scheduled = any(
+            f is refresh_pending_facility_contributors
+            for _, f in connection.run_on_commit)
+        if not already_scheduled:
+            transaction.on_commit(refresh_pending_facility_contributors)
+
+    def refresh(self, facility_ids, rebuild=True):
+        """
+        Rebuild the `FacilityContributor` rows for a set of facilities from
+        their active `AUTOMATIC` and `CONFIRMED` matches, and adjust the
+        contributor counts in `FacilityCount` by the difference.
+
+        Arguments:
+        facility_ids (iterable) -- The IDs of the facilities to refresh.
+        rebuild (bool) -- If False, the rows are deleted and not rebuilt,
+                          which is used before facilities are deleted.
+        """
+        facility_ids = [f for f in set(facility_ids) if f is not None]
+        if len(facility_ids) == 0:
+            return
+
+        with connection.cursor() as cursor:
+            before = self._contributor_counts(cursor, facility_ids)
+            cursor.execute(
+                'DELETE FROM api_facilitycontributor '
+                'WHERE facility_id = ANY(%s)', [facility_ids])
+            if rebuild:
+                cursor.execute(
+                    FACILITY_CONTRIBUTOR_SELECT
+                    + 'AND m.facility_id = ANY(%s)',
+                    [FacilityMatch.AUTOMATIC, FacilityMatch.CONFIRMED,
+                     facility_ids])
+                after = self._contributor_counts(cursor, facility_ids)
+            else:
+                after = {}
+
+        FacilityCount.objects.add({
+            FacilityCount.contributor_name(contributor_id):
+            after.get(contributor_id, 0) - before.get(contributor_id, 0)
+            for contributor_id in set(before) | set(after)
+        })
+
+    def _contributor_counts(self, cursor, facility_ids):
+        cursor.execute(
+            'SELECT contributor_id, COUNT(DISTINCT facility_id) '
+            'FROM api_facilitycontributor '
+            'WHERE facility_id = ANY(%s) AND is_active AND is_public '
+            'GROUP BY contributor_id', [facility_ids])
+        return dict(cursor.fetchall())
+
+    def refresh_for_sources(self, source_ids):
+        """
+        Rebuild the `FacilityContributor` rows for every facility matched to
+        an item in any of the specified sources.
+        """
+        self.refresh(FacilityMatch
+                     .objects
+                     .filter(facility_list_item__source__in=source_ids)
+                     .values_list('facility_id', flat=True)
+                     .distinct())
+
+    def refresh_all(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM api_facilitycontributor')
+            cursor.execute(
+                FACILITY_CONTRIBUTOR_SELECT,
+                [FacilityMatch.AUTOMATIC, FacilityMatch.CONFIRMED])
+        FacilityCount.objects.refresh_all()
+
+
+FACILITY_CONTRIBUTOR_SELECT = """
+    INSERT INTO api_facilitycontributor
+      (facility_id, contributor_id, contrib_type, is_public, is_active)
+    SELECT DISTINCT
+      m.facility_id, s.contributor_id, c.contrib_type, s.is_public,
+      s.is_active
+    FROM api_facilitymatch m
+    JOIN api_facilitylistitem i ON i.id = m.facility_list_item_id
+    JOIN api_source s ON s.id = i.source_id
+    JOIN api_contributor c ON c.id = s.contributor_id
+    WHERE m.is_active
+    AND m.status IN (%s, %s)
+"""
+
+
+class FacilityContributor(models.Model):
+    """
+    A denormalized record of a contributor having an active match to a
+    facility through one of its sources. Rows are rebuilt by
+    `FacilityContributorManager.refresh` whenever matches, sources, or
+    contributors change so that contributor search filters can be evaluated
+    without joining through sources, list items, and matches.
+    """
+    class Meta:
+        unique_together = ('facility', 'contributor', 'contrib_type',
+                           'is_public', 'is_active')
+        indexes = [
+            models.Index(fields=['contributor', 'facility'],
+                         name='api_faccontrib_contrib_fac'),
+            models.Index(fields=['contrib_type', 'facility'],
+                         name='api_faccontrib_type_fac'),
+        ]
+
+    facility = models.ForeignKey(
+        'Facility',
+        null=False,
+        on_delete=models.CASCADE,
+        help_text='The facility to which the contributor is matched')
+    contributor = models.ForeignKey(
+        'Contributor',
+        null=False,
+        on_delete=models.CASCADE,
+        help_text='The contributor matched to the facility')
+    contrib_type = models.CharField(
+        max_length=200,
+        null=False,
+        blank=False,
+        choices=Contributor.CONTRIB_TYPE_CHOICES,
+        help_text='A copy of the contributor type')
+    is_public = models.BooleanField(
+        null=False,
+        help_text='A copy of the source is_public flag')
+    is_active = models.BooleanField(
+        null=False,
+        help_text='A copy of the source is_active flag')
+
+    objects = FacilityContributorManager()
+
+
+class FacilityCountManager(models.Manager):
+    def get_queryset(self):
+        # Contributor counts are adjusted when contributor rows are refreshed
+        refresh_pending_facility_contributors()
+        return super(FacilityCountManager, self).get_queryset()
+
+    def add(self, deltas):
+        """
+        Add to the named counts, creating any that do not exist.
+
+        Arguments:
+        deltas (dict) -- A mapping of count names to the amounts to add.
+        """
+        deltas = {name: delta for name, delta in deltas.items() if delta}
+        if len(deltas) == 0:
+            return
+
+        names = list(deltas.keys())
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'INSERT INTO api_facilitycount (name, count) '
+                'SELECT * FROM unnest(%s::varchar[], %s::integer[]) '
+                'ON CONFLICT (name) DO UPDATE '
+                'SET count = api_facilitycount.count + EXCLUDED.count',
+                [names, [deltas[name] for name in names]])
+
+    def get_total(self, names):
+        """
+        Return the sum of the named counts, treating missing counts as 0.
+        """
+        return self.filter(name__in=names) \
+                   .aggregate(total=models.Sum('count'))['total'] or 0
+
+    def refresh_all(self):
+        with connection.cursor() as cursor:
+            cursor.execute(FACILITY_COUNT_REFRESH)
+
+
+FACILITY_COUNT_REFRESH = """
+    DELETE FROM api_facilitycount;
+    INSERT INTO api_facilitycount (name, count)
+    SELECT 'total', COUNT(*) FROM api_facility;
+    INSERT INTO api_facilitycount (name, count)
+    SELECT 'country:' || country_code, COUNT(*)
+    FROM api_facility
+    GROUP BY country_code;
+    INSERT INTO api_facilitycount (name, count)
+    SELECT 'contributor:' || contributor_id, COUNT(DISTINCT facility_id)
+    FROM api_facilitycontributor
+    WHERE is_active AND is_public
+    GROUP BY contributor_id;
+"""
+
+
+class FacilityCount(models.Model):
+    """
+    Maintained counts of facilities in total, by country, and by contributor,
+    which answer the most common requests to the facility count endpoint
+    without scanning facilities. Country counts are adjusted when facilities
+    are created, moved, or deleted, and contributor counts are adjusted by
+    `FacilityContributorManager.refresh`.
+    """
+    TOTAL = 'total'
+
+    name = models.CharField(
+        max_length=100,
+        null=False,
+        blank=False,
+        primary_key=True,
+        help_text=('The name of the count, like "total", "country:US", or '
+                   '"contributor:1"'))
+    count = models.IntegerField(
+        null=False,
+        default=0,
+        help_text='The number of facilities')
+
+    objects = FacilityCountManager()
+
+    @staticmethod
+    def country_name(country_code):
+        return 'country:{}'.format(country_code)
+
+    @staticmethod
+    def contributor_name(contributor_id):
+        return 'contributor:{}'.format(contributor_id)
+
+
+class FacilityListItemStatusCountManager(models.Manager):
+    def add(self, deltas):
+        """
+        Add to the counts of list items by source and status, creating any
+        that do not exist.
+
+        Arguments:
+        deltas (dict) -- A mapping of (source ID, status) tuples to the
+                         amounts to add.
+        """
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        if len(deltas) == 0:
+            return
+
+        keys = list(deltas.keys())
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'INSERT INTO api_facilitylistitemstatuscount '
+                '    (source_id, status, count) '
+                'SELECT * FROM unnest(%s::integer[], %s::varchar[], '
+                '                     %s::integer[]) '
+                'ON CONFLICT (source_id, status) DO UPDATE '
+                'SET count = api_facilitylistitemstatuscount.count '
+                '            + EXCLUDED.count',
+                [[source_id for source_id, _ in keys],
+                 [status for _, status in keys],
+                 [deltas[key] for key in keys]])
+
+    def counts_by_source(self, source_ids):
+        """
+        Return a dictionary mapping each of the source IDs to a dictionary of
+        the nonzero counts of its list items by status.
+        """
+        counts = {source_id: {} for source_id in source_ids}
+        for source_id, status, count in self \
+                .filter(source_id__in=source_ids, count__gt=0) \
+                .values_list('source_id', 'status', 'count'):
+            counts[source_id][status] = count
+        return counts
+
+    def statuses_for_source(self, source_id):
+        """
+        Return the distinct statuses of the list items of a source.
+        """
+        return list(self
+                    .filter(source_id=source_id, count__gt=0)
+                    .order_by('status')
+                    .values_list('status', flat=True))
+
+    def refresh_all(self):
+        with connection.cursor() as cursor:
+            cursor.execute(FACILITY_LIST_ITEM_STATUS_COUNT_REFRESH)
+
+
+FACILITY_LIST_ITEM_STATUS_COUNT_REFRESH = """
+    DELETE FROM api_facilitylistitemstatuscount;
+    INSERT INTO api_facilitylistitemstatuscount (source_id, status, count)
+    SELECT source_id, status, COUNT(*)
+    FROM api_facilitylistitem
+    GROUP BY source_id, status;
+"""
+
+
+class FacilityListItemStatusCount(models.Model):
+    """
+    Maintained counts of the list items of each source by status, from which
+    the item counts and statuses of facility lists are read without scanning
+    their items. The counts are adjusted when list items are created, change
+    status, or are deleted, and code that creates or updates list items in
+    bulk must adjust them with `FacilityListItemStatusCountManager.add`.
+    """
+    class Meta:
+        unique_together = ('source', 'status')
+
+    source = models.ForeignKey(
+        'Source',
+        null=False,
+        on_delete=models.CASCADE,
+        help_text='The source of the counted list items')
+    status = models.CharField(
+        max_length=200,
+        null=False,
+        blank=False,
+        choices=FacilityListItem.STATUS_CHOICES,
+        help_text='The status of the counted list items')
+    count = models.IntegerField(
+        null=False,
+        default=0,
+        help_text='The number of list items')
+
+    objects = FacilityListItemStatusCountManager()
+
+
+class FacilityEvent(models.Model):
+    """
+    An append-only log of the changes to facilities, from which the facility
+    history endpoint is read. Events are written in the same transaction as
+    the change they describe (see `api.facility_history`) and existing
+    history can be replayed into this table with the `backfill_facility_events`
+    management command.
+    """
+    class Meta:
+        indexes = [
+            models.Index(fields=['facility_id', 'occurred_at'],
+                         name='api_facilityevent_facility'),
+        ]
+
+    ACTION_CHOICES = (
+        (FacilityHistoryActions.CREATE, FacilityHistoryActions.CREATE),
+        (FacilityHistoryActions.UPDATE, FacilityHistoryActions.UPDATE),
+        (FacilityHistoryActions.DELETE, FacilityHistoryActions.DELETE),
+        (FacilityHistoryActions.MERGE, FacilityHistoryActions.MERGE),
+        (FacilityHistoryActions.SPLIT, FacilityHistoryActions.SPLIT),
+        (FacilityHistoryActions.OTHER, FacilityHistoryActions.OTHER),
+        (FacilityHistoryActions.ASSOCIATE, FacilityHistoryActions.ASSOCIATE),
+        (FacilityHistoryActions.DISSOCIATE,
+         FacilityHistoryActions.DISSOCIATE),
+        (FacilityHistoryActions.CLAIM, FacilityHistoryActions.CLAIM),
+        (FacilityHistoryActions.CLAIM_UPDATE,
+         FacilityHistoryActions.CLAIM_UPDATE),
+        (FacilityHistoryActions.CLAIM_REVOKE,
+         FacilityHistoryActions.CLAIM_REVOKE),
+    )
+
+    facility_id = models.CharField(
+        max_length=32,
+        null=False,
+        blank=False,
+        help_text=('The OAR ID of the facility. This is not a foreign key so '
+                   'that events outlive deleted facilities.'))
+    action = models.CharField(
+        max_length=12,
+        null=False,
+        blank=False,
+        choices=ACTION_CHOICES,
+        help_text='The kind of change')
+    detail = models.TextField(
+        null=False,
+        blank=True,
+        help_text='A description of the change')
+    anonymous_detail = models.TextField(
+        null=False,
+        blank=True,
+        help_text=('A description of the change that names contributors by '
+                   'type, shown to users who may not see contributor '
+                   'details'))
+    changes = postgres.JSONField(
+        null=True,
+        encoder=DjangoJSONEncoder,
+        help_text='The old and new values of the changed fields')
+    occurred_at = models.DateTimeField(
+        null=False,
+        help_text='When the change was made')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
+class FacilityDuplicateRun(models.Model):
+    """
+    A run of the `find_duplicate_facilities` management command, which
+    stores the trained model and the countries that have been searched so
+    that an interrupted run can be resumed.
+    """
+    model_settings = models.BinaryField(
+        null=False,
+        help_text='The trained dedupe model used by every worker in the run')
+    threshold = models.FloatField(
+        null=False,
+        help_text='The score above which records are clustered')
+    completed_countries = postgres.ArrayField(
+        models.CharField(max_length=2, null=False, blank=False),
+        null=False,
+        default=list,
+        help_text=('The codes of the countries for which clusters have been '
+                   'saved'))
+    finished_at = models.DateTimeField(
+        null=True,
+        help_text='When every country had been searched')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return 'Run {} ({})'.format(self.id, self.created_at)
+
+
+class FacilityDuplicateCluster(models.Model):
+    """
+    A set of facilities that are likely to be duplicates of each other, to
+    be reviewed and, if approved, merged into the suggested target.
+    """
+    PENDING = 'PENDING'
+    APPROVED = 'APPROVED'
+    REJECTED = 'REJECTED'
+    MERGED = 'MERGED'
+
+    STATUS_CHOICES = (
+        (PENDING, PENDING),
+        (APPROVED, APPROVED),
+        (REJECTED, REJECTED),
+        (MERGED, MERGED),
+    )
+
+    run = models.ForeignKey(
+        'FacilityDuplicateRun',
+        null=False,
+        on_delete=models.CASCADE,
+        help_text='The run that found the cluster')
+    country_code = models.CharField(
+        max_length=2,
+        null=False,
+        blank=False,
+        help_text='The country of the facilities')
+    oar_ids = postgres.ArrayField(
+        models.CharField(max_length=32, null=False, blank=False),
+        null=False,
+        help_text='The OAR IDs of the facilities in the cluster')
+    scores = postgres.ArrayField(
+        models.FloatField(null=False),
+        null=False,
+        help_text=('The confidence that each facility belongs in the '
+                   'cluster, in the same order as the OAR IDs'))
+    score = models.FloatField(
+        null=False,
+        db_index=True,
+        help_text='The lowest confidence of any facility in the cluster')
+    target_oar_id = models.CharField(
+        max_length=32,
+        null=False,
+        blank=False,
+        help_text=('The OAR ID of the facility into which the others will be '
+                   'merged, which defaults to the oldest'))
+    status = models.CharField(
+        max_length=8,
+        null=False,
+        blank=False,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+        help_text='The review status of the cluster')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def merge_group(self):
+        return {
+            'target': self.target_oar_id,
+            'merge': [i for i in self.oar_ids if i != self.target_oar_id],
+        }
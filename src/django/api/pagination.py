@@ -1,4 +1,18 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from functools import partial
+
+from django.core.paginator import Paginator as DjangoPaginator
+from django.db.models import F, IntegerField, Q
+from django.db.models.functions import Cast
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (BasePagination,
+                                       PageNumberPagination,
+                                       _positive_int)
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from rest_framework_gis.pagination import GeoJsonPagination
 
 
@@ -8,8 +22,134 @@ class PageAndSizePagination(PageNumberPagination):
     max_page_size = 100
 
 
+class KnownCountPaginator(DjangoPaginator):
+    """
+    A Django paginator that uses a count computed elsewhere, if one is
+    passed, rather than running COUNT(*) on the object list.
+    """
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super(KnownCountPaginator, self).__init__(object_list, per_page,
+                                                  **kwargs)
+        if count is not None:
+            # `count` is a cached property, so setting the cached value
+            # prevents it from being computed
+            self.__dict__['count'] = count
+
+
 class FacilitiesGeoJSONPagination(GeoJsonPagination):
     page_query_param = 'page'
     page_size_query_param = 'pageSize'
     page_size = 50
     max_page_size = 50
+
+    def paginate_queryset(self, queryset, request, view=None, count=None):
+        self.django_paginator_class = partial(KnownCountPaginator,
+                                              count=count)
+        return super(FacilitiesGeoJSONPagination, self).paginate_queryset(
+            queryset, request, view=view)
+
+
+class FacilitiesGeoJSONCursorPagination(BasePagination):
+    """
+    Forward-only keyset pagination of facilities ordered by name and OAR ID,
+    or by text search similarity, name, and OAR ID when the queryset has been
+    annotated with a `similarity`. Each page is read by seeking past the last
+    facility of the previous page, so unlike `FacilitiesGeoJSONPagination` no
+    COUNT(*) or OFFSET is run and later pages are as fast as the first.
+
+    Similarity is a PostgreSQL `real`, which does not survive the round trip
+    through a JSON cursor exactly, so results are ordered and sought by an
+    integer rank computed from it rather than by the similarity itself.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'pageSize'
+    page_size = 50
+    max_page_size = 50
+    invalid_cursor_message = 'Invalid cursor'
+    similarity_rank_scale = 1000000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.has_similarity = 'similarity' in queryset.query.annotations
+
+        if self.has_similarity:
+            queryset = queryset.annotate(similarity_rank=Cast(
+                F('similarity') * self.similarity_rank_scale,
+                IntegerField()))
+
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = self.filter_after(queryset, position)
+
+        if self.has_similarity:
+            queryset = queryset.order_by('-similarity_rank', 'name', 'id')
+        else:
+            queryset = queryset.order_by('name', 'id')
+
+        # Read one extra facility to learn whether there is a next page
+        results = list(queryset[:self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size)
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def filter_after(self, queryset, position):
+        if self.has_similarity:
+            rank, name, oar_id = position
+            return queryset.filter(
+                Q(similarity_rank__lt=rank)
+                | Q(similarity_rank=rank, name__gt=name)
+                | Q(similarity_rank=rank, name=name, id__gt=oar_id))
+
+        name, oar_id = position
+        # A row comparison lets PostgreSQL seek directly to the position
+        # using the index on (name, id)
+        return queryset.extra(
+            where=['("api_facility"."name", "api_facility"."id") > (%s, %s)'],
+            params=[name, oar_id])
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = json.loads(
+                b64decode(encoded.encode('ascii')).decode('utf-8'))
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        expected_length = 3 if self.has_similarity else 2
+        if not isinstance(position, list) \
+           or len(position) != expected_length:
+            raise NotFound(self.invalid_cursor_message)
+        if self.has_similarity and not isinstance(position[0], int):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def encode_cursor(self, facility):
+        position = [facility.name, facility.id]
+        if self.has_similarity:
+            position.insert(0, facility.similarity_rank)
+        return b64encode(json.dumps(position).encode('utf-8')).decode('ascii')
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(),
+                                   self.cursor_query_param,
+                                   self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('type', 'FeatureCollection'),
+            ('next', self.get_next_link()),
+            ('features', data['features'])
+        ]))
@@ -6,8 +6,8 @@ from django.db import transaction
 from django.contrib.auth.forms import PasswordResetForm
 from django.contrib.auth import password_validation
 from django.urls import reverse
-from django.db.models import Count
 from rest_framework.serializers import (CharField,
+                                        ChoiceField,
                                         DecimalField,
                                         EmailField,
                                         IntegerField,
@@ -24,6 +24,7 @@ from allauth.account.utils import setup_user_email
 
 from api.models import (FacilityList,
                         FacilityListItem,
+                        FacilityListItemStatusCount,
                         Facility,
                         FacilityLocation,
                         FacilityMatch,
@@ -34,6 +35,7 @@ from api.models import (FacilityList,
                         ProductType,
                         ProductionType,
                         Source)
+from api.constants import FacilityExportFormats, FacilityMatchDecisions
 from api.countries import COUNTRY_NAMES, COUNTRY_CHOICES
 from api.processing import get_country_code
 from waffle import switch_is_active
@@ -44,7 +46,7 @@ def _get_parent_company(claim):
         return None
 
     return {
-        'id': claim.parent_company.admin.id,
+        'id': claim.parent_company.admin_id,
         'name': claim.parent_company.name,
     }
 
@@ -255,113 +257,46 @@ class FacilityListSerializer(ModelSerializer):
         except Source.DoesNotExist:
             return False
 
-    def get_item_count(self, facility_list):
+    def _status_counts(self, facility_list):
+        """
+        Return the maintained counts of the list's items by status, read from
+        the `status_counts_by_source` context when the counts for a set of
+        lists have been loaded together and otherwise loaded once per list by
+        each serializer instance.
+        """
         try:
-            return facility_list.source.facilitylistitem_set.count()
+            source_id = facility_list.source.id
         except Source.DoesNotExist:
-            return 0
+            return {}
+
+        status_counts_by_source = self.context.get('status_counts_by_source') \
+            if self.context is not None else None
+        if status_counts_by_source is not None:
+            return status_counts_by_source.get(source_id, {})
+        if not hasattr(self, '_loaded_status_counts'):
+            self._loaded_status_counts = {}
+        if source_id not in self._loaded_status_counts:
+            self._loaded_status_counts.update(
+                FacilityListItemStatusCount
+                .objects
+                .counts_by_source([source_id]))
+        return self._loaded_status_counts[source_id]
+
+    def get_item_count(self, facility_list):
+        return sum(self._status_counts(facility_list).values())
 
     def get_items_url(self, facility_list):
         return reverse('facility-list-items',
                        kwargs={'pk': facility_list.pk})
 
     def get_statuses(self, facility_list):
-        try:
-            return (facility_list.source.facilitylistitem_set
-                    .values_list('status', flat=True)
-                    .distinct())
-        except Source.DoesNotExist:
-            return []
+        return sorted(self._status_counts(facility_list).keys())
 
     def get_status_counts(self, facility_list):
-        try:
-            statuses = FacilityListItem \
-                .objects \
-                .filter(source=facility_list.source) \
-                .values('status') \
-                .annotate(status_count=Count('status'))
-        except Source.DoesNotExist:
-            statuses = []
-
-        status_counts_dictionary = {
-            status_dict.get('status'): status_dict.get('status_count')
-            for status_dict
-            in statuses
-        }
-
-        uploaded = status_counts_dictionary.get(
-            FacilityListItem.UPLOADED,
-            0
-        )
-
-        parsed = status_counts_dictionary.get(
-            FacilityListItem.PARSED,
-            0
-        )
-
-        geocoded = status_counts_dictionary.get(
-            FacilityListItem.GEOCODED,
-            0
-        )
-
-        geocoded_no_results = status_counts_dictionary.get(
-            FacilityListItem.GEOCODED_NO_RESULTS,
-            0
-        )
-
-        matched = status_counts_dictionary.get(
-            FacilityListItem.MATCHED,
-            0
-        )
-
-        potential_match = status_counts_dictionary.get(
-            FacilityListItem.POTENTIAL_MATCH,
-            0
-        )
-
-        confirmed_match = status_counts_dictionary.get(
-            FacilityListItem.CONFIRMED_MATCH,
-            0
-        )
-
-        error = status_counts_dictionary.get(
-            FacilityListItem.ERROR,
-            0
-        )
-
-        error_parsing = status_counts_dictionary.get(
-            FacilityListItem.ERROR_PARSING,
-            0
-        )
-
-        error_geocoding = status_counts_dictionary.get(
-            FacilityListItem.ERROR_GEOCODING,
-            0
-        )
-
-        error_matching = status_counts_dictionary.get(
-            FacilityListItem.ERROR_MATCHING,
-            0
-        )
-
-        deleted = status_counts_dictionary.get(
-            FacilityListItem.DELETED,
-            0
-        )
-
+        status_counts = self._status_counts(facility_list)
         return {
-            FacilityListItem.UPLOADED: uploaded,
-            FacilityListItem.PARSED: parsed,
-            FacilityListItem.GEOCODED: geocoded,
-            FacilityListItem.GEOCODED_NO_RESULTS: geocoded_no_results,
-            FacilityListItem.MATCHED: matched,
-            FacilityListItem.POTENTIAL_MATCH: potential_match,
-            FacilityListItem.CONFIRMED_MATCH: confirmed_match,
-            FacilityListItem.ERROR: error,
-            FacilityListItem.ERROR_PARSING: error_parsing,
-            FacilityListItem.ERROR_GEOCODING: error_geocoding,
-            FacilityListItem.ERROR_MATCHING: error_matching,
-            FacilityListItem.DELETED: deleted,
+            status: status_counts.get(status, 0)
+            for status, _ in FacilityListItem.STATUS_CHOICES
         }
 
     def get_contributor_id(self, facility_list):
@@ -391,6 +326,30 @@ class FacilityQueryParamsSerializer(Serializer):
     boundary = CharField(required=False)
 
 
+class FacilityExportQueryParamsSerializer(FacilityQueryParamsSerializer):
+    file_format = ChoiceField(
+        choices=(FacilityExportFormats.CSV, FacilityExportFormats.GEOJSON),
+        required=False,
+        default=FacilityExportFormats.CSV,
+    )
+
+
+class FacilitySummariesQueryParamsSerializer(Serializer):
+    MAX_IDS = 100
+
+    ids = CharField(required=True)
+
+    def validate_ids(self, ids):
+        id_list = [i.strip() for i in ids.split(',') if i.strip()]
+        if len(id_list) == 0:
+            raise ValidationError('At least one facility ID is required.')
+        if len(id_list) > self.MAX_IDS:
+            raise ValidationError(
+                'No more than {} facility IDs may be requested.'.format(
+                    self.MAX_IDS))
+        return id_list
+
+
 class FacilityListQueryParamsSerializer(Serializer):
     contributor = IntegerField(required=False)
 
@@ -435,7 +394,7 @@ class FacilitySerializer(GeoFeatureModelSerializer):
         def format_source(source):
             if type(source) is Source:
                 return {
-                    'id': source.contributor.admin.id
+                    'id': source.contributor.admin_id
                     if source.contributor else None,
                     'name': source.display_name,
                     'is_verified': source.contributor.is_verified
@@ -444,14 +403,33 @@ class FacilitySerializer(GeoFeatureModelSerializer):
             return {
                 'name': source,
             }
+
+        return [format_source(source) for source in self._sources(facility)]
+
+    def _user(self):
         request = self.context.get('request') \
             if self.context is not None else None
-        user = request.user if request is not None else None
-        return [
-            format_source(source)
-            for source
-            in facility.sources(user=user)
-        ]
+        return request.user if request is not None else None
+
+    def _sources(self, facility):
+        # List views load the sources for a whole page of facilities at once
+        # with `Facility.sources_for_facilities` and pass them in the context.
+        sources_by_facility = self.context.get('sources_by_facility') \
+            if self.context is not None else None
+        if sources_by_facility is not None:
+            return sources_by_facility.get(facility.id, [])
+        return facility.sources(user=self._user())
+
+
+class FacilitySummarySerializer(ModelSerializer):
+    country_name = SerializerMethodField()
+
+    class Meta:
+        model = Facility
+        fields = ('id', 'name', 'address', 'country_code', 'country_name')
+
+    def get_country_name(self, facility):
+        return COUNTRY_NAMES.get(facility.country_code, '')
 
 
 class FacilityDetailsSerializer(FacilitySerializer):
@@ -468,54 +446,129 @@ class FacilityDetailsSerializer(FacilitySerializer):
                   'country_name', 'claim_info', 'other_locations')
         geo_field = 'location'
 
+    def _matches(self, facility):
+        """
+        Load every match to the facility along with its list item, source,
+        list, and contributor in one query. All of the derived fields are
+        computed from this list, which is loaded once per facility by each
+        serializer instance unless the matches for a batch of facilities are
+        passed in the `matches_by_facility` context.
+        """
+        matches_by_facility = self.context.get('matches_by_facility') \
+            if self.context is not None else None
+        if matches_by_facility is not None:
+            return matches_by_facility.get(facility.id, [])
+        if not hasattr(self, '_loaded_matches'):
+            self._loaded_matches = {}
+        if facility.id not in self._loaded_matches:
+            self._loaded_matches[facility.id] = list(
+                FacilityMatch
+                .objects
+                .filter(facility=facility)
+                .select_related('facility_list_item__source__contributor',
+                                'facility_list_item__source__facility_list')
+                .order_by('id'))
+        return self._loaded_matches[facility.id]
+
+    def _public_items(self, facility, statuses):
+        return [
+            m.facility_list_item
+            for m in self._matches(facility)
+            if m.status in statuses
+            and m.is_active
+            and m.facility_list_item.source.is_active
+            and m.facility_list_item.source.is_public
+        ]
+
+    def _sources(self, facility):
+        return Facility.sources_from_matches(
+            [m for m in self._matches(facility)
+             if m.status in [FacilityMatch.AUTOMATIC,
+                             FacilityMatch.CONFIRMED,
+                             FacilityMatch.MERGED]
+             and m.facility_list_item.source.contributor is not None],
+            Facility.user_can_see_contributor_details(self._user()))
+
     def get_other_names(self, facility):
-        return facility.other_names()
+        return {
+            item.name
+            for item
+            in self._public_items(facility, [FacilityMatch.AUTOMATIC,
+                                             FacilityMatch.CONFIRMED,
+                                             FacilityMatch.MERGED])
+            if item.name
+            and item.name != facility.name
+        }
 
     def get_other_addresses(self, facility):
-        return facility.other_addresses()
+        return {
+            item.address
+            for item
+            in self._public_items(facility, [FacilityMatch.AUTOMATIC,
+                                             FacilityMatch.CONFIRMED,
+                                             FacilityMatch.MERGED])
+            if item.address
+            and item.address != facility.address
+        }
 
     def get_other_locations(self, facility):
         facility_locations = [
             {
                 'lat': l.location.y,
                 'lng': l.location.x,
-                'contributor_id': l.contributor.admin.id if l.contributor
+                'contributor_id': l.contributor.admin_id if l.contributor
                 else None,
                 'contributor_name': l.contributor.name if l.contributor
                 else None,
                 'notes': l.notes,
             }
             for l
-            in FacilityLocation.objects.filter(facility=facility)
+            in self._locations(facility)
         ]
 
         facility_matches = [
             {
-                'lat': l.facility_list_item.geocoded_point.y,
-                'lng': l.facility_list_item.geocoded_point.x,
-                'contributor_id':
-                l.facility_list_item.source.contributor.admin.id
-                if l.facility_list_item.source.contributor else None,
-                'contributor_name':
-                l.facility_list_item.source.contributor.name
-                if l.facility_list_item.source.contributor else None,
+                'lat': item.geocoded_point.y,
+                'lng': item.geocoded_point.x,
+                'contributor_id': item.source.contributor.admin_id
+                if item.source.contributor else None,
+                'contributor_name': item.source.contributor.name
+                if item.source.contributor else None,
                 'notes': None,
             }
-            for l
-            in FacilityMatch.objects.filter(facility=facility)
-            .filter(status__in=[
-                FacilityMatch.CONFIRMED,
-                FacilityMatch.AUTOMATIC,
-            ])
-            .filter(is_active=True)
-            if l.facility_list_item.geocoded_point != facility.location
-            if l.facility_list_item.geocoded_point is not None
-            if l.facility_list_item.source.is_active
-            if l.facility_list_item.source.is_public
+            for item
+            in self._public_items(facility, [FacilityMatch.CONFIRMED,
+                                             FacilityMatch.AUTOMATIC])
+            if item.geocoded_point != facility.location
+            if item.geocoded_point is not None
         ]
 
         return facility_locations + facility_matches
 
+    def _locations(self, facility):
+        locations_by_facility = self.context.get('locations_by_facility') \
+            if self.context is not None else None
+        if locations_by_facility is not None:
+            return locations_by_facility.get(facility.id, [])
+        return FacilityLocation \
+            .objects \
+            .filter(facility=facility) \
+            .select_related('contributor')
+
+    def _approved_claim(self, facility):
+        claims_by_facility = self.context.get('approved_claims_by_facility') \
+            if self.context is not None else None
+        if claims_by_facility is not None:
+            return claims_by_facility.get(facility.id)
+        try:
+            return FacilityClaim \
+                .objects \
+                .filter(status=FacilityClaim.APPROVED) \
+                .select_related('parent_company') \
+                .get(facility=facility)
+        except FacilityClaim.DoesNotExist:
+            return None
+
     def get_country_name(self, facility):
         return COUNTRY_NAMES.get(facility.country_code, '')
 
@@ -523,51 +576,47 @@ class FacilityDetailsSerializer(FacilitySerializer):
         if not switch_is_active('claim_a_facility'):
             return None
 
-        try:
-            claim = FacilityClaim \
-                .objects \
-                .filter(status=FacilityClaim.APPROVED) \
-                .get(facility=facility)
-
-            return {
-                'id': claim.id,
-                'facility': {
-                    'description': claim.facility_description,
-                    'name_english': claim.facility_name_english,
-                    'name_native_language': claim
-                    .facility_name_native_language,
-                    'address': claim.facility_address,
-                    'website': claim.facility_website
-                    if claim.facility_website_publicly_visible else None,
-                    'parent_company': _get_parent_company(claim),
-                    'phone_number': claim.facility_phone_number
-                    if claim.facility_phone_number_publicly_visible else None,
-                    'minimum_order': claim.facility_minimum_order_quantity,
-                    'average_lead_time': claim.facility_average_lead_time,
-                    'workers_count': claim.facility_workers_count,
-                    'female_workers_percentage': claim
-                    .facility_female_workers_percentage,
-                    'facility_type': claim.facility_type,
-                    'other_facility_type': claim.other_facility_type,
-                    'affiliations': claim.facility_affiliations,
-                    'certifications': claim.facility_certifications,
-                    'product_types': claim.facility_product_types,
-                    'production_types': claim.facility_production_types,
-                },
-                'contact': {
-                    'name': claim.point_of_contact_person_name,
-                    'email': claim.point_of_contact_email,
-                } if claim.point_of_contact_publicly_visible else None,
-                'office': {
-                    'name': claim.office_official_name,
-                    'address': claim.office_address,
-                    'country': claim.office_country_code,
-                    'phone_number': claim.office_phone_number,
-                } if claim.office_info_publicly_visible else None,
-            }
-        except FacilityClaim.DoesNotExist:
+        claim = self._approved_claim(facility)
+        if claim is None:
             return None
 
+        return {
+            'id': claim.id,
+            'facility': {
+                'description': claim.facility_description,
+                'name_english': claim.facility_name_english,
+                'name_native_language': claim
+                .facility_name_native_language,
+                'address': claim.facility_address,
+                'website': claim.facility_website
+                if claim.facility_website_publicly_visible else None,
+                'parent_company': _get_parent_company(claim),
+                'phone_number': claim.facility_phone_number
+                if claim.facility_phone_number_publicly_visible else None,
+                'minimum_order': claim.facility_minimum_order_quantity,
+                'average_lead_time': claim.facility_average_lead_time,
+                'workers_count': claim.facility_workers_count,
+                'female_workers_percentage': claim
+                .facility_female_workers_percentage,
+                'facility_type': claim.facility_type,
+                'other_facility_type': claim.other_facility_type,
+                'affiliations': claim.facility_affiliations,
+                'certifications': claim.facility_certifications,
+                'product_types': claim.facility_product_types,
+                'production_types': claim.facility_production_types,
+            },
+            'contact': {
+                'name': claim.point_of_contact_person_name,
+                'email': claim.point_of_contact_email,
+            } if claim.point_of_contact_publicly_visible else None,
+            'office': {
+                'name': claim.office_official_name,
+                'address': claim.office_address,
+                'country': claim.office_country_code,
+                'phone_number': claim.office_phone_number,
+            } if claim.office_info_publicly_visible else None,
+        }
+
 
 class FacilityCreateBodySerializer(Serializer):
     country = CharField(required=True)
@@ -840,10 +889,18 @@ class FacilityListItemSerializer(ModelSerializer):
                    'geocoded_address', 'processing_results', 'facility')
 
     def get_matches(self, facility_list_item):
-        return FacilityMatchSerializer(
-            facility_list_item.facilitymatch_set.order_by('id'),
-            many=True,
-        ).data
+        # The matches for a page of items can be loaded with one query and
+        # passed in the `matches_by_item` context
+        matches_by_item = self.context.get('matches_by_item') \
+            if self.context is not None else None
+        if matches_by_item is not None:
+            matches = matches_by_item.get(facility_list_item.id, [])
+        else:
+            matches = facility_list_item \
+                .facilitymatch_set \
+                .select_related('facility') \
+                .order_by('id')
+        return FacilityMatchSerializer(matches, many=True).data
 
     def get_country_name(self, facility_list_item):
         return COUNTRY_NAMES.get(facility_list_item.country_code, '')
@@ -873,7 +930,7 @@ class FacilityListItemSerializer(ModelSerializer):
             "oar_id": facility_list_item.facility.id,
             "address": facility_list_item.facility.address,
             "name": facility_list_item.facility.name,
-            "created_from_id": facility_list_item.facility.created_from.id,
+            "created_from_id": facility_list_item.facility.created_from_id,
             "location": {
                 "lat": lat,
                 "lng": lng,
@@ -944,6 +1001,49 @@ class FacilityMergeQueryParamsSerializer(Serializer):
                 'Facility {} does not exist.'.format(merge_id))
 
 
+class FacilityMergeGroupSerializer(Serializer):
+    target = CharField(required=True)
+    merge = ListField(child=CharField(), allow_empty=False)
+
+    def validate(self, data):
+        if data['target'] in data['merge']:
+            raise ValidationError(
+                'Facility {} cannot be merged into itself.'.format(
+                    data['target']))
+        return data
+
+
+class FacilityBatchMergeSerializer(Serializer):
+    groups = FacilityMergeGroupSerializer(many=True, allow_empty=False)
+
+
+class FacilityMatchDecisionSerializer(Serializer):
+    id = IntegerField(required=True)
+    decision = ChoiceField(
+        choices=(FacilityMatchDecisions.CONFIRM,
+                 FacilityMatchDecisions.REJECT),
+        required=True,
+    )
+
+
+class FacilityMatchBulkDecisionSerializer(Serializer):
+    decisions = FacilityMatchDecisionSerializer(many=True, allow_empty=False)
+
+    def validate_decisions(self, decisions):
+        seen_ids = set()
+        duplicate_ids = set()
+        for decision in decisions:
+            if decision['id'] in seen_ids:
+                duplicate_ids.add(decision['id'])
+            seen_ids.add(decision['id'])
+        if len(duplicate_ids) > 0:
+            raise ValidationError(
+                'Each match may only be included once. Duplicated match '
+                'IDs: {}'.format(
+                    ', '.join(str(i) for i in sorted(duplicate_ids))))
+        return decisions
+
+
 class LogDownloadQueryParamsSerializer(Serializer):
     path = CharField(required=True)
     record_count = IntegerField(required=True)
@@ -0,0 +1,215 @@
+from django.db.models.signals import (post_delete,
+                                      post_init,
+                                      post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+from simple_history.signals import post_create_historical_record
+
+from api.cache_invalidation import (invalidate_contributor_lookups,
+                                    invalidate_facility_caches)
+from api.facility_history import (make_facility_claim_event,
+                                  make_facility_event,
+                                  make_facility_match_event)
+from api.models import (Contributor,
+                        Facility,
+                        FacilityClaim,
+                        FacilityContributor,
+                        FacilityCount,
+                        FacilityList,
+                        FacilityListItem,
+                        FacilityListItemStatusCount,
+                        FacilityLocation,
+                        FacilityMatch,
+                        Source)
+
+
+@receiver(post_save, sender=Facility)
+@receiver(post_delete, sender=Facility)
+@receiver(post_save, sender=FacilityMatch)
+@receiver(post_delete, sender=FacilityMatch)
+@receiver(post_save, sender=Source)
+@receiver(post_delete, sender=Source)
+@receiver(post_save, sender=Contributor)
+@receiver(post_delete, sender=Contributor)
+def facility_filter_data_changed(sender, **kwargs):
+    invalidate_facility_caches()
+
+
+@receiver(post_save, sender=FacilityList)
+@receiver(post_save, sender=FacilityClaim)
+@receiver(post_delete, sender=FacilityClaim)
+@receiver(post_save, sender=FacilityLocation)
+@receiver(post_delete, sender=FacilityLocation)
+def facility_details_changed(sender, **kwargs):
+    # List names, claims, and other locations are not used by filters, but
+    # they are rendered in the cached facility details.
+    invalidate_facility_caches()
+
+
+@receiver(post_save, sender=FacilityListItem)
+@receiver(post_delete, sender=FacilityListItem)
+def facility_list_item_changed(sender, instance, **kwargs):
+    # List items are saved many times while they are parsed and geocoded,
+    # but they only affect facility search results once they are matched.
+    if instance.facility_id is not None:
+        invalidate_facility_caches()
+
+
+@receiver(post_init, sender=FacilityMatch)
+def facility_match_loaded(sender, instance, **kwargs):
+    # Remember the facility so that both the old and new facility can be
+    # refreshed if a match is moved by a merge or split.
+    instance._loaded_facility_id = instance.__dict__.get('facility_id')
+
+
+@receiver(post_save, sender=FacilityMatch)
+@receiver(post_delete, sender=FacilityMatch)
+def facility_match_changed(sender, instance, **kwargs):
+    facility_ids = [instance.facility_id, instance._loaded_facility_id]
+    FacilityContributor.objects.refresh_on_commit(facility_ids)
+    instance._loaded_facility_id = instance.facility_id
+
+
+@receiver(post_save, sender=Source)
+def source_changed(sender, instance, created, **kwargs):
+    if not created:
+        FacilityContributor.objects.refresh_for_sources([instance.id])
+
+
+@receiver(post_save, sender=Contributor)
+def contributor_changed(sender, instance, created, **kwargs):
+    if not created:
+        FacilityContributor \
+            .objects \
+            .filter(contributor=instance) \
+            .exclude(contrib_type=instance.contrib_type) \
+            .update(contrib_type=instance.contrib_type)
+
+
+@receiver(post_init, sender=Facility)
+def facility_loaded(sender, instance, **kwargs):
+    instance._loaded_country_code = instance.__dict__.get('country_code')
+
+
+@receiver(post_save, sender=Facility)
+def count_saved_facility(sender, instance, created, **kwargs):
+    old_country = instance._loaded_country_code
+    new_country = instance.country_code
+    if created:
+        FacilityCount.objects.add({
+            FacilityCount.TOTAL: 1,
+            FacilityCount.country_name(new_country): 1,
+        })
+    elif old_country is not None and old_country != new_country:
+        FacilityCount.objects.add({
+            FacilityCount.country_name(old_country): -1,
+            FacilityCount.country_name(new_country): 1,
+        })
+    instance._loaded_country_code = new_country
+
+
+@receiver(pre_delete, sender=Facility)
+def clear_deleted_facility_contributors(sender, instance, **kwargs):
+    # Deleting the rows before they are removed by the cascade lets the
+    # contributor counts be adjusted.
+    FacilityContributor.objects.refresh([instance.id], rebuild=False)
+
+
+@receiver(post_delete, sender=Facility)
+def count_deleted_facility(sender, instance, **kwargs):
+    deltas = {FacilityCount.TOTAL: -1}
+    if instance._loaded_country_code is not None:
+        deltas[FacilityCount.country_name(
+            instance._loaded_country_code)] = -1
+    FacilityCount.objects.add(deltas)
+
+
+@receiver(post_delete, sender=Contributor)
+def delete_contributor_count(sender, instance, **kwargs):
+    FacilityCount \
+        .objects \
+        .filter(name=FacilityCount.contributor_name(instance.id)) \
+        .delete()
+
+
+@receiver(post_save, sender=Source)
+@receiver(post_delete, sender=Source)
+@receiver(post_save, sender=Contributor)
+@receiver(post_delete, sender=Contributor)
+def contributor_lookup_data_changed(sender, **kwargs):
+    invalidate_contributor_lookups()
+
+
+@receiver(post_init, sender=FacilityListItem)
+def facility_list_item_loaded(sender, instance, **kwargs):
+    instance._loaded_source_id = instance.__dict__.get('source_id')
+    instance._loaded_status = instance.__dict__.get('status')
+
+
+# This receiver must be connected before `facility_list_item_status_changed`,
+# which records the saved status as loaded.
+@receiver(post_save, sender=FacilityListItem)
+def count_saved_facility_list_item(sender, instance, created, **kwargs):
+    old_key = (instance._loaded_source_id, instance._loaded_status)
+    new_key = (instance.source_id, instance.status)
+    if created:
+        FacilityListItemStatusCount.objects.add({new_key: 1})
+    elif None not in old_key and old_key != new_key:
+        FacilityListItemStatusCount.objects.add({old_key: -1, new_key: 1})
+
+
+@receiver(post_delete, sender=FacilityListItem)
+def count_deleted_facility_list_item(sender, instance, **kwargs):
+    key = (instance._loaded_source_id, instance._loaded_status)
+    if None not in key:
+        FacilityListItemStatusCount.objects.add({key: -1})
+
+
+@receiver(post_delete, sender=Source)
+def delete_source_status_counts(sender, instance, **kwargs):
+    # The items of a deleted source may be deleted after its counts, which
+    # recreates the counts when the deleted items are subtracted.
+    FacilityListItemStatusCount \
+        .objects \
+        .filter(source_id=instance.id) \
+        .delete()
+
+
+@receiver(post_save, sender=FacilityListItem)
+def facility_list_item_status_changed(sender, instance, created, **kwargs):
+    # Contributors are listed once their sources have completed items, so
+    # only changes into or out of a complete status affect the lookups.
+    was_complete = not created \
+        and instance._loaded_status in FacilityListItem.COMPLETE_STATUSES
+    is_complete = instance.status in FacilityListItem.COMPLETE_STATUSES
+    if was_complete != is_complete:
+        invalidate_contributor_lookups()
+    instance._loaded_source_id = instance.source_id
+    instance._loaded_status = instance.status
+
+
+@receiver(post_delete, sender=FacilityListItem)
+def facility_list_item_deleted(sender, instance, **kwargs):
+    if instance._loaded_status in FacilityListItem.COMPLETE_STATUSES:
+        invalidate_contributor_lookups()
+
+
+@receiver(post_create_historical_record, sender=Facility.history.model)
+def record_facility_event(sender, history_instance, **kwargs):
+    make_facility_event(history_instance,
+                        history_instance.prev_record).save()
+
+
+@receiver(post_create_historical_record, sender=FacilityMatch.history.model)
+def record_facility_match_event(sender, history_instance, **kwargs):
+    event = make_facility_match_event(history_instance)
+    if event is not None:
+        event.save()
+
+
+@receiver(post_create_historical_record, sender=FacilityClaim.history.model)
+def record_facility_claim_event(sender, history_instance, **kwargs):
+    event = make_facility_claim_event(history_instance,
+                                      history_instance.prev_record)
+    if event is not None:
+        event.save()
@@ -1,10 +1,21 @@
+import csv
+import gzip
 import json
 import os
+import tempfile
+import pyarrow.parquet
 import xlrd
+from io import StringIO
+from unittest.mock import patch
 
 from django.core import mail
+from django.core.management import call_command
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.http import QueryDict
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib import auth
 from django.conf import settings
@@ -19,11 +30,15 @@ from waffle.testutils import override_switch, override_flag
 from api.constants import (ProcessingAction,
                            LogDownloadQueryParams,
                            UpdateLocationParams,
-                           FeatureGroups)
+                           FeatureGroups,
+                           FacilityHistoryActions)
 from api.models import (Facility, FacilityList, FacilityListItem,
                         FacilityClaim, FacilityClaimReviewNote,
                         FacilityMatch, FacilityAlias, Contributor, User,
-                        RequestLog, DownloadLog, FacilityLocation, Source)
+                        RequestLog, DownloadLog, FacilityLocation, Source,
+                        FacilityContributor, FacilityCount, FacilityEvent,
+                        FacilityDuplicateRun, FacilityDuplicateCluster,
+                        FacilityListItemStatusCount)
 from api.oar_id import make_oar_id, validate_oar_id
 from api.matching import match_facility_list_items
 from api.processing import (parse_facility_list_item,
@@ -36,7 +51,21 @@ from api.test_data import parsed_city_hall_data
 from api.permissions import referring_host_is_allowed, referring_host
 from api.serializers import (ApprovedFacilityClaimSerializer,
                              FacilityCreateBodySerializer,
+                             FacilityDetailsSerializer,
                              FacilityListSerializer)
+from api.exports import iter_facility_details_batches
+from api.management.commands.snapshot_facilities import (MANIFEST_FILE_NAME,
+                                                         SNAPSHOT_COLUMNS)
+from api.facility_history import iter_facility_events_from_history
+from api.facility_merge import merge_facilities
+from api.duplicates import save_country_clusters
+from api.list_replacement import get_items_to_process
+from api.cache_invalidation import FacilityCacheGeneration
+from api.tile_metrics import TileMetrics, get_filter_shape
+from api.filter_cache import (normalize_filter_params,
+                              get_filtered_facility_keys,
+                              get_filtered_facilities,
+                              FacilityCountCache)
 
 
 class FacilityListCreateTest(APITestCase):
@@ -3719,6 +3748,37 @@ class FacilityAPITestCaseBase(APITestCase):
         self.list_item.facility = self.facility
         self.list_item.save()
 
+    def create_facility(self, index, name=None, location=None, source=None):
+        if location is None:
+            location = Point(0, 0)
+
+        list_item = FacilityListItem \
+            .objects \
+            .create(name='Item {}'.format(index),
+                    address='Address',
+                    country_code='US',
+                    row_index=index,
+                    geocoded_point=location,
+                    status=FacilityListItem.CONFIRMED_MATCH,
+                    source=source or self.source)
+        facility = Facility \
+            .objects \
+            .create(name=name or 'Name {}'.format(index),
+                    address='Address',
+                    country_code='US',
+                    location=location,
+                    created_from=list_item)
+        FacilityMatch \
+            .objects \
+            .create(status=FacilityMatch.AUTOMATIC,
+                    facility=facility,
+                    facility_list_item=list_item,
+                    confidence=0.85,
+                    results='')
+        list_item.facility = facility
+        list_item.save()
+        return facility
+
 
 class UpdateLocationTest(FacilityAPITestCaseBase):
     def setUp(self):
@@ -5498,3 +5558,1575 @@ class ContributorTypesTest(FacilityAPITestCaseBase):
         self.list_item.status = FacilityListItem.GEOCODED
         self.list_item.save()
         self.fetch_and_assert_all_counts_are_zero()
+
+
+class TileMetricsTest(FacilityAPITestCaseBase):
+    def setUp(self):
+        super(TileMetricsTest, self).setUp()
+        TileMetrics.reset()
+        self.tile_path = reverse('tile', kwargs={
+            'layer': 'facilities',
+            'cachekey': '1567700347-1-95f951f7',
+            'z': 1, 'x': 0, 'y': 0,
+            'ext': 'pbf',
+        })
+
+    def test_filter_shape(self):
+        self.assertEqual('none', get_filter_shape({}))
+        self.assertEqual(
+            'contributors:2,countries:1',
+            get_filter_shape({'contributors': [1, 2], 'countries': 'US'}))
+
+    @override_settings(ALLOWED_HOSTS=['testserver', '.allowed.org'])
+    @override_switch('vector_tile', active=True)
+    def test_tile_request_is_recorded(self):
+        response = self.client.get(self.tile_path, {'countries': 'US'},
+                                   HTTP_REFERER='http://allowed.org/')
+        self.assertEqual(200, response.status_code)
+
+        summary = TileMetrics.summary()
+        self.assertEqual(1, len(summary))
+        self.assertEqual('facilities', summary[0]['layer'])
+        self.assertEqual(1, summary[0]['zoom'])
+        self.assertEqual('countries:1', summary[0]['filter_shape'])
+        self.assertEqual(1, summary[0]['count'])
+        self.assertEqual(1, summary[0]['max_features'])
+
+    def test_metrics_require_superuser(self):
+        self.client.login(email=self.user_email,
+                          password=self.user_password)
+        response = self.client.get(reverse('tile_metrics'))
+        self.assertEqual(403, response.status_code)
+
+    def test_superuser_can_fetch_and_reset_metrics(self):
+        TileMetrics.record('facilitygrid', 4, 'none', 30, 2048, 12)
+        self.client.login(email=self.superuser_email,
+                          password=self.superuser_password)
+        response = self.client.get(reverse('tile_metrics'))
+        self.assertEqual(200, response.status_code)
+        data = json.loads(response.content)
+        self.assertEqual(1, len(data))
+        self.assertEqual({'50': 1}, data[0]['query_time_ms_histogram'])
+        self.assertEqual({'10240': 1}, data[0]['bytes_histogram'])
+
+        response = self.client.delete(reverse('tile_metrics'))
+        self.assertEqual(204, response.status_code)
+        self.assertEqual([], TileMetrics.summary())
+
+
+class FacilityClustersTileTest(FacilityAPITestCaseBase):
+    def setUp(self):
+        super(FacilityClustersTileTest, self).setUp()
+        TileMetrics.reset()
+        # Points on a tile edge are not included in the tile, and (0, 0) is
+        # on the corner of a tile at every zoom.
+        self.facility.location = Point(0.01, 0.01)
+        self.facility.save()
+
+    def get_tile(self, layer, params={}):
+        tile_path = reverse('tile', kwargs={
+            'layer': layer,
+            'cachekey': '1567700347-1-95f951f7',
+            'z': 12, 'x': 2048, 'y': 2047,
+            'ext': 'pbf',
+        })
+        return self.client.get(tile_path, params,
+                               HTTP_REFERER='http://allowed.org/')
+
+    @override_settings(ALLOWED_HOSTS=['testserver', '.allowed.org'])
+    @override_switch('vector_tile', active=True)
+    def test_clusters_layer(self):
+        response = self.get_tile('facilityclusters')
+        self.assertEqual(200, response.status_code)
+        summary = TileMetrics.summary()
+        self.assertEqual('facilityclusters', summary[0]['layer'])
+        self.assertEqual(1, summary[0]['max_features'])
+
+    @override_settings(ALLOWED_HOSTS=['testserver', '.allowed.org'])
+    @override_switch('vector_tile', active=True)
+    def test_clusters_layer_is_filtered(self):
+        response = self.get_tile('facilityclusters', {'countries': 'CN'})
+        self.assertEqual(200, response.status_code)
+        summary = TileMetrics.summary()
+        self.assertEqual(0, summary[0]['max_features'])
+
+    @override_settings(ALLOWED_HOSTS=['testserver', '.allowed.org'])
+    @override_switch('vector_tile', active=True)
+    def test_invalid_layer(self):
+        response = self.get_tile('facilitypolygons')
+        self.assertEqual(400, response.status_code)
+
+
+class FacilitySummariesTest(FacilityAPITestCaseBase):
+    def setUp(self):
+        super(FacilitySummariesTest, self).setUp()
+        self.list_item_two = FacilityListItem \
+            .objects \
+            .create(name='Item Two',
+                    address='Address Two',
+                    country_code='CN',
+                    row_index=2,
+                    geocoded_point=Point(1, 1),
+                    status=FacilityListItem.CONFIRMED_MATCH,
+                    source=self.source)
+
+        self.facility_two = Facility \
+            .objects \
+            .create(name='Name Two',
+                    address='Address Two',
+                    country_code='CN',
+                    location=Point(1, 1),
+                    created_from=self.list_item_two)
+
+    def get_summaries(self, ids):
+        return self.client.get(reverse('facility-summaries'), {'ids': ids})
+
+    def test_summaries_are_returned_in_requested_order(self):
+        response = self.get_summaries('{},{}'.format(
+            self.facility_two.id, self.facility.id))
+        self.assertEqual(200, response.status_code)
+        data = json.loads(response.content)
+        self.assertEqual([self.facility_two.id, self.facility.id],
+                         [f['id'] for f in data])
+        self.assertEqual('Name Two', data[0]['name'])
+        self.assertEqual('China', data[0]['country_name'])
+
+    def test_unknown_ids_are_skipped(self):
+        response = self.get_summaries('{},MISSING'.format(self.facility.id))
+        self.assertEqual(200, response.status_code)
+        data = json.loads(response.content)
+        self.assertEqual([self.facility.id], [f['id'] for f in data])
+
+    def test_ids_are_required(self):
+        response = self.client.get(reverse('facility-summaries'))
+        self.assertEqual(400, response.status_code)
+
+        response = self.get_summaries(',')
+        self.assertEqual(400, response.status_code)
+
+    def test_too_many_ids(self):
+        response = self.get_summaries(','.join(
+            [self.facility.id] * 101))
+        self.assertEqual(400, response.status_code)
+
+    @override_settings(ALLOWED_HOSTS=['testserver', '.allowed.org'])
+    @override_switch('vector_tile', active=True)
+    def test_points_layer(self):
+        TileMetrics.reset()
+        tile_path = reverse('tile', kwargs={
+            'layer': 'facilitypoints',
+            'cachekey': '1567700347-1-95f951f7',
+            'z': 1, 'x': 0, 'y': 0,
+            'ext': 'pbf',
+        })
+        response = self.client.get(tile_path, {},
+                                   HTTP_REFERER='http://allowed.org/')
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(2, TileMetrics.summary()[0]['max_features'])
+
+
+class FilterCacheTest(FacilityAPITestCaseBase):
+    def test_normalize_filter_params(self):
+        self.assertEqual(
+            normalize_filter_params(QueryDict(
+                'countries=US&contributors=2&contributors=1&page=2')),
+            normalize_filter_params(QueryDict(
+                'contributors=1&countries=US&contributors=2'
+                '&combine_contributors=')))
+        self.assertEqual({}, normalize_filter_params(QueryDict(
+            'combine_contributors=AND')))
+
+    def test_cheap_filters_are_not_cached(self):
+        self.assertIsNone(
+            get_filtered_facility_keys(QueryDict('countries=US')))
+
+    def test_keys_are_cached(self):
+        params = QueryDict('contributors={}'.format(self.contributor.id))
+        self.assertEqual([self.list_item.id],
+                         list(get_filtered_facility_keys(params)))
+        # Only the tile cache key is read
+        with self.assertNumQueries(2):
+            get_filtered_facility_keys(params)
+        self.assertEqual([self.facility.id],
+                         [f.id for f in get_filtered_facilities(params)])
+
+    def test_cache_is_invalidated_by_changes(self):
+        params = QueryDict('contributors={}'.format(self.contributor.id))
+        self.assertEqual(1, len(get_filtered_facility_keys(params)))
+
+        self.source.is_active = False
+        self.source.save()
+        self.assertEqual(0, len(get_filtered_facility_keys(params)))
+        self.assertEqual(0, get_filtered_facilities(params).count())
+
+    @patch('api.filter_cache.FILTER_CACHE_MAX_IDS', 1)
+    def test_filters_matching_too_many_facilities_are_evaluated(self):
+        facility = self.create_facility(2)
+        params = QueryDict('contributors={}'.format(self.contributor.id))
+        self.assertIsNone(get_filtered_facility_keys(params))
+        # The keys are not read again
+        with self.assertNumQueries(2):
+            self.assertIsNone(get_filtered_facility_keys(params))
+        self.assertEqual(
+            sorted([self.facility.id, facility.id]),
+            sorted(f.id for f in get_filtered_facilities(params)))
+
+    def test_count_uses_filters(self):
+        response = self.client.get(
+            reverse('facility-count'),
+            {'contributors': self.contributor.id})
+        self.assertEqual(1, json.loads(response.content)['count'])
+
+        response = self.client.get(reverse('facility-count'),
+                                   {'countries': 'CN'})
+        self.assertEqual(0, json.loads(response.content)['count'])
+
+
+class FacilityContributorTest(FacilityAPITestCaseBase):
+    def get_rows(self):
+        return list(FacilityContributor
+                    .objects
+                    .values_list('facility_id', 'contributor_id',
+                                 'contrib_type', 'is_public', 'is_active'))
+
+    def test_row_is_created_for_match(self):
+        self.assertEqual(
+            [(self.facility.id, self.contributor.id,
+              Contributor.OTHER_CONTRIB_TYPE, True, True)],
+            self.get_rows())
+
+    def test_inactive_and_pending_matches_are_excluded(self):
+        self.match.is_active = False
+        self.match.save()
+        self.assertEqual([], self.get_rows())
+
+        self.match.is_active = True
+        self.match.status = FacilityMatch.PENDING
+        self.match.save()
+        self.assertEqual([], self.get_rows())
+
+    def test_source_changes_are_copied(self):
+        self.source.is_public = False
+        self.source.save()
+        self.assertEqual(
+            [(self.facility.id, self.contributor.id,
+              Contributor.OTHER_CONTRIB_TYPE, False, True)],
+            self.get_rows())
+
+    def test_contributor_type_changes_are_copied(self):
+        self.contributor.contrib_type = 'Union'
+        self.contributor.save()
+        self.assertEqual(
+            [(self.facility.id, self.contributor.id, 'Union', True, True)],
+            self.get_rows())
+
+    def test_moved_match_refreshes_both_facilities(self):
+        list_item_two = FacilityListItem \
+            .objects \
+            .create(name='Item Two',
+                    address='Address Two',
+                    country_code='US',
+                    row_index=2,
+                    geocoded_point=Point(1, 1),
+                    status=FacilityListItem.CONFIRMED_MATCH,
+                    source=self.source)
+        facility_two = Facility \
+            .objects \
+            .create(name='Name Two',
+                    address='Address Two',
+                    country_code='US',
+                    location=Point(1, 1),
+                    created_from=list_item_two)
+
+        match = FacilityMatch.objects.get(pk=self.match.pk)
+        match.facility = facility_two
+        match.save()
+        self.assertEqual(
+            [(facility_two.id, self.contributor.id,
+              Contributor.OTHER_CONTRIB_TYPE, True, True)],
+            self.get_rows())
+
+    def test_refreshes_are_deferred_until_read(self):
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(3):
+                self.match.save()
+        self.assertEqual(0, len([q for q in queries
+                                 if 'api_facilitycontributor' in q['sql']]))
+
+        with CaptureQueriesContext(connection) as queries:
+            rows = self.get_rows()
+        self.assertEqual(
+            [(self.facility.id, self.contributor.id,
+              Contributor.OTHER_CONTRIB_TYPE, True, True)],
+            rows)
+        self.assertEqual(1, len([q for q in queries
+                                 if 'DELETE FROM api_facilitycontributor'
+                                 in q['sql']]))
+
+
+class FacilityTextSearchTest(FacilityAPITestCaseBase):
+    def setUp(self):
+        super(FacilityTextSearchTest, self).setUp()
+        self.facility.name = 'Alpha Beta Garment Factory'
+        self.facility.save()
+
+        self.list_item_two = FacilityListItem \
+            .objects \
+            .create(name='Garment Factory',
+                    address='Address Two',
+                    country_code='US',
+                    row_index=2,
+                    geocoded_point=Point(1, 1),
+                    status=FacilityListItem.CONFIRMED_MATCH,
+                    source=self.source)
+
+        self.facility_two = Facility \
+            .objects \
+            .create(name='Garment Factory',
+                    address='Address Two',
+                    country_code='US',
+                    location=Point(1, 1),
+                    created_from=self.list_item_two)
+
+    def search(self, q):
+        response = self.client.get(reverse('facility-list'), {'q': q})
+        return [f['id'] for f in json.loads(response.content)['features']]
+
+    def test_results_are_ranked_by_similarity(self):
+        self.assertEqual([self.facility_two.id, self.facility.id],
+                         self.search('garment factory'))
+
+    def test_search_by_id(self):
+        self.assertEqual([self.facility_two.id],
+                         self.search(self.facility_two.id.lower()))
+
+    def test_other_names_are_searched_when_switch_is_active(self):
+        self.assertEqual([], self.search('Item'))
+
+        with override_switch('search_other_names', active=True):
+            self.assertEqual([self.facility.id], self.search('Item'))
+
+
+class FacilityListContributorsTest(FacilityAPITestCaseBase):
+    def count_list_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('facility-list'))
+        self.assertEqual(200, response.status_code)
+        return len(queries), json.loads(response.content)
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        query_count, data = self.count_list_queries()
+        self.assertEqual(1, len(data['features']))
+
+        for index in range(2, 6):
+            self.create_facility(index)
+
+        new_query_count, data = self.count_list_queries()
+        self.assertEqual(5, len(data['features']))
+        self.assertEqual(query_count, new_query_count)
+
+    def test_contributors_are_returned(self):
+        _, data = self.count_list_queries()
+        self.assertEqual(
+            [{'id': self.user.id,
+              'name': 'test contributor 1 (First List)',
+              'is_verified': False}],
+            data['features'][0]['properties']['contributors'])
+
+
+class FacilityDetailsQueryCountTest(FacilityAPITestCaseBase):
+    def add_match(self, index):
+        list_item = FacilityListItem \
+            .objects \
+            .create(name='Other Name {}'.format(index),
+                    address='Other Address {}'.format(index),
+                    country_code='US',
+                    row_index=index,
+                    geocoded_point=Point(index, index),
+                    status=FacilityListItem.CONFIRMED_MATCH,
+                    source=self.source,
+                    facility=self.facility)
+        FacilityMatch \
+            .objects \
+            .create(status=FacilityMatch.CONFIRMED,
+                    facility=self.facility,
+                    facility_list_item=list_item,
+                    confidence=0.85,
+                    results='')
+
+    def get_details(self):
+        # Measure rendering the details rather than reading them from the
+        # details cache.
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse('facility-detail', kwargs={'pk': self.facility.id}))
+        self.assertEqual(200, response.status_code)
+        return len(queries), json.loads(response.content)
+
+    def test_query_count_does_not_depend_on_match_count(self):
+        self.get_details()
+        query_count, _ = self.get_details()
+
+        for index in range(2, 7):
+            self.add_match(index)
+
+        new_query_count, data = self.get_details()
+        self.assertEqual(query_count, new_query_count)
+
+        properties = data['properties']
+        self.assertEqual(
+            {'Item'} | {'Other Name {}'.format(i) for i in range(2, 7)},
+            set(properties['other_names']))
+        self.assertEqual(
+            {'Other Address {}'.format(i) for i in range(2, 7)},
+            set(properties['other_addresses']))
+        self.assertEqual(5, len(properties['other_locations']))
+        self.assertEqual(6, len(properties['contributors']))
+
+
+class FacilityDetailsCacheTest(FacilityAPITestCaseBase):
+    def setUp(self):
+        super(FacilityDetailsCacheTest, self).setUp()
+        cache.clear()
+        self.url = reverse('facility-detail', kwargs={'pk': self.facility.id})
+
+    def get_details(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(200, response.status_code)
+        return len(queries), json.loads(response.content)['properties']
+
+    def test_repeated_reads_use_cache(self):
+        uncached_query_count, data = self.get_details()
+        cached_query_count, cached_data = self.get_details()
+        self.assertLess(cached_query_count, uncached_query_count)
+        self.assertEqual(data, cached_data)
+
+    def test_facility_change_invalidates(self):
+        self.get_details()
+        self.facility.name = 'New Name'
+        self.facility.save()
+        _, data = self.get_details()
+        self.assertEqual('New Name', data['name'])
+
+    def test_list_item_change_invalidates(self):
+        self.get_details()
+        self.list_item.name = 'Other Name'
+        self.list_item.save()
+        _, data = self.get_details()
+        self.assertIn('Other Name', data['other_names'])
+
+    def test_source_change_invalidates(self):
+        _, data = self.get_details()
+        self.assertEqual(1, len(data['contributors']))
+        self.source.is_active = False
+        self.source.save()
+        _, data = self.get_details()
+        self.assertEqual(0, len(data['contributors']))
+
+    def test_contributor_change_invalidates(self):
+        self.get_details()
+        self.contributor.name = 'Renamed Contributor'
+        self.contributor.save()
+        _, data = self.get_details()
+        self.assertIn('Renamed Contributor',
+                      data['contributors'][0]['name'])
+
+    def test_location_change_invalidates(self):
+        self.get_details()
+        FacilityLocation.objects.create(facility=self.facility,
+                                        location=Point(1, 1),
+                                        notes='A note',
+                                        created_by=self.superuser)
+        _, data = self.get_details()
+        self.assertEqual('A note', data['other_locations'][0]['notes'])
+
+    def test_match_change_invalidates(self):
+        self.get_details()
+        self.match.status = FacilityMatch.REJECTED
+        self.match.save()
+        _, data = self.get_details()
+        self.assertEqual(0, len(data['contributors']))
+
+    def test_contributions_do_not_update_facilities(self):
+        updated_at = Facility.objects.get(pk=self.facility.id).updated_at
+        self.list_item.name = 'Other Name'
+        self.list_item.save()
+        self.match.save()
+        self.assertEqual(
+            updated_at, Facility.objects.get(pk=self.facility.id).updated_at)
+
+    def test_caches_each_visibility_level_separately(self):
+        _, data = self.get_details()
+        self.assertEqual(self.user.id,
+                         data['contributors'][0]['id'])
+
+        self.user.groups.add(Group.objects.get(
+            name=FeatureGroups.CAN_SUBMIT_PRIVATE_FACILITY))
+        self.client.login(email=self.user_email,
+                          password=self.user_password)
+        _, data = self.get_details()
+        self.assertEqual(['One Other'],
+                         [c['name'] for c in data['contributors']])
+
+
+class FacilityCursorPaginationTest(FacilityAPITestCaseBase):
+    def setUp(self):
+        super(FacilityCursorPaginationTest, self).setUp()
+        for index, name in enumerate(['Alpha', 'Beta', 'Beta', 'Gamma']):
+            self.create_facility(index + 2, name=name,
+                                 location=Point(index + 1, index + 1))
+        self.expected_ids = list(
+            Facility.objects.order_by('name', 'id').values_list(
+                'id', flat=True))
+
+    def get_all_pages(self, url):
+        ids = []
+        pages = 0
+        while url is not None:
+            response = self.client.get(url)
+            self.assertEqual(200, response.status_code)
+            data = json.loads(response.content)
+            self.assertNotIn('count', data)
+            self.assertNotIn('extent', data)
+            ids.extend(f['id'] for f in data['features'])
+            url = data['next']
+            pages += 1
+            self.assertLessEqual(pages, len(self.expected_ids) + 1)
+        return ids, pages
+
+    def test_pages_through_all_facilities_in_order(self):
+        ids, pages = self.get_all_pages('/api/facilities/?cursor=&pageSize=2')
+        self.assertEqual(self.expected_ids, ids)
+        self.assertEqual(3, pages)
+
+    def test_pages_through_search_results(self):
+        ids, _ = self.get_all_pages(
+            '/api/facilities/?cursor=&pageSize=1&q=Beta')
+        beta_ids = sorted(Facility.objects.filter(
+            name='Beta').values_list('id', flat=True))
+        self.assertEqual(beta_ids, ids)
+
+    def test_pages_through_ties_at_a_non_exact_similarity(self):
+        for index in range(6, 9):
+            self.create_facility(index, name='Beta Mills')
+        self.expected_ids = list(
+            Facility.objects.order_by('name', 'id').values_list(
+                'id', flat=True))
+
+        ids, _ = self.get_all_pages(
+            '/api/facilities/?cursor=&pageSize=1&q=Beta')
+        beta_ids = sorted(Facility.objects.filter(
+            name='Beta').values_list('id', flat=True))
+        beta_mills_ids = sorted(Facility.objects.filter(
+            name='Beta Mills').values_list('id', flat=True))
+        self.assertEqual(beta_ids + beta_mills_ids, ids)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/facilities/?cursor=invalid')
+        self.assertEqual(404, response.status_code)
+
+    def test_page_number_pagination_is_unchanged(self):
+        response = self.client.get('/api/facilities/?pageSize=2')
+        data = json.loads(response.content)
+        self.assertEqual(5, data['count'])
+        self.assertIn('extent', data)
+
+    def test_extent(self):
+        response = self.client.get('/api/facilities/extent/?countries=US')
+        self.assertEqual(200, response.status_code)
+        self.assertEqual([0, 0, 4, 4], json.loads(response.content)['extent'])
+
+        response = self.client.get('/api/facilities/extent/?countries=CN')
+        self.assertIsNone(json.loads(response.content)['extent'])
+
+
+class FacilityExportTest(FacilityAPITestCaseBase):
+    def setUp(self):
+        super(FacilityExportTest, self).setUp()
+        self.url = reverse('facility-export')
+
+    def login(self):
+        self.client.login(email=self.user_email,
+                          password=self.user_password)
+
+    def get_content(self, query_string=''):
+        response = self.client.get(self.url + query_string)
+        self.assertEqual(200, response.status_code)
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_requires_auth(self):
+        response = self.client.get(self.url)
+        self.assertEqual(401, response.status_code)
+
+    def test_csv(self):
+        self.login()
+        lines = self.get_content().splitlines()
+        self.assertEqual(2, len(lines))
+        self.assertEqual(
+            'oar_id,name,address,country_code,country_name,lat,lng,'
+            'contributors', lines[0])
+        self.assertTrue(lines[1].startswith(
+            '{},Name,Address,US,United States'.format(self.facility.id)))
+        self.assertTrue(lines[1].endswith(self.source.display_name))
+
+    def test_geojson(self):
+        self.login()
+        lines = self.get_content('?file_format=geojson').splitlines()
+        self.assertEqual(1, len(lines))
+        feature = json.loads(lines[0])
+        self.assertEqual(self.facility.id, feature['id'])
+        self.assertEqual(self.source.display_name,
+                         feature['properties']['contributors'][0]['name'])
+
+    def test_filters(self):
+        self.login()
+        lines = self.get_content('?countries=CN').splitlines()
+        self.assertEqual(1, len(lines))
+
+    def test_invalid_format(self):
+        self.login()
+        response = self.client.get(self.url + '?file_format=xls')
+        self.assertEqual(400, response.status_code)
+
+    def test_logs_download(self):
+        self.login()
+        self.get_content('?countries=US')
+        log = DownloadLog.objects.get(user=self.user)
+        self.assertEqual(1, log.record_count)
+        self.assertIn('countries=US', log.path)
+
+
+class FacilityDetailsBatchTest(FacilityAPITestCaseBase):
+    @override_switch('claim_a_facility', active=True)
+    def test_batch_matches_single_facility_details(self):
+        FacilityLocation.objects.create(facility=self.facility,
+                                        location=Point(1, 1),
+                                        notes='A note',
+                                        created_by=self.superuser)
+        expected = FacilityDetailsSerializer(self.facility).data
+
+        batches = list(iter_facility_details_batches(
+            Facility.objects.order_by('id')))
+
+        self.assertEqual(1, len(batches))
+        self.assertEqual([expected], batches[0])
+
+
+class SnapshotFacilitiesTest(FacilityAPITestCaseBase):
+    def test_writes_csv_and_parquet_snapshots(self):
+        self.create_facility(2)
+        self.create_facility(3)
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            # A chunk size smaller than the number of facilities writes more
+            # than one batch to each file
+            call_command('snapshot_facilities', '--output-dir', output_dir,
+                         '--bucket', '', '--chunk-size', '2',
+                         stdout=StringIO())
+
+            with open(os.path.join(output_dir, MANIFEST_FILE_NAME)) as f:
+                manifest = json.load(f)
+            self.assertEqual(3, manifest['facility_count'])
+            csv_name, parquet_name = manifest['files']
+
+            with gzip.open(os.path.join(output_dir, csv_name), 'rt',
+                           newline='') as f:
+                rows = list(csv.reader(f))
+            self.assertEqual(list(SNAPSHOT_COLUMNS), rows[0])
+            self.assertEqual(
+                sorted(Facility.objects.values_list('id', flat=True)),
+                [row[0] for row in rows[1:]])
+
+            table = pyarrow.parquet.read_table(
+                os.path.join(output_dir, parquet_name))
+            self.assertEqual(3, table.num_rows)
+            self.assertEqual(list(SNAPSHOT_COLUMNS), table.column_names)
+
+
+class FacilityListCountExtentTest(FacilityAPITestCaseBase):
+    def setUp(self):
+        super(FacilityListCountExtentTest, self).setUp()
+        cache.clear()
+        self.create_facility(2, name='Other', location=Point(2, 2))
+
+    def get_page(self, page):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                '/api/facilities/?pageSize=1&page={}'.format(page))
+        self.assertEqual(200, response.status_code)
+        return queries, json.loads(response.content)
+
+    def test_count_and_extent_are_computed_once(self):
+        queries, data = self.get_page(1)
+        self.assertEqual(2, data['count'])
+        self.assertEqual([0, 0, 2, 2], data['extent'])
+        self.assertEqual(1, len([q for q in queries
+                                 if 'ST_EXTENT' in q['sql'].upper()]))
+
+        queries, data = self.get_page(2)
+        self.assertEqual(2, data['count'])
+        self.assertEqual([0, 0, 2, 2], data['extent'])
+        self.assertEqual(0, len([q for q in queries
+                                 if 'ST_EXTENT' in q['sql'].upper()
+                                 or 'COUNT(' in q['sql'].upper()]))
+
+
+class FacilityCountTest(FacilityAPITestCaseBase):
+    def setUp(self):
+        super(FacilityCountTest, self).setUp()
+        FacilityCountCache.clear()
+
+    def get_counts(self):
+        return dict(FacilityCount.objects.values_list('name', 'count'))
+
+    def get_count(self, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('facility-count'), params)
+        self.assertEqual(200, response.status_code)
+        facility_queries = [q for q in queries
+                            if '"api_facility"' in q['sql']]
+        return json.loads(response.content)['count'], len(facility_queries)
+
+    def test_counts_are_maintained(self):
+        contributor_name = FacilityCount.contributor_name(self.contributor.id)
+        self.assertEqual({'total': 1, 'country:US': 1, contributor_name: 1},
+                         self.get_counts())
+
+        self.facility.country_code = 'CN'
+        self.facility.save()
+        self.assertEqual({'total': 1, 'country:US': 0, 'country:CN': 1,
+                          contributor_name: 1},
+                         self.get_counts())
+
+        self.source.is_public = False
+        self.source.save()
+        self.assertEqual(0, self.get_counts()[contributor_name])
+
+        self.source.is_public = True
+        self.source.save()
+        self.list_item.facility = None
+        self.list_item.save()
+        self.match.delete()
+        self.facility.delete()
+        self.assertEqual({'total': 0, 'country:US': 0, 'country:CN': 0,
+                          contributor_name: 0},
+                         self.get_counts())
+
+    def test_refresh_all_matches_maintained_counts(self):
+        counts = self.get_counts()
+        FacilityCount.objects.refresh_all()
+        self.assertEqual(counts, self.get_counts())
+
+    def test_maintained_counts_do_not_query_facilities(self):
+        self.assertEqual((1, 0), self.get_count({}))
+        self.assertEqual((1, 0), self.get_count({'countries': ['US', 'CN']}))
+        self.assertEqual((1, 0),
+                         self.get_count({'contributors': self.contributor.id}))
+
+    def test_other_filters_are_cached(self):
+        params = {'countries': 'US', 'contributors': self.contributor.id}
+        count, facility_queries = self.get_count(params)
+        self.assertEqual(1, count)
+        self.assertGreater(facility_queries, 0)
+
+        count, facility_queries = self.get_count(params)
+        self.assertEqual(1, count)
+        # Only the tile cache key is read from the facility table
+        self.assertEqual(1, facility_queries)
+
+
+class ContributorLookupsCacheTest(FacilityAPITestCaseBase):
+    def setUp(self):
+        super(ContributorLookupsCacheTest, self).setUp()
+        cache.clear()
+
+    def test_not_modified(self):
+        for url in [reverse('all_contributors'),
+                    reverse('all_contributor_types')]:
+            response = self.client.get(url)
+            self.assertEqual(200, response.status_code)
+            etag = response['ETag']
+
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(304, response.status_code)
+            self.assertEqual(etag, response['ETag'])
+
+    def test_cached_lookups_are_read_with_one_query(self):
+        self.client.get(reverse('all_contributors'))
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('all_contributor_types'))
+        self.assertIn(['Other', 'Other [1]'], response.json())
+
+    def test_changes_invalidate_lookups(self):
+        response = self.client.get(reverse('all_contributors'))
+        self.assertEqual([[self.contributor.id, self.contributor.name]],
+                         response.json())
+        etag = response['ETag']
+
+        self.contributor.name = 'Renamed Contributor'
+        self.contributor.save()
+        response = self.client.get(reverse('all_contributors'),
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual([[self.contributor.id, 'Renamed Contributor']],
+                         response.json())
+
+        self.list_item.status = FacilityListItem.GEOCODED
+        self.list_item.save()
+        response = self.client.get(reverse('all_contributors'))
+        self.assertEqual([], response.json())
+
+
+class FacilityEventTest(FacilityAPITestCaseBase):
+    def setUp(self):
+        super(FacilityEventTest, self).setUp()
+        self.client.login(email=self.superuser_email,
+                          password=self.superuser_password)
+        self.history_url = '/api/facilities/{}/history/'.format(
+            self.facility.id)
+
+    def get_history(self):
+        response = self.client.get(self.history_url)
+        self.assertEqual(200, response.status_code)
+        return [(e['action'], e['detail']) for e in response.json()]
+
+    @override_flag('can_get_facility_history', active=True)
+    def test_events_are_written_with_changes(self):
+        self.assertEqual(
+            ['ASSOCIATE', 'CREATE'],
+            list(FacilityEvent
+                 .objects
+                 .filter(facility_id=self.facility.id)
+                 .order_by('-occurred_at')
+                 .values_list('action', flat=True)))
+
+        self.facility.name = 'New Name'
+        self.facility.save()
+
+        response = self.client.get(self.history_url)
+        data = response.json()
+        self.assertEqual('OTHER', data[0]['action'])
+        self.assertEqual({'old': 'Name', 'new': 'New Name'},
+                         data[0]['changes']['name'])
+
+    @override_flag('can_get_facility_history', active=True)
+    def test_backfill_replays_history(self):
+        self.client.post(
+            '/api/facilities/{}/update-location/'.format(self.facility.id),
+            {UpdateLocationParams.LAT: 41, UpdateLocationParams.LNG: 43})
+        self.match.is_active = False
+        self.match.save()
+        history = self.get_history()
+        self.assertEqual(4, len(history))
+
+        FacilityEvent.objects.all().delete()
+        call_command('backfill_facility_events', stdout=StringIO())
+
+        self.assertEqual(history, self.get_history())
+
+    @override_flag('can_get_facility_history', active=True)
+    def test_history_is_replayed_when_there_are_no_events(self):
+        self.client.post(
+            '/api/facilities/{}/update-location/'.format(self.facility.id),
+            {UpdateLocationParams.LAT: 41, UpdateLocationParams.LNG: 43})
+        history = self.get_history()
+
+        FacilityEvent.objects.all().delete()
+
+        self.assertEqual(history, self.get_history())
+
+    @override_flag('can_get_facility_history', active=True)
+    def test_history_is_replayed_when_it_predates_the_events(self):
+        self.client.post(
+            '/api/facilities/{}/update-location/'.format(self.facility.id),
+            {UpdateLocationParams.LAT: 41, UpdateLocationParams.LNG: 43})
+        history = self.get_history()
+
+        FacilityEvent.objects.all().delete()
+        self.facility.name = 'New Name'
+        self.facility.save()
+        self.assertEqual(1, FacilityEvent.objects.filter(
+            facility_id=self.facility.id).count())
+
+        new_history = self.get_history()
+        self.assertEqual(len(history) + 1, len(new_history))
+        self.assertEqual(history, new_history[1:])
+
+
+class FacilityHistoryReplayQueryCountTest(FacilityAPITestCaseBase):
+    def add_match(self, index):
+        facility_list = FacilityList \
+            .objects \
+            .create(header='header',
+                    file_name='list {}'.format(index),
+                    name='List {}'.format(index))
+        source = Source \
+            .objects \
+            .create(source_type=Source.LIST,
+                    facility_list=facility_list,
+                    contributor=self.contributor)
+        list_item = FacilityListItem \
+            .objects \
+            .create(name='Item',
+                    address='Address',
+                    country_code='US',
+                    row_index=index,
+                    geocoded_point=Point(0, 0),
+                    status=FacilityListItem.CONFIRMED_MATCH,
+                    source=source,
+                    facility=self.facility)
+        FacilityMatch \
+            .objects \
+            .create(status=FacilityMatch.AUTOMATIC,
+                    facility=self.facility,
+                    facility_list_item=list_item,
+                    confidence=0.85,
+                    results='')
+
+    def replay(self):
+        with CaptureQueriesContext(connection) as queries:
+            events = list(
+                iter_facility_events_from_history([self.facility.id]))
+        return len(queries), events
+
+    def test_query_count_does_not_grow_with_matches(self):
+        query_count, events = self.replay()
+        self.assertEqual(['CREATE', 'ASSOCIATE'],
+                         [e.action for e in events])
+
+        for index in range(1, 4):
+            self.add_match(index)
+        self.source.is_active = False
+        self.source.save()
+        FacilityList.objects.create(header='header',
+                                    file_name='replacement',
+                                    name='Replacement',
+                                    replaces=self.list)
+
+        new_query_count, new_events = self.replay()
+        self.assertEqual(query_count, new_query_count)
+        self.assertEqual(
+            ['CREATE'] + ['ASSOCIATE'] * 4 + ['DISSOCIATE'],
+            [e.action for e in new_events])
+        self.assertEqual(
+            'Dissociate facility {} from {} via list {}'.format(
+                self.facility.id, self.contributor.name, self.list.name),
+            new_events[-1].detail)
+
+
+class SetBasedMergeTest(FacilityAPITestCaseBase):
+    def create_merge_facility(self, match_count):
+        facility_list = FacilityList \
+            .objects \
+            .create(header='header',
+                    file_name='merge',
+                    name='Merge List')
+        source = Source \
+            .objects \
+            .create(source_type=Source.LIST,
+                    facility_list=facility_list,
+                    contributor=self.contributor)
+        facility = self.create_facility(0, name='Merge Name', source=source)
+        for index in range(1, match_count):
+            item = FacilityListItem \
+                .objects \
+                .create(name='Item {}'.format(index),
+                        address='Address',
+                        country_code='US',
+                        row_index=index,
+                        geocoded_point=Point(0, 0),
+                        status=FacilityListItem.CONFIRMED_MATCH,
+                        source=source,
+                        facility=facility)
+            FacilityMatch \
+                .objects \
+                .create(status=FacilityMatch.AUTOMATIC,
+                        facility=facility,
+                        facility_list_item=item,
+                        confidence=0.85,
+                        results='')
+        FacilityAlias.objects.create(facility=facility,
+                                     oar_id='US{}'.format(match_count))
+        return facility
+
+    def merge(self, match_count):
+        merge = self.create_merge_facility(match_count)
+        with CaptureQueriesContext(connection) as queries:
+            merge_facilities(self.facility, merge, user=self.superuser)
+        return merge, len(queries)
+
+    def test_query_count_does_not_grow_with_matches(self):
+        _, query_count = self.merge(1)
+        _, larger_query_count = self.merge(5)
+        self.assertEqual(query_count, larger_query_count)
+
+    def test_merge_writes_history(self):
+        merge, _ = self.merge(2)
+        reason = 'Merged {} into {}'.format(merge.id, self.facility.id)
+
+        for match in FacilityMatch.objects.exclude(id=self.match.id):
+            self.assertEqual(self.facility.id, match.facility_id)
+            self.assertEqual(FacilityMatch.MERGED, match.status)
+            record = match.history.latest()
+            self.assertEqual(reason, record.history_change_reason)
+            self.assertEqual(FacilityMatch.MERGED, record.status)
+            self.assertEqual(self.superuser, record.history_user)
+
+            item = match.facility_list_item
+            self.assertEqual(self.facility.id, item.facility_id)
+            self.assertEqual(
+                {'action': ProcessingAction.MERGE_FACILITY,
+                 'merged_oar_id': merge.id},
+                {k: item.processing_results[-1][k]
+                 for k in ('action', 'merged_oar_id')})
+
+        alias = FacilityAlias.objects.get(oar_id='US2')
+        self.assertEqual(self.facility, alias.facility)
+        self.assertEqual(
+            'Merging {} into {}'.format(merge.id, self.facility.id),
+            alias.history.latest().history_change_reason)
+        self.assertTrue(FacilityAlias.objects.filter(
+            oar_id=merge.id, facility=self.facility).exists())
+        self.assertFalse(Facility.objects.filter(id=merge.id).exists())
+
+
+class FacilityBatchMergeTest(FacilityAPITestCaseBase):
+    def setUp(self):
+        super(FacilityBatchMergeTest, self).setUp()
+        self.url = '/api/facilities/merge-batch/'
+        self.facility_two = self.create_facility(2)
+        self.facility_three = self.create_facility(3)
+        self.facility_four = self.create_facility(4)
+
+    def test_requires_superuser(self):
+        self.client.login(email=self.user_email,
+                          password=self.user_password)
+        response = self.client.post(
+            self.url, {'groups': []}, format='json')
+        self.assertEqual(403, response.status_code)
+
+    def test_rejects_merge_into_self(self):
+        self.client.login(email=self.superuser_email,
+                          password=self.superuser_password)
+        response = self.client.post(
+            self.url,
+            {'groups': [{'target': self.facility.id,
+                         'merge': [self.facility.id]}]},
+            format='json')
+        self.assertEqual(400, response.status_code)
+
+    def test_merges_groups_and_reports_errors(self):
+        self.client.login(email=self.superuser_email,
+                          password=self.superuser_password)
+        generation = FacilityCacheGeneration.get()
+
+        response = self.client.post(
+            self.url,
+            {'groups': [
+                {'target': self.facility.id,
+                 'merge': [self.facility_two.id, self.facility_three.id]},
+                {'target': self.facility_four.id,
+                 'merge': [self.facility_two.id]},
+            ]},
+            format='json')
+
+        self.assertEqual(200, response.status_code)
+        data = response.json()
+        self.assertEqual(2, data['merged'])
+        self.assertEqual(1, len(data['errors']))
+        self.assertEqual(self.facility_two.id, data['errors'][0]['merge'])
+
+        self.assertEqual(
+            {self.facility.id, self.facility_four.id},
+            set(Facility.objects.values_list('id', flat=True)))
+        self.assertEqual(
+            3, FacilityMatch.objects.filter(facility=self.facility).count())
+        self.assertEqual(generation + 1, FacilityCacheGeneration.get())
+
+
+class FacilityDuplicateClusterTest(FacilityAPITestCaseBase):
+    def setUp(self):
+        super(FacilityDuplicateClusterTest, self).setUp()
+        self.run = FacilityDuplicateRun.objects.create(model_settings=b'',
+                                                       threshold=0.5)
+        self.facility_two = self.create_facility(2)
+        self.facility_three = self.create_facility(3)
+
+    def test_save_country_clusters(self):
+        count = save_country_clusters(self.run, 'US', [
+            ([self.facility_two.id, self.facility.id, 'US2019000MISSING'],
+             [0.9, 0.8, 0.7]),
+            ([self.facility_three.id, 'US2019001MISSING'], [0.9, 0.9]),
+        ])
+
+        self.assertEqual(1, count)
+        cluster = FacilityDuplicateCluster.objects.get(run=self.run)
+        self.assertEqual([self.facility_two.id, self.facility.id],
+                         cluster.oar_ids)
+        self.assertEqual(0.8, cluster.score)
+        self.assertEqual(self.facility.id, cluster.target_oar_id)
+        self.assertEqual(FacilityDuplicateCluster.PENDING, cluster.status)
+
+        self.run.refresh_from_db()
+        self.assertEqual(['US'], self.run.completed_countries)
+
+    def test_merge_approved_clusters(self):
+        save_country_clusters(self.run, 'US', [
+            ([self.facility.id, self.facility_two.id], [0.9, 0.9]),
+        ])
+        save_country_clusters(self.run, 'CA', [
+            ([self.facility.id, self.facility_three.id], [0.6, 0.6]),
+        ])
+        FacilityDuplicateCluster \
+            .objects \
+            .filter(country_code='US') \
+            .update(status=FacilityDuplicateCluster.APPROVED)
+
+        call_command('batch_merge_facilities', '--run', str(self.run.id),
+                     stdout=StringIO(), stderr=StringIO())
+
+        self.assertFalse(
+            Facility.objects.filter(id=self.facility_two.id).exists())
+        self.assertTrue(
+            Facility.objects.filter(id=self.facility_three.id).exists())
+        self.assertEqual(
+            {'US': FacilityDuplicateCluster.MERGED,
+             'CA': FacilityDuplicateCluster.PENDING},
+            dict(FacilityDuplicateCluster
+                 .objects
+                 .values_list('country_code', 'status')))
+
+
+class FacilityListItemsQueryCountTest(FacilityAPITestCaseBase):
+    def setUp(self):
+        super(FacilityListItemsQueryCountTest, self).setUp()
+        self.client.login(email=self.user_email,
+                          password=self.user_password)
+        self.items_url = reverse('facility-list-items',
+                                 kwargs={'pk': self.list.id})
+        self.export_url = reverse('facility-list-export-items',
+                                  kwargs={'pk': self.list.id})
+
+    def add_item(self, index):
+        list_item = FacilityListItem \
+            .objects \
+            .create(name='Other Name {}'.format(index),
+                    address='Other Address {}'.format(index),
+                    country_code='US',
+                    row_index=index,
+                    geocoded_point=Point(index, index),
+                    status=FacilityListItem.POTENTIAL_MATCH,
+                    source=self.source)
+        FacilityMatch \
+            .objects \
+            .create(status=FacilityMatch.PENDING,
+                    facility=self.facility,
+                    facility_list_item=list_item,
+                    confidence=0.5,
+                    results='')
+
+    def get_items(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.items_url)
+        self.assertEqual(200, response.status_code)
+        return len(queries), json.loads(response.content)
+
+    def test_query_count_does_not_depend_on_item_count(self):
+        query_count, _ = self.get_items()
+
+        for index in range(2, 7):
+            self.add_item(index)
+
+        new_query_count, data = self.get_items()
+        self.assertEqual(query_count, new_query_count)
+        self.assertEqual(6, data['count'])
+
+        item = data['results'][0]
+        self.assertEqual(self.facility.id,
+                         item['matched_facility']['oar_id'])
+        self.assertEqual(self.list_item.id,
+                         item['matched_facility']['created_from_id'])
+        self.assertEqual(self.facility.id, item['matches'][0]['oar_id'])
+        self.assertEqual(self.facility.id,
+                         data['results'][1]['matches'][0]['oar_id'])
+
+    def test_export_items(self):
+        for index in range(2, 4):
+            self.add_item(index)
+
+        response = self.client.get(self.export_url)
+        self.assertEqual(200, response.status_code)
+        lines = b''.join(response.streaming_content) \
+            .decode('utf-8') \
+            .splitlines()
+        self.assertEqual([1, 2, 3],
+                         [json.loads(line)['row_index'] for line in lines])
+        self.assertEqual(self.facility.id,
+                         json.loads(lines[2])['matches'][0]['oar_id'])
+
+    def test_export_items_filters_by_status(self):
+        self.add_item(2)
+
+        response = self.client.get(
+            self.export_url + '?status=POTENTIAL_MATCH')
+        lines = b''.join(response.streaming_content) \
+            .decode('utf-8') \
+            .splitlines()
+        self.assertEqual([2], [json.loads(line)['row_index']
+                               for line in lines])
+
+    def test_export_items_unknown_list(self):
+        self.client.logout()
+        self.client.login(email=self.superuser_email,
+                          password=self.superuser_password)
+        response = self.client.get(
+            reverse('facility-list-export-items', kwargs={'pk': 0}))
+        self.assertEqual(404, response.status_code)
+
+
+class FacilityListItemStatusCountTest(FacilityAPITestCaseBase):
+    def get_counts(self):
+        return {
+            (source_id, status): count
+            for source_id, status, count
+            in FacilityListItemStatusCount
+            .objects
+            .filter(count__gt=0)
+            .values_list('source_id', 'status', 'count')
+        }
+
+    def add_list(self, index):
+        facility_list = FacilityList \
+            .objects \
+            .create(header='header',
+                    file_name='list-{}'.format(index),
+                    name='List {}'.format(index))
+        source = Source \
+            .objects \
+            .create(facility_list=facility_list,
+                    source_type=Source.LIST,
+                    is_active=True,
+                    is_public=True,
+                    contributor=self.contributor)
+        FacilityListItem \
+            .objects \
+            .create(row_index=0,
+                    status=FacilityListItem.ERROR_PARSING,
+                    source=source)
+        return source
+
+    def get_lists(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('facility-list-list'))
+        self.assertEqual(200, response.status_code)
+        return len(queries), json.loads(response.content)
+
+    def test_counts_are_maintained(self):
+        confirmed = (self.source.id, FacilityListItem.CONFIRMED_MATCH)
+        self.assertEqual({confirmed: 1}, self.get_counts())
+
+        item = FacilityListItem \
+            .objects \
+            .create(row_index=2,
+                    status=FacilityListItem.UPLOADED,
+                    source=self.source)
+        uploaded = (self.source.id, FacilityListItem.UPLOADED)
+        self.assertEqual({confirmed: 1, uploaded: 1}, self.get_counts())
+
+        item = FacilityListItem.objects.get(id=item.id)
+        item.status = FacilityListItem.GEOCODED
+        item.save()
+        geocoded = (self.source.id, FacilityListItem.GEOCODED)
+        self.assertEqual({confirmed: 1, geocoded: 1}, self.get_counts())
+
+        item.delete()
+        self.assertEqual({confirmed: 1}, self.get_counts())
+
+    def test_refresh_all_matches_maintained_counts(self):
+        self.add_list(2)
+        counts = self.get_counts()
+        FacilityListItemStatusCount.objects.refresh_all()
+        self.assertEqual(counts, self.get_counts())
+
+    def test_deleting_a_source_deletes_its_counts(self):
+        source = self.add_list(2)
+        source.delete()
+        self.assertFalse(FacilityListItemStatusCount
+                         .objects
+                         .filter(source_id=source.id)
+                         .exists())
+
+    def test_list_query_count_does_not_depend_on_list_count(self):
+        self.client.login(email=self.user_email,
+                          password=self.user_password)
+        query_count, _ = self.get_lists()
+
+        for index in range(2, 7):
+            self.add_list(index)
+
+        new_query_count, data = self.get_lists()
+        self.assertEqual(query_count, new_query_count)
+        self.assertEqual(6, len(data))
+
+        first_list = next(fl for fl in data if fl['id'] == self.list.id)
+        self.assertEqual(1, first_list['item_count'])
+        self.assertEqual([FacilityListItem.CONFIRMED_MATCH],
+                         first_list['statuses'])
+        self.assertEqual(1, first_list['status_counts'][
+            FacilityListItem.CONFIRMED_MATCH])
+        self.assertEqual(0, first_list['status_counts'][
+            FacilityListItem.UPLOADED])
+
+
+class FacilityListItemsSearchTest(FacilityAPITestCaseBase):
+    def setUp(self):
+        super(FacilityListItemsSearchTest, self).setUp()
+        self.client.login(email=self.user_email,
+                          password=self.user_password)
+        self.unmatched_item = FacilityListItem \
+            .objects \
+            .create(name='Unmatched Item',
+                    address='Other Street',
+                    country_code='US',
+                    row_index=2,
+                    status=FacilityListItem.GEOCODED,
+                    source=self.source)
+
+    def search(self, search):
+        response = self.client.get(
+            reverse('facility-list-items', kwargs={'pk': self.list.id}),
+            {'search': search})
+        self.assertEqual(200, response.status_code)
+        return [item['id']
+                for item in json.loads(response.content)['results']]
+
+    def test_searches_item_name_and_address(self):
+        self.assertEqual([self.unmatched_item.id], self.search('unmatched'))
+        self.assertEqual([self.unmatched_item.id], self.search('other st'))
+
+    def test_searches_matched_facility_name_and_address(self):
+        self.facility.name = 'Facility Only Name'
+        self.facility.address = 'Factory Road'
+        self.facility.save()
+        self.assertEqual([self.list_item.id], self.search('only name'))
+        self.assertEqual([self.list_item.id], self.search('factory road'))
+
+    def test_each_item_is_returned_once(self):
+        self.list_item.name = 'Name'
+        self.list_item.save()
+        self.assertEqual([self.list_item.id], self.search('name'))
+
+
+class FacilityMatchBulkDecisionTest(FacilityAPITestCaseBase):
+    def setUp(self):
+        super(FacilityMatchBulkDecisionTest, self).setUp()
+        self.client.login(email=self.user_email,
+                          password=self.user_password)
+        self.url = reverse('facility-match-bulk')
+
+    def add_item(self, index, facilities, geocoded=True):
+        list_item = FacilityListItem \
+            .objects \
+            .create(name='Potential {}'.format(index),
+                    address='Address {}'.format(index),
+                    country_code='US',
+                    row_index=index,
+                    geocoded_point=Point(index, index) if geocoded else None,
+                    status=FacilityListItem.POTENTIAL_MATCH,
+                    source=self.source)
+        matches = [
+            FacilityMatch
+            .objects
+            .create(status=FacilityMatch.PENDING,
+                    facility=facility,
+                    facility_list_item=list_item,
+                    confidence=0.5,
+                    results='')
+            for facility in facilities
+        ]
+        return list_item, matches
+
+    def post_decisions(self, decisions):
+        response = self.client.post(
+            self.url,
+            {'decisions': [{'id': match.id, 'decision': decision}
+                           for match, decision in decisions]},
+            format='json')
+        self.assertEqual(200, response.status_code)
+        return json.loads(response.content)
+
+    def test_requires_auth(self):
+        self.client.logout()
+        response = self.client.post(self.url, {}, format='json')
+        self.assertEqual(401, response.status_code)
+
+    def test_requires_decisions(self):
+        response = self.client.post(self.url, {'decisions': []},
+                                    format='json')
+        self.assertEqual(400, response.status_code)
+
+    def test_rejects_duplicate_matches(self):
+        _, (match,) = self.add_item(2, [self.facility])
+        response = self.client.post(
+            self.url,
+            {'decisions': [{'id': match.id, 'decision': 'confirm'},
+                           {'id': match.id, 'decision': 'reject'}]},
+            format='json')
+        self.assertEqual(400, response.status_code)
+        self.assertIn(str(match.id), response.content.decode())
+        self.assertEqual(FacilityMatch.PENDING,
+                         FacilityMatch.objects.get(pk=match.id).status)
+
+    def test_applies_decisions(self):
+        item_a, (match_a1, match_a2) = self.add_item(
+            2, [self.facility, self.facility])
+        item_b, (match_b,) = self.add_item(3, [self.facility])
+        item_c, (match_c,) = self.add_item(4, [self.facility],
+                                           geocoded=False)
+
+        data = self.post_decisions([(match_a1, 'confirm'),
+                                    (match_b, 'reject'),
+                                    (match_c, 'reject')])
+        self.assertEqual([], data['errors'])
+        self.assertEqual(3, len(data['items']))
+        self.assertEqual(
+            {str(self.list.id): [FacilityListItem.CONFIRMED_MATCH,
+                                 FacilityListItem.ERROR_MATCHING]},
+            data['list_statuses'])
+
+        match_a1.refresh_from_db()
+        match_a2.refresh_from_db()
+        self.assertEqual(FacilityMatch.CONFIRMED, match_a1.status)
+        self.assertEqual(FacilityMatch.REJECTED, match_a2.status)
+        self.assertEqual(
+            FacilityMatch.CONFIRMED,
+            FacilityMatch.history.filter(id=match_a1.id).first().status)
+        item_a.refresh_from_db()
+        self.assertEqual(FacilityListItem.CONFIRMED_MATCH, item_a.status)
+        self.assertEqual(self.facility.id, item_a.facility_id)
+
+        item_b.refresh_from_db()
+        self.assertEqual(FacilityListItem.CONFIRMED_MATCH, item_b.status)
+        new_facility = Facility.objects.get(created_from=item_b)
+        self.assertEqual(new_facility.id, item_b.facility_id)
+        self.assertEqual('Potential 3', new_facility.name)
+        self.assertTrue(FacilityMatch.objects.filter(
+            facility=new_facility,
+            facility_list_item=item_b,
+            status=FacilityMatch.CONFIRMED).exists())
+        self.assertTrue(Facility.history.filter(id=new_facility.id).exists())
+        self.assertTrue(FacilityEvent.objects.filter(
+            facility_id=new_facility.id,
+            action=FacilityHistoryActions.CREATE).exists())
+        self.assertEqual(
+            2, FacilityCount.objects.get(name=FacilityCount.TOTAL).count)
+
+        item_c.refresh_from_db()
+        self.assertEqual(FacilityListItem.ERROR_MATCHING, item_c.status)
+        self.assertFalse(Facility.objects.filter(created_from=item_c).exists())
+
+    def test_keeps_item_pending_until_all_matches_are_rejected(self):
+        item, (match_1, match_2) = self.add_item(
+            2, [self.facility, self.facility])
+
+        data = self.post_decisions([(match_1, 'reject')])
+        self.assertEqual(FacilityListItem.POTENTIAL_MATCH,
+                         data['items'][0]['status'])
+        match_2.refresh_from_db()
+        self.assertEqual(FacilityMatch.PENDING, match_2.status)
+
+    def test_reports_decisions_that_cannot_be_applied(self):
+        item, (match_1, match_2) = self.add_item(
+            2, [self.facility, self.facility])
+
+        data = self.post_decisions([(self.match, 'confirm'),
+                                    (match_1, 'confirm'),
+                                    (match_2, 'confirm')])
+        self.assertEqual([], data['items'])
+        self.assertEqual(
+            [self.match.id, match_1.id, match_2.id],
+            sorted(e['id'] for e in data['errors']))
+        match_1.refresh_from_db()
+        self.assertEqual(FacilityMatch.PENDING, match_1.status)
+
+    def test_query_count_does_not_depend_on_decision_count(self):
+        def count_queries(first_index, item_count):
+            matches = [
+                self.add_item(first_index + i, [self.facility])[1][0]
+                for i in range(item_count)
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                self.post_decisions([(m, 'reject') for m in matches])
+            return len(queries)
+
+        self.assertEqual(count_queries(2, 1), count_queries(10, 3))
+
+
+class FacilityListReplacementTest(FacilityAPITestCaseBase):
+    def setUp(self):
+        super(FacilityListReplacementTest, self).setUp()
+        self.client.login(email=self.user_email,
+                          password=self.user_password)
+        self.list.header = 'country,name,address'
+        self.list.save()
+        self.list_item.raw_data = 'US,Item,Address'
+        self.list_item.save()
+
+    def replace_list(self, header='country,name,address'):
+        csv_file = SimpleUploadedFile(
+            'facilities.csv',
+            '\n'.join([header,
+                       'US,Item,Address',
+                       'US,New Place,1 Main St']).encode(),
+            content_type='text/csv')
+        response = self.client.post(reverse('facility-list-list'),
+                                    {'file': csv_file,
+                                     'replaces': self.list.id},
+                                    format='multipart')
+        self.assertEqual(200, response.status_code)
+        return FacilityList.objects.get(id=json.loads(response.content)['id'])
+
+    def test_unchanged_rows_inherit_results(self):
+        new_list = self.replace_list()
+        inherited, changed = FacilityListItem \
+            .objects \
+            .filter(source=new_list.source) \
+            .order_by('row_index')
+
+        self.assertEqual(FacilityListItem.CONFIRMED_MATCH, inherited.status)
+        self.assertEqual(self.facility.id, inherited.facility_id)
+        self.assertEqual('Item', inherited.name)
+        self.assertEqual(
+            self.list_item.id,
+            inherited.processing_results[-1]['inherited_from_list_item_id'])
+        match = FacilityMatch.objects.get(facility_list_item=inherited)
+        self.assertEqual(FacilityMatch.AUTOMATIC, match.status)
+        self.assertEqual(self.facility.id, match.facility_id)
+        self.assertTrue(FacilityEvent.objects.filter(
+            facility_id=self.facility.id,
+            action=FacilityHistoryActions.ASSOCIATE,
+            occurred_at__gte=new_list.created_at).exists())
+
+        self.assertEqual(FacilityListItem.UPLOADED, changed.status)
+        self.assertEqual([changed.id],
+                         [i.id for i in get_items_to_process(new_list.source)])
+        self.assertEqual(
+            {FacilityListItem.CONFIRMED_MATCH: 1,
+             FacilityListItem.UPLOADED: 1},
+            FacilityListItemStatusCount
+            .objects
+            .counts_by_source([new_list.source.id])[new_list.source.id])
+
+    def test_removed_rows_are_processed_again(self):
+        self.match.is_active = False
+        self.match.save()
+        new_list = self.replace_list()
+        self.assertEqual(2, get_items_to_process(new_list.source).count())
+
+    def test_rows_are_processed_again_when_header_changes(self):
+        new_list = self.replace_list(header='country,address,name')
+        self.assertEqual(2, get_items_to_process(new_list.source).count())
+        self.assertFalse(FacilityMatch.objects.filter(
+            facility_list_item__source=new_list.source).exists())
@@ -0,0 +1,173 @@
+import json
+import logging
+import threading
+
+from bisect import bisect_left
+
+from api.constants import FacilitiesQueryParams
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the histogram buckets. Values larger than the last bound are
+# counted in an overflow bucket labeled with `+Inf`.
+QUERY_TIME_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+TILE_SIZE_BUCKETS_BYTES = (1024, 10240, 51200, 102400, 262144, 524288,
+                           1048576, 2097152, 5242880)
+
+FILTER_PARAMS = (
+    FacilitiesQueryParams.Q,
+    FacilitiesQueryParams.NAME,
+    FacilitiesQueryParams.CONTRIBUTORS,
+    FacilitiesQueryParams.CONTRIBUTOR_TYPES,
+    FacilitiesQueryParams.COUNTRIES,
+    FacilitiesQueryParams.COMBINE_CONTRIBUTORS,
+    FacilitiesQueryParams.BOUNDARY,
+)
+
+
+def get_filter_shape(params):
+    """
+    Describe which filters are present in a set of facility query params
+    without including the filter values, so that tiles can be grouped by the
+    kind of query used to build them rather than by the exact query.
+
+    Arguments:
+    params (dict) -- Request query parameters whose potential choices are
+                     enumerated in `api.constants.FacilitiesQueryParams`
+
+    Returns:
+    A string like "contributors:2,countries:1" or "none" if no filters were
+    passed.
+    """
+    shape = []
+    for param in FILTER_PARAMS:
+        if hasattr(params, 'getlist'):
+            values = [v for v in params.getlist(param) if v]
+        else:
+            value = params.get(param)
+            values = value if isinstance(value, list) else [value]
+            values = [v for v in values if v]
+        if values:
+            shape.append('{}:{}'.format(param, len(values)))
+    return ','.join(shape) if shape else 'none'
+
+
+def _bucket_label(buckets, value):
+    index = bisect_left(buckets, value)
+    if index == len(buckets):
+        return '+Inf'
+    return str(buckets[index])
+
+
+class TileMetrics:
+    """
+    An in-process aggregation of tile generation measurements grouped by
+    layer, zoom, and filter shape. Each web worker keeps its own copy, which
+    is reset when the worker restarts.
+    """
+    _lock = threading.Lock()
+    _stats = {}
+
+    @classmethod
+    def record(cls, layer, z, filter_shape, query_time_ms, size_bytes,
+               feature_count):
+        key = (layer, z, filter_shape)
+        time_bucket = _bucket_label(QUERY_TIME_BUCKETS_MS, query_time_ms)
+        size_bucket = _bucket_label(TILE_SIZE_BUCKETS_BYTES, size_bytes)
+        with cls._lock:
+            stats = cls._stats.get(key)
+            if stats is None:
+                stats = {
+                    'count': 0,
+                    'empty_count': 0,
+                    'total_query_time_ms': 0.0,
+                    'max_query_time_ms': 0.0,
+                    'total_bytes': 0,
+                    'max_bytes': 0,
+                    'total_features': 0,
+                    'max_features': 0,
+                    'query_time_ms_histogram': {},
+                    'bytes_histogram': {},
+                }
+                cls._stats[key] = stats
+            stats['count'] += 1
+            if feature_count == 0:
+                stats['empty_count'] += 1
+            stats['total_query_time_ms'] += query_time_ms
+            stats['max_query_time_ms'] = max(stats['max_query_time_ms'],
+                                             query_time_ms)
+            stats['total_bytes'] += size_bytes
+            stats['max_bytes'] = max(stats['max_bytes'], size_bytes)
+            stats['total_features'] += feature_count
+            stats['max_features'] = max(stats['max_features'], feature_count)
+            time_histogram = stats['query_time_ms_histogram']
+            time_histogram[time_bucket] = \
+                time_histogram.get(time_bucket, 0) + 1
+            bytes_histogram = stats['bytes_histogram']
+            bytes_histogram[size_bucket] = \
+                bytes_histogram.get(size_bucket, 0) + 1
+
+    @classmethod
+    def summary(cls):
+        """
+        Return a list of aggregated measurements, sorted so that the
+        layer/zoom/filter combinations that consumed the most total query time
+        are listed first.
+        """
+        with cls._lock:
+            items = [(key, dict(stats,
+                                query_time_ms_histogram=dict(
+                                    stats['query_time_ms_histogram']),
+                                bytes_histogram=dict(
+                                    stats['bytes_histogram'])))
+                     for key, stats in cls._stats.items()]
+
+        summary = []
+        for (layer, z, filter_shape), stats in items:
+            count = stats['count']
+            summary.append({
+                'layer': layer,
+                'zoom': z,
+                'filter_shape': filter_shape,
+                'count': count,
+                'empty_count': stats['empty_count'],
+                'total_query_time_ms': round(stats['total_query_time_ms'], 2),
+                'mean_query_time_ms': round(
+                    stats['total_query_time_ms'] / count, 2),
+                'max_query_time_ms': round(stats['max_query_time_ms'], 2),
+                'mean_bytes': int(stats['total_bytes'] / count),
+                'max_bytes': stats['max_bytes'],
+                'mean_features': round(stats['total_features'] / count, 2),
+                'max_features': stats['max_features'],
+                'query_time_ms_histogram': stats['query_time_ms_histogram'],
+                'bytes_histogram': stats['bytes_histogram'],
+            })
+        return sorted(summary, key=lambda s: s['total_query_time_ms'],
+                      reverse=True)
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._stats = {}
+
+
+def record_tile_metrics(layer, z, x, y, params, query_time_ms, size_bytes,
+                        feature_count):
+    """
+    Write a structured log line describing a generated tile and add the
+    measurements to the in-process `TileMetrics` histogram.
+    """
+    filter_shape = get_filter_shape(params)
+    logger.info(json.dumps({
+        'event': 'tile_generated',
+        'layer': layer,
+        'z': z,
+        'x': x,
+        'y': y,
+        'filter_shape': filter_shape,
+        'query_time_ms': round(query_time_ms, 2),
+        'bytes': size_bytes,
+        'features': feature_count,
+    }))
+    TileMetrics.record(layer, z, filter_shape, query_time_ms, size_bytes,
+                       feature_count)
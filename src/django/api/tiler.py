@@ -1,11 +1,34 @@
+import time
+
 import mercantile
 
 from django.contrib.gis.geos import Polygon
 from django.db import connection
 
-from api.models import Facility
+from api.filter_cache import get_filtered_facilities
+from api.tile_metrics import record_tile_metrics
 
 GRID_ZOOM_FACTOR = 3
+CLUSTER_ZOOM_FACTOR = 4
+
+
+def execute_tile_query(query, params_for_sql, query_params, layer, z, x, y):
+    """
+    Execute a query that selects an `ST_AsMVT` tile and the number of features
+    it contains, record the query time, tile size, and feature count, and
+    return the tile.
+    """
+    start = time.perf_counter()
+    with connection.cursor() as cursor:
+        cursor.execute(query, params_for_sql)
+        rows = cursor.fetchall()
+    query_time_ms = (time.perf_counter() - start) * 1000
+
+    tile, feature_count = rows[0]
+    size_bytes = len(tile) if tile is not None else 0
+    record_tile_metrics(layer, z, x, y, query_params, query_time_ms,
+                        size_bytes, feature_count)
+    return tile
 
 
 def get_facility_grid_vector_tile(params, layer, z, x, y):
@@ -29,9 +52,7 @@ def get_facility_grid_vector_tile(params, layer, z, x, y):
     hex_grid_idx_query = \
         'CREATE INDEX hex_grid_idx ON hex_grid USING gist (geom)'
 
-    location_query, location_params = Facility \
-        .objects \
-        .filter_by_query_params(params) \
+    location_query, location_params = get_filtered_facilities(params) \
         .values('location') \
         .query \
         .sql_with_params()
@@ -65,19 +86,19 @@ def get_facility_grid_vector_tile(params, layer, z, x, y):
     join_query = join_query.format(where_clause=where_clause)
 
     st_asmvt_query = \
-        'SELECT ST_AsMVT(q, \'{}\') FROM ({}) AS q'.format(layer, join_query)
+        'SELECT ST_AsMVT(q, \'{}\'), count(*) FROM ({}) AS q'.format(
+            layer, join_query)
 
     full_query = ';\n'.join([
         hex_grid_query, hex_grid_idx_query, st_asmvt_query
     ])
 
-    with connection.cursor() as cursor:
-        cursor.execute(full_query, location_params)
-        rows = cursor.fetchall()
-        return rows[0][0]
+    return execute_tile_query(full_query, location_params, params,
+                              layer, z, x, y)
 
 
-def get_facilities_vector_tile(params, layer, z, x, y):
+def get_facilities_vector_tile(params, layer, z, x, y,
+                               include_details=True):
     """
     Create a vector tile for a layer generated via PostGIS's `ST_AsMVT`
     function, filtered by params.
@@ -85,11 +106,14 @@ def get_facilities_vector_tile(params, layer, z, x, y):
     Arguments:
     params (dict) -- Request query parameters whose potential choices are
                      enumerated in `api.constants.FacilitiesQueryParams`
-    layer (string) -- The name of the tile layer. Currently only "facilities"
-                      is supported.
+    layer (string) -- The name of the tile layer.
     z (int) -- Zoom level.
     x (int) -- X (horizontal) position for requested tile on a grid.
     y (int) -- Y (vertical) position for requested tile on a grid.
+    include_details (bool) -- If True, include the facility name and address
+                              in the feature attributes. If False, include
+                              only the OAR ID and a compact integer `key` and
+                              let the client fetch details when needed.
 
     Returns:
     A vector tile.
@@ -117,31 +141,103 @@ def get_facilities_vector_tile(params, layer, z, x, y):
         tile_bounds.east + ew_buffer,
         tile_bounds.north + ns_buffer))
 
-    query, params_for_sql = Facility \
-        .objects \
-        .filter_by_query_params(params) \
+    select = {
+        'location': mvt_geom_query.format(
+            xmin=tile_bounds.west,
+            ymin=tile_bounds.south,
+            xmax=tile_bounds.east,
+            ymax=tile_bounds.north,
+        ),
+        'x': x,
+        'y': y,
+        'z': z,
+    }
+
+    if include_details:
+        fields = ('location', 'id', 'name', 'address', 'x', 'y', 'z')
+    else:
+        # Every facility is created from exactly one list item, so the item
+        # ID is a unique integer that encodes much smaller than the OAR ID.
+        select['key'] = '"api_facility"."created_from_id"'
+        fields = ('location', 'id', 'key', 'x', 'y', 'z')
+
+    query, params_for_sql = get_filtered_facilities(params) \
         .filter(location__within=filter_polygon) \
-        .extra(
-            select={
-                'location': mvt_geom_query.format(
-                    xmin=tile_bounds.west,
-                    ymin=tile_bounds.south,
-                    xmax=tile_bounds.east,
-                    ymax=tile_bounds.north,
-                ),
-                'x': x,
-                'y': y,
-                'z': z,
-            }
-        ) \
-        .values('location', 'id', 'name', 'address', 'x', 'y', 'z') \
+        .extra(select=select) \
+        .values(*fields) \
         .query \
         .sql_with_params()
 
     st_asmvt_query = \
-        'SELECT ST_AsMVT(q, \'{}\') FROM ({}) AS q'.format(layer, query)
+        'SELECT ST_AsMVT(q, \'{}\'), count(*) FROM ({}) AS q'.format(
+            layer, query)
 
-    with connection.cursor() as cursor:
-        cursor.execute(st_asmvt_query, params_for_sql)
-        rows = cursor.fetchall()
-        return rows[0][0]
+    return execute_tile_query(st_asmvt_query, params_for_sql, params,
+                              layer, z, x, y)
+
+
+def get_facility_clusters_vector_tile(params, layer, z, x, y):
+    """
+    Create a vector tile of facility clusters, filtered by params. Facilities
+    are grouped by snapping them to a grid of square cells aligned with the
+    tile edges so that no cluster is split across two tiles. Each feature is
+    placed at the centroid of the clustered facilities and carries only the
+    number of facilities in the cluster, the cluster extent, and, for
+    clusters with a single facility, the facility ID.
+
+    Arguments:
+    params (dict) -- Request query parameters whose potential choices are
+                     enumerated in `api.constants.FacilitiesQueryParams`
+    layer (string) -- The name of the tile layer.
+    z (int) -- Zoom level.
+    x (int) -- X (horizontal) position for requested tile on a grid.
+    y (int) -- Y (vertical) position for requested tile on a grid.
+
+    Returns:
+    A vector tile.
+    """
+    tile_bounds = mercantile.bounds(x, y, z)
+    xy_bounds = mercantile.xy_bounds(x, y, z)
+
+    cell_width = \
+        abs(xy_bounds.right - xy_bounds.left) / (2 ** CLUSTER_ZOOM_FACTOR)
+
+    filter_polygon = Polygon.from_bbox((
+        tile_bounds.west, tile_bounds.south,
+        tile_bounds.east, tile_bounds.north))
+
+    facility_query, params_for_sql = get_filtered_facilities(params) \
+        .filter(location__within=filter_polygon) \
+        .values('id', 'location') \
+        .query \
+        .sql_with_params()
+
+    cluster_query = """
+        SELECT
+          ST_AsMVTGeom(
+            ST_Centroid(ST_Collect(ST_Transform(f.location, 3857))),
+            ST_MakeEnvelope({xmin}, {ymin}, {xmax}, {ymax}, 3857)
+          ) AS location,
+          count(*) AS count,
+          CASE WHEN count(*) = 1 THEN min(f.id) END AS id,
+          ST_XMin(ST_Extent(f.location)) AS xmin,
+          ST_YMin(ST_Extent(f.location)) AS ymin,
+          ST_XMax(ST_Extent(f.location)) AS xmax,
+          ST_YMax(ST_Extent(f.location)) AS ymax
+        FROM ({facility_query}) AS f
+        GROUP BY ST_SnapToGrid(
+          ST_Transform(f.location, 3857),
+          {half_width}, {half_width}, {width}, {width})
+    """
+    cluster_query = cluster_query.format(
+        xmin=xy_bounds.left, ymin=xy_bounds.bottom,
+        xmax=xy_bounds.right, ymax=xy_bounds.top,
+        width=cell_width, half_width=cell_width / 2,
+        facility_query=facility_query)
+
+    st_asmvt_query = \
+        'SELECT ST_AsMVT(q, \'{}\'), count(*) FROM ({}) AS q'.format(
+            layer, cluster_query)
+
+    return execute_tile_query(st_asmvt_query, params_for_sql, params,
+                              layer, z, x, y)
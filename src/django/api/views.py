@@ -10,17 +10,18 @@ from django.conf import settings
 from django.core.files.uploadedfile import (InMemoryUploadedFile,
                                             TemporaryUploadedFile)
 from django.db import transaction
-from django.db.models import F, Q, Count
+from django.db.models import F, Q
 from django.core import exceptions as core_exceptions
 from django.core.validators import validate_email
 from django.contrib.auth import (authenticate, login, logout)
 from django.contrib.auth import password_validation
 from django.contrib.auth.hashers import check_password
 from django.contrib.gis.geos import Point
-from django.contrib.gis.db.models import Extent
-from django.http import Http404
+from django.contrib.postgres.search import TrigramSimilarity
+from django.http import Http404, StreamingHttpResponse
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.http import parse_etags
 from django.views.decorators.cache import cache_control
 from rest_framework import viewsets, status, mixins, schemas
 from rest_framework.authtoken.views import ObtainAuthToken
@@ -53,6 +54,7 @@ from oar import urls
 from oar.settings import MAX_UPLOADED_FILE_SIZE_IN_BYTES, ENVIRONMENT
 
 from api.constants import (CsvHeaderField,
+                           FacilitiesQueryParams,
                            FacilityListQueryParams,
                            FacilityListItemsQueryParams,
                            FacilityMergeQueryParams,
@@ -60,11 +62,15 @@ from api.constants import (CsvHeaderField,
                            ProcessingAction,
                            LogDownloadQueryParams,
                            UpdateLocationParams,
-                           FeatureGroups)
+                           FeatureGroups,
+                           FacilitySummariesQueryParams,
+                           FacilityExportQueryParams,
+                           FacilityExportFormats)
 from api.geocoding import geocode_address
 from api.matching import match_item, GazetteerCacheTimeoutError
 from api.models import (FacilityList,
                         FacilityListItem,
+                        FacilityListItemStatusCount,
                         FacilityClaim,
                         FacilityClaimReviewNote,
                         Facility,
@@ -75,6 +81,8 @@ from api.models import (FacilityList,
                         DownloadLog,
                         Version,
                         FacilityLocation,
+                        FacilityContributor,
+                        FacilityEvent,
                         Source)
 from api.processing import (parse_csv_line,
                             parse_csv,
@@ -88,6 +96,9 @@ from api.serializers import (FacilityListSerializer,
                              FacilityListQueryParamsSerializer,
                              FacilitySerializer,
                              FacilityDetailsSerializer,
+                             FacilitySummariesQueryParamsSerializer,
+                             FacilityExportQueryParamsSerializer,
+                             FacilitySummarySerializer,
                              FacilityMatchSerializer,
                              FacilityCreateBodySerializer,
                              FacilityCreateQueryParamsSerializer,
@@ -97,12 +108,15 @@ from api.serializers import (FacilityListSerializer,
                              FacilityClaimDetailsSerializer,
                              ApprovedFacilityClaimSerializer,
                              FacilityMergeQueryParamsSerializer,
+                             FacilityBatchMergeSerializer,
+                             FacilityMatchBulkDecisionSerializer,
                              LogDownloadQueryParamsSerializer,
                              FacilityUpdateLocationParamsSerializer)
 from api.countries import COUNTRY_CHOICES
 from api.aws_batch import submit_jobs
 from api.permissions import IsRegisteredAndConfirmed, IsAllowedHost
-from api.pagination import FacilitiesGeoJSONPagination
+from api.pagination import (FacilitiesGeoJSONPagination,
+                            FacilitiesGeoJSONCursorPagination)
 from api.mail import (send_claim_facility_confirmation_email,
                       send_claim_facility_approval_email,
                       send_claim_facility_denial_email,
@@ -111,11 +125,29 @@ from api.mail import (send_claim_facility_confirmation_email,
                       send_claim_update_notice_to_list_contributors)
 from api.exceptions import BadRequestException
 from api.tiler import (get_facilities_vector_tile,
-                       get_facility_grid_vector_tile)
+                       get_facility_grid_vector_tile,
+                       get_facility_clusters_vector_tile)
+from api.tile_metrics import TileMetrics, record_tile_metrics
+from api.filter_cache import (get_filtered_facilities,
+                              get_filtered_facilities_count_and_extent,
+                              count_filtered_facilities)
+from api.cache_invalidation import invalidate_facility_caches
+from api.contributor_lookups import get_contributor_lookups
+from api.details_cache import get_facility_details
+from api.exports import (iter_facility_features,
+                         iter_facilities_csv,
+                         iter_facilities_ndjson,
+                         iter_facility_list_items_ndjson,
+                         serialize_facility_list_items)
 from api.renderers import MvtRenderer
 from api.facility_history import (create_facility_history_list,
                                   create_associate_match_change_reason,
-                                  create_dissociate_match_change_reason)
+                                  create_dissociate_match_change_reason,
+                                  make_facility_split_event,
+                                  make_replaced_item_events)
+from api.facility_merge import merge_facilities, merge_facility_groups
+from api.list_replacement import create_list_items
+from api.match_decisions import apply_match_decisions
 
 
 def _report_facility_claim_email_error_to_rollbar(claim):
@@ -374,6 +406,17 @@ class APIAuthToken(ObtainAuthToken):
             return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+def lookup_response(request, data, etag):
+    """
+    Respond with a cached lookup, or with 304 Not Modified if the client
+    already has the current version.
+    """
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(data, headers=headers)
+
+
 @api_view(['GET'])
 def all_contributors(request):
     """
@@ -386,25 +429,9 @@ def all_contributors(request):
             [2, "Contributor Two"]
         ]
     """
-    valid_sources = Source.objects.filter(
-        is_active=True, is_public=True,
-        facilitylistitem__status__in=FacilityListItem.COMPLETE_STATUSES)
-    response_data = [
-        (contributor.id, contributor.name)
-        for contributor
-        in Contributor.objects.filter(
-            source__in=valid_sources).distinct().order_by('name')
-    ]
-
-    return Response(response_data)
-
-
-def getContributorTypeCount(value, counts):
-    try:
-        type = counts.get(contrib_type=value)
-        return type['num_type']
-    except Contributor.DoesNotExist:
-        return 0
+    lookups = get_contributor_lookups()
+    return lookup_response(request, lookups['contributors'],
+                           lookups['contributors_etag'])
 
 
 @api_view(['GET'])
@@ -422,20 +449,9 @@ def all_contributor_types(request):
             ["Factory / Facility", "Factory / Facility [1]"]
         ]
     """
-    active_contrib_ids = Source.objects.filter(
-        is_active=True, is_public=True,
-        facilitylistitem__status__in=FacilityListItem.COMPLETE_STATUSES
-    ).values('contributor_id')
-    counts = Contributor.objects.filter(id__in=active_contrib_ids).values(
-        'contrib_type').annotate(num_type=Count('contrib_type'))
-
-    types = [
-        (t[0], f'{t[1]} [{getContributorTypeCount(t[0], counts)}]')
-        for t
-        in Contributor.CONTRIB_TYPE_CHOICES
-    ]
-
-    return Response(types)
+    lookups = get_contributor_lookups()
+    return lookup_response(request, lookups['contributor_types'],
+                           lookups['contributor_types_etag'])
 
 
 @api_view(['GET'])
@@ -595,6 +611,9 @@ class FacilitiesAutoSchema(AutoSchema):
         if 'update-location' in path:
             return None
 
+        if 'summaries' in path:
+            return None
+
         return super(FacilitiesAutoSchema, self).get_link(
             path, method, base_url)
 
@@ -636,6 +655,13 @@ class FacilitiesViewSet(mixins.ListModelMixin,
         Returns a list of facilities in GeoJSON format for a given query.
         (Maximum of 500 facilities per page.)
 
+        Include a `cursor` parameter, which may be empty for the first page,
+        to page through the results using the `next` link of each response
+        instead of page numbers. Cursor pages are faster to read deep into
+        large result sets but do not include `count` or `extent`, which can
+        be requested from `/api/facilities/count/` and
+        `/api/facilities/extent/`.
+
         ### Sample Response
             {
                 "type": "FeatureCollection",
@@ -697,17 +723,44 @@ class FacilitiesViewSet(mixins.ListModelMixin,
         if not params.is_valid():
             raise ValidationError(params.errors)
 
-        queryset = Facility \
-            .objects \
-            .filter_by_query_params(request.query_params) \
-            .order_by('name')
-
-        page_queryset = self.paginate_queryset(queryset)
+        queryset = get_filtered_facilities(request.query_params)
 
-        extent = queryset.aggregate(Extent('location'))['location__extent']
+        search = request.query_params.get(
+            FacilitiesQueryParams.Q,
+            request.query_params.get(FacilitiesQueryParams.NAME, None))
+
+        if search:
+            # Rank text search results so that the closest matches are
+            # listed first
+            queryset = queryset \
+                .annotate(similarity=TrigramSimilarity('name', search)) \
+                .order_by('-similarity', 'name')
+        else:
+            queryset = queryset.order_by('name')
+
+        if FacilitiesQueryParams.CURSOR in request.query_params:
+            # Cursor pages do not include the count or extent, which can be
+            # requested once per search from the `count` and `extent`
+            # endpoints rather than recomputed for every page.
+            paginator = FacilitiesGeoJSONCursorPagination()
+            page_queryset = paginator.paginate_queryset(queryset, request,
+                                                        view=self)
+            serializer = FacilitySerializer(
+                page_queryset, many=True,
+                context=self.get_page_context(page_queryset))
+            return paginator.get_paginated_response(serializer.data)
+
+        # The count and extent are computed together and cached so that only
+        # the page itself is queried when paging through results
+        count, extent = get_filtered_facilities_count_and_extent(
+            request.query_params)
+        page_queryset = self.paginator.paginate_queryset(
+            queryset, request, view=self, count=count)
 
         if page_queryset is not None:
-            serializer = FacilitySerializer(page_queryset, many=True)
+            serializer = FacilitySerializer(
+                page_queryset, many=True,
+                context=self.get_page_context(page_queryset))
             response = self.get_paginated_response(serializer.data)
             response.data['extent'] = extent
             return response
@@ -716,6 +769,12 @@ class FacilitiesViewSet(mixins.ListModelMixin,
         response_data['extent'] = extent
         return Response(response_data)
 
+    def get_page_context(self, page_queryset):
+        return {
+            'sources_by_facility': Facility.sources_for_facilities(
+                [f.id for f in page_queryset]),
+        }
+
     def retrieve(self, request, pk=None):
         """
         Returns the facility specified by a given OAR ID in GeoJSON format.
@@ -747,11 +806,7 @@ class FacilitiesViewSet(mixins.ListModelMixin,
             }
         """
         try:
-            queryset = Facility.objects.get(pk=pk)
-            context = {'request': request}
-            response_data = FacilityDetailsSerializer(
-                queryset, context=context).data
-            return Response(response_data)
+            return Response(get_facility_details(pk, request))
         except Facility.DoesNotExist:
             raise NotFound()
 
@@ -1249,14 +1304,118 @@ class FacilitiesViewSet(mixins.ListModelMixin,
     def count(self, request):
         """
         Returns a count of total Facilities available in the Open Apparel
-        Registry.
+        Registry. If search parameters are included, returns the count of
+        Facilities matching the search.
 
         ### Sample Response
             { "count": 100000 }
         """
-        count = Facility.objects.count()
+        params = FacilityQueryParamsSerializer(data=request.query_params)
+
+        if not params.is_valid():
+            raise ValidationError(params.errors)
+
+        count = count_filtered_facilities(request.query_params)
         return Response({"count": count})
 
+    @action(detail=False, methods=['get'])
+    def extent(self, request):
+        """
+        Returns the bounding box of the Facilities matching the search
+        parameters as [xmin, ymin, xmax, ymax], or null if no Facilities
+        match.
+
+        ### Sample Response
+            { "extent": [-74.2, 40.5, -73.7, 40.9] }
+        """
+        params = FacilityQueryParamsSerializer(data=request.query_params)
+
+        if not params.is_valid():
+            raise ValidationError(params.errors)
+
+        _, extent = get_filtered_facilities_count_and_extent(
+            request.query_params)
+        return Response({"extent": extent})
+
+    @action(detail=False, methods=['get'],
+            permission_classes=(IsRegisteredAndConfirmed,))
+    def export(self, request):
+        """
+        Downloads all of the Facilities matching the search parameters as a
+        CSV file or, if `file_format=geojson` is included, as newline
+        delimited GeoJSON features. The download is recorded in the download
+        log.
+
+        ### Sample Response (CSV)
+            oar_id,name,address,country_code,country_name,lat,lng,contributors
+            US2019161ABC123,Shirts,1 Main St,US,United States,1,1,Brand A
+        """
+        params = FacilityExportQueryParamsSerializer(
+            data=request.query_params)
+
+        if not params.is_valid():
+            raise ValidationError(params.errors)
+
+        DownloadLog.objects.create(
+            user=request.user,
+            path=request.get_full_path(),
+            record_count=count_filtered_facilities(request.query_params),
+        )
+
+        queryset = get_filtered_facilities(request.query_params) \
+            .only('id', 'name', 'address', 'country_code', 'location') \
+            .order_by('name', 'id')
+        features = iter_facility_features(queryset, user=request.user)
+
+        file_format = params.validated_data[
+            FacilityExportQueryParams.FILE_FORMAT]
+        if file_format == FacilityExportFormats.GEOJSON:
+            response = StreamingHttpResponse(
+                iter_facilities_ndjson(features),
+                content_type='application/x-ndjson')
+            file_name = 'facilities.geojson'
+        else:
+            response = StreamingHttpResponse(
+                iter_facilities_csv(features),
+                content_type='text/csv; charset=utf-8')
+            file_name = 'facilities.csv'
+        response['Content-Disposition'] = \
+            'attachment; filename="{}"'.format(file_name)
+        return response
+
+    @action(detail=False, methods=['get'])
+    def summaries(self, request):
+        """
+        Returns the name, address, and country of each facility in a
+        comma-separated list of OAR IDs, in the order they were requested.
+        Used by the map to look up details for facilities drawn from
+        vector tiles that include only IDs.
+
+        ### Sample Request
+            /api/facilities/summaries/?ids=US2019161ABC123,CN2019161DEF456
+
+        ### Sample Response
+            [
+                {
+                    "id": "US2019161ABC123",
+                    "name": "Clothing, Inc.",
+                    "address": "1234 Main St",
+                    "country_code": "US",
+                    "country_name": "United States"
+                }
+            ]
+        """
+        params = FacilitySummariesQueryParamsSerializer(
+            data=request.query_params)
+
+        if not params.is_valid():
+            raise ValidationError(params.errors)
+
+        ids = params.validated_data[FacilitySummariesQueryParams.IDS]
+        facilities = Facility.objects.in_bulk(ids)
+        return Response(FacilitySummarySerializer(
+            [facilities[i] for i in ids if i in facilities], many=True).data)
+
     @action(detail=True, methods=['POST'],
             permission_classes=(IsRegisteredAndConfirmed,))
     @transaction.atomic
@@ -1410,51 +1569,57 @@ class FacilitiesViewSet(mixins.ListModelMixin,
         target = Facility.objects.get(id=target_id)
         merge = Facility.objects.get(id=merge_id)
 
-        now = str(datetime.utcnow())
-        for merge_match in merge.facilitymatch_set.all():
-            merge_match.facility = target
-            merge_match.status = FacilityMatch.MERGED
-            merge_match.changeReason = 'Merged {} into {}'.format(
-                merge.id, target.id)
-            merge_match.save()
-
-            merge_item = merge_match.facility_list_item
-            merge_item.facility = target
-            merge_item.processing_results.append({
-                'action': ProcessingAction.MERGE_FACILITY,
-                'started_at': now,
-                'error': False,
-                'finished_at': now,
-                'merged_oar_id': merge.id,
-            })
-            merge_item.save()
-
-        for alias in FacilityAlias.objects.filter(facility=merge):
-            oar_id = alias.oar_id
-            alias.changeReason = 'Merging {} into {}'.format(
-                merge.id,
-                target.id)
-            alias.delete()
-            FacilityAlias.objects.create(
-                facility=target,
-                oar_id=oar_id,
-                reason=FacilityAlias.MERGE)
-
-        FacilityAlias.objects.create(
-            oar_id=merge.id,
-            facility=target,
-            reason=FacilityAlias.MERGE)
-        # any change to this message will also need to
-        # be made in the `facility_history.py` module's
-        # `create_facility_history_dictionary` function
-        merge.changeReason = 'Merged with {}'.format(target.id)
-        merge.delete()
+        merge_facilities(target, merge, user=request.user)
 
         target.refresh_from_db()
         context = {'request': request}
         response_data = FacilityDetailsSerializer(target, context=context).data
         return Response(response_data)
 
+    @action(detail=False, methods=['POST'],
+            permission_classes=(IsRegisteredAndConfirmed,),
+            url_path='merge-batch')
+    def merge_batch(self, request):
+        """
+        Merge many groups of facilities. Each group names a target facility
+        and the facilities to merge into it. Groups are merged in chunks,
+        with one transaction per chunk. A merge that fails is reported and
+        does not stop the others. The merged facilities are not serialized.
+
+        ### Sample Request Body
+            {
+                "groups": [
+                    {
+                        "target": "US2019123AG4RD",
+                        "merge": ["US2019124BC7PQ", "US2019125XY2ZZ"]
+                    }
+                ]
+            }
+
+        ### Sample Response
+            {
+                "merged": 1,
+                "errors": [
+                    {
+                        "target": "US2019123AG4RD",
+                        "merge": "US2019125XY2ZZ",
+                        "error": "Facility US2019123AG4RD or US2019125XY2ZZ
+                                  does not exist."
+                    }
+                ]
+            }
+        """
+        if not request.user.is_superuser:
+            raise PermissionDenied()
+
+        params = FacilityBatchMergeSerializer(data=request.data)
+        if not params.is_valid():
+            raise ValidationError(params.errors)
+
+        merged_count, errors = merge_facility_groups(
+            params.validated_data['groups'], user=request.user)
+        return Response({'merged': merged_count, 'errors': errors})
+
     @action(detail=True, methods=['GET', 'POST'],
             permission_classes=(IsRegisteredAndConfirmed,))
     @transaction.atomic
@@ -1538,6 +1703,9 @@ class FacilitiesViewSet(mixins.ListModelMixin,
 
             list_item_for_match.save()
 
+            make_facility_split_event(
+                old_facility_id, new_facility.id, timezone.now()).save()
+
             return Response({
                 'match_id': match_for_new_facility.id,
                 'new_oar_id': new_facility.id,
@@ -1684,7 +1852,7 @@ class FacilitiesViewSet(mixins.ListModelMixin,
         facility.location = facility_location.location
         # any change to this message will also need to
         # be made in the `facility_history.py` module's
-        # `create_facility_history_dictionary` function
+        # `make_facility_event` function
         facility.changeReason = \
             'Submitted a new FacilityLocation ({})'.format(
                 facility_location.id)
@@ -1743,17 +1911,12 @@ class FacilitiesViewSet(mixins.ListModelMixin,
                               FeatureGroups.CAN_GET_FACILITY_HISTORY):
             raise PermissionDenied()
 
-        historical_facility_queryset = Facility.history.filter(id=pk)
+        facility_history = create_facility_history_list(
+            pk, user=request.user)
 
-        if historical_facility_queryset.count() == 0:
+        if len(facility_history) == 0:
             raise NotFound()
 
-        facility_history = create_facility_history_list(
-            historical_facility_queryset,
-            pk,
-            user=request.user
-        )
-
         return Response(facility_history)
 
 
@@ -1914,14 +2077,28 @@ class FacilityListViewSet(viewsets.ModelViewSet):
             replaces_source_qs = Source.objects.filter(facility_list=replaces)
             if replaces_source_qs.exists():
                 replaces_source_qs.update(is_active=False)
-
-        items = [FacilityListItem(row_index=idx,
-                                  raw_data=row,
-                                  source=source)
-                 for idx, row in enumerate(rows)]
-        FacilityListItem.objects.bulk_create(items)
-
-        if ENVIRONMENT in ('Staging', 'Production'):
+                # Queryset updates do not send `post_save` signals
+                invalidate_facility_caches()
+                replaces_source_ids = replaces_source_qs.values_list(
+                    'id', flat=True)
+                FacilityContributor.objects.refresh_for_sources(
+                    replaces_source_ids)
+                FacilityEvent.objects.bulk_create(make_replaced_item_events(
+                    FacilityListItem
+                    .objects
+                    .filter(source__in=replaces_source_qs,
+                            facility__isnull=False)
+                    .select_related('source__contributor',
+                                    'source__facility_list'),
+                    new_list.created_at))
+
+        # Rows that are unchanged from the replaced list inherit its results
+        # and are not processed again
+        item_count_to_process = create_list_items(
+            source, rows, replaced_list=replaces, user=request.user)
+
+        if ENVIRONMENT in ('Staging', 'Production') \
+                and item_count_to_process > 0:
             submit_jobs(ENVIRONMENT, new_list)
 
         serializer = self.get_serializer(new_list)
@@ -1971,10 +2148,18 @@ class FacilityListViewSet(viewsets.ModelViewSet):
                 facility_lists = FacilityList.objects.filter(
                     source__contributor=request.user.contributor)
 
-            facility_lists = facility_lists.order_by('-created_at')
+            facility_lists = list(facility_lists
+                                  .select_related('source__contributor')
+                                  .order_by('-created_at'))
+            status_counts_by_source = FacilityListItemStatusCount \
+                .objects \
+                .counts_by_source([fl.source.id for fl in facility_lists])
 
-            response_data = self.serializer_class(facility_lists,
-                                                  many=True).data
+            response_data = self.serializer_class(
+                facility_lists,
+                many=True,
+                context={'status_counts_by_source': status_counts_by_source},
+            ).data
             return Response(response_data)
         except Contributor.DoesNotExist:
             raise ValidationError('User contributor cannot be None')
@@ -2009,36 +2194,12 @@ class FacilityListViewSet(viewsets.ModelViewSet):
         except FacilityList.DoesNotExist:
             raise NotFound()
 
-    @action(detail=True, methods=['get'])
-    def items(self, request, pk):
+    def _get_items_queryset(self, request, pk):
         """
-        Returns data about a single page of Facility List Items.
-
-        ## Sample Response
-            {
-                "count": 25,
-                "next": "/api/facility-lists/16/items/?page=2&pageSize=20",
-                "previous": null,
-                "results": [
-                    "id": 1,
-                    "matches": [],
-                    "country_name": "United States",
-                    "processing_errors": null,
-                    "matched_facility": null,
-                    "row_index": 1,
-                    "raw_data": "List item 1, List item address 1",
-                    "status": "GEOCODED",
-                    "processing_started_at": null,
-                    "processing_completed_at": null,
-                    "name": "List item 1",
-                    "address": "List item address 1",
-                    "country_code": "US",
-                    "facility_list": 16
-                ],
-                ...
-            }
+        Return the items of one of the user's lists that match the `search`
+        and `status` query parameters, ordered by row index, with the matched
+        facility of each item selected in the same query.
         """
-
         special_case_q_statements = {
             FacilityListItem.NEW_FACILITY: Q(
                         Q(status__in=('MATCHED', 'CONFIRMED_MATCH')) &
@@ -2090,25 +2251,85 @@ class FacilityListViewSet(viewsets.ModelViewSet):
             .objects \
             .filter(source=facility_list.source)
         if search is not None and len(search) > 0:
-            queryset = queryset.filter(
-                Q(facility__name__icontains=search) |
-                Q(facility__address__icontains=search) |
+            # Searching the items and the matched facilities in separate
+            # subqueries, rather than with one condition across the join,
+            # lets each use its trigram indexes
+            matching_items = queryset.filter(
                 Q(name__icontains=search) |
                 Q(address__icontains=search))
+            items_with_matching_facilities = queryset.filter(
+                Q(facility__name__icontains=search) |
+                Q(facility__address__icontains=search))
+            queryset = queryset.filter(
+                Q(id__in=matching_items.values('id')) |
+                Q(id__in=items_with_matching_facilities.values('id')))
         if status is not None and len(status) > 0:
             q_statements = [make_q_from_status(s) for s in status]
             queryset = queryset.filter(reduce(operator.or_, q_statements))
 
-        queryset = queryset.order_by('row_index')
+        return queryset \
+            .select_related('facility') \
+            .order_by('row_index')
+
+    @action(detail=True, methods=['get'])
+    def items(self, request, pk):
+        """
+        Returns data about a single page of Facility List Items.
+
+        ## Sample Response
+            {
+                "count": 25,
+                "next": "/api/facility-lists/16/items/?page=2&pageSize=20",
+                "previous": null,
+                "results": [
+                    "id": 1,
+                    "matches": [],
+                    "country_name": "United States",
+                    "processing_errors": null,
+                    "matched_facility": null,
+                    "row_index": 1,
+                    "raw_data": "List item 1, List item address 1",
+                    "status": "GEOCODED",
+                    "processing_started_at": null,
+                    "processing_completed_at": null,
+                    "name": "List item 1",
+                    "address": "List item address 1",
+                    "country_code": "US",
+                    "facility_list": 16
+                ],
+                ...
+            }
+        """
+        queryset = self._get_items_queryset(request, pk)
 
         page_queryset = self.paginate_queryset(queryset)
         if page_queryset is not None:
-            serializer = FacilityListItemSerializer(page_queryset,
-                                                    many=True)
-            return self.get_paginated_response(serializer.data)
+            return self.get_paginated_response(
+                serialize_facility_list_items(page_queryset))
 
-        serializer = FacilityListItemSerializer(queryset, many=True)
-        return Response(serializer.data)
+        return Response(serialize_facility_list_items(queryset))
+
+    @action(detail=True, methods=['get'],
+            url_path='items/export', url_name='export-items')
+    def export_items(self, request, pk):
+        """
+        Downloads all of the Facility List Items matching the `search` and
+        `status` parameters as newline delimited JSON, one item per line in
+        the format returned by the items endpoint. The items are streamed in
+        batches so that lists of any size can be downloaded at once.
+
+        ## Sample Response
+            {"id": 1, "matches": [], "row_index": 1, "status": "GEOCODED", ...}
+            {"id": 2, "matches": [], "row_index": 2, "status": "GEOCODED", ...}
+        """
+        queryset = self._get_items_queryset(request, pk)
+
+        response = StreamingHttpResponse(
+            iter_facility_list_items_ndjson(queryset),
+            content_type='application/x-ndjson')
+        response['Content-Disposition'] = \
+            'attachment; filename="facility-list-{}-items.json"'.format(pk)
+        return response
 
     @transaction.atomic
     @action(detail=True, methods=['post'],
@@ -2144,11 +2365,9 @@ class FacilityListViewSet(viewsets.ModelViewSet):
 
             response_data = FacilityListItemSerializer(facility_list_item).data
 
-            response_data['list_statuses'] = (facility_list
-                                              .source
-                                              .facilitylistitem_set
-                                              .values_list('status', flat=True)
-                                              .distinct())
+            response_data['list_statuses'] = FacilityListItemStatusCount \
+                .objects \
+                .statuses_for_source(facility_list.source.id)
 
             return Response(response_data)
         except FacilityList.DoesNotExist:
@@ -2697,12 +2916,9 @@ class FacilityMatchViewSet(mixins.RetrieveModelMixin,
         response_data = FacilityListItemSerializer(facility_list_item).data
 
         if facility_list_item.source.source_type == Source.LIST:
-            response_data['list_statuses'] = (
-                facility_list_item
-                .source
-                .facilitylistitem_set
-                .values_list('status', flat=True)
-                .distinct())
+            response_data['list_statuses'] = FacilityListItemStatusCount \
+                .objects \
+                .statuses_for_source(facility_list_item.source_id)
 
         return Response(response_data)
 
@@ -2846,15 +3062,85 @@ class FacilityMatchViewSet(mixins.RetrieveModelMixin,
         response_data = FacilityListItemSerializer(facility_list_item).data
 
         if facility_list_item.source.source_type == Source.LIST:
-            response_data['list_statuses'] = (
-                facility_list_item
-                .source
-                .facilitylistitem_set
-                .values_list('status', flat=True)
-                .distinct())
+            response_data['list_statuses'] = FacilityListItemStatusCount \
+                .objects \
+                .statuses_for_source(facility_list_item.source_id)
 
         return Response(response_data)
 
+    @transaction.atomic
+    @action(detail=False, methods=['POST'], url_path='bulk')
+    def bulk(self, request):
+        """
+        Confirm or reject many potential matches between existing Facilities
+        and Facility List Items from an authenticated Contributor at once.
+
+        Each decision is applied as it would be by the `confirm` or `reject`
+        action. Decisions that cannot be applied, for example because the
+        match is no longer pending, are returned as errors without
+        preventing the other decisions from being applied.
+
+        Returns the updated Facility List Items and the distinct statuses of
+        the items of each affected list, keyed by list ID.
+
+        ## Sample Request Body
+
+            {
+                "decisions": [
+                    { "id": 1, "decision": "confirm" },
+                    { "id": 3, "decision": "reject" }
+                ]
+            }
+
+        ## Sample Response
+
+            {
+                "items": [
+                    {
+                        "id": 1,
+                        "matches": [...],
+                        "status": "CONFIRMED_MATCH",
+                        ...
+                    }
+                ],
+                "errors": [
+                    {
+                        "id": 3,
+                        "error": "facility match status must be PENDING"
+                    }
+                ],
+                "list_statuses": {
+                    "1": ["CONFIRMED_MATCH", "POTENTIAL_MATCH"]
+                }
+            }
+        """
+        params = FacilityMatchBulkDecisionSerializer(data=request.data)
+        if not params.is_valid():
+            raise ValidationError(params.errors)
+
+        items, errors = apply_match_decisions(
+            params.validated_data['decisions'],
+            request.user.contributor,
+            user=request.user)
+
+        list_sources = {
+            item.source.id: item.source.facility_list_id
+            for item in items
+            if item.source.source_type == Source.LIST
+        }
+        status_counts_by_source = FacilityListItemStatusCount \
+            .objects \
+            .counts_by_source(list_sources.keys())
+
+        return Response({
+            'items': serialize_facility_list_items(items),
+            'errors': errors,
+            'list_statuses': {
+                list_id: sorted(status_counts_by_source[source_id].keys())
+                for source_id, list_id in list_sources.items()
+            },
+        })
+
 
 @api_view(['GET'])
 @permission_classes([IsAllowedHost])
@@ -2865,7 +3151,8 @@ def get_tile(request, layer, cachekey, z, x, y, ext):
     if cachekey is None:
         raise BadRequestException('missing cache key')
 
-    if layer not in ['facilities', 'facilitygrid']:
+    if layer not in ['facilities', 'facilitypoints', 'facilitygrid',
+                     'facilityclusters']:
         raise BadRequestException('invalid layer name: {}'.format(layer))
 
     if ext != 'pbf':
@@ -2880,9 +3167,31 @@ def get_tile(request, layer, cachekey, z, x, y, ext):
         if layer == 'facilities':
             tile = get_facilities_vector_tile(
                 request.query_params, layer, z, x, y)
+        elif layer == 'facilitypoints':
+            tile = get_facilities_vector_tile(
+                request.query_params, layer, z, x, y, include_details=False)
         elif layer == 'facilitygrid':
             tile = get_facility_grid_vector_tile(
                 request.query_params, layer, z, x, y)
+        elif layer == 'facilityclusters':
+            tile = get_facility_clusters_vector_tile(
+                request.query_params, layer, z, x, y)
         return Response(tile.tobytes())
     except core_exceptions.EmptyResultSet:
+        record_tile_metrics(layer, z, x, y, request.query_params, 0, 0, 0)
         return Response(None, status=status.HTTP_204_NO_CONTENT)
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAdminUser])
+def tile_metrics(request):
+    """
+    Return the tile generation measurements aggregated by this worker process,
+    grouped by layer, zoom, and filter shape and sorted by total query time.
+    A DELETE request clears the aggregated measurements.
+    """
+    if request.method == 'DELETE':
+        TileMetrics.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    return Response(TileMetrics.summary())
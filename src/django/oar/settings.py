@@ -249,6 +249,10 @@ LOGGING = {
             'handlers': ['console'],
             'level': os.getenv('DJANGO_LOG_LEVEL', 'INFO'),
         },
+        'api.tile_metrics': {
+            'handlers': ['console'],
+            'level': os.getenv('TILE_METRICS_LOG_LEVEL', 'INFO'),
+        },
     },
 }
 
@@ -286,6 +290,13 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 
 STATICFILES_STORAGE = 'spa.storage.SPAStaticFilesStorage'
 
+# Registry snapshots
+# Written by the `snapshot_facilities` management command and, if a bucket is
+# configured, uploaded to S3 to be served as static files.
+
+SNAPSHOT_DIR = os.getenv('SNAPSHOT_DIR', os.path.join(BASE_DIR, 'snapshots'))
+SNAPSHOT_BUCKET = os.getenv('SNAPSHOT_BUCKET')
+
 # Watchman
 # https://github.com/mwarkentin/django-watchman
 